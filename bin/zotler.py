@@ -2,38 +2,177 @@
 
 import click
 import os
-from pathlib import Path
 import sys
 
-from zotler import zotler
+# Only modules needed to build the command line interface are imported here,
+# the others are imported by the modes using them. It keeps the start fast.
+from zotler import output, zotler
+from zotler.path_index import NORMALIZATIONS
+from zotler.stats import STATS_FORMATS, Statistics
+
+# Options each mode has no use for. They are rejected instead of being ignored.
+UNSUPPORTED_OPTIONS = {
+    '--batch': ('-m', '--by_library', '--library', '-x', '--quarantine', '--format',
+                '--diff', '--stats'),
+    '--watch': ('--exclude', '--include', '-n', '-j', '--engine', '--immutable',
+                '--snapshot', '-m', '--by_library', '--library', '-x',
+                '--quarantine', '--diff', '--stats'),
+    '--storage': ('--exclude', '--include', '-n', '-j', '--engine', '-m',
+                  '--by_library', '--library', '--diff'),
+    '--usage': ('--engine', '-m', '--by_library', '--library', '-x', '--quarantine',
+                '--format', '--diff'),
+    '--duplicates': ('-n', '--engine', '-m', '--by_library', '--library', '-x',
+                     '--quarantine', '--format', '--diff', '--stats'),
+    '--by_library': ('--engine',),
+    '-m': ('--engine',),
+    '-x': ('--diff',),
+    '--quarantine': ('--diff',),
+}
+UNSUPPORTED_OPTIONS['--discover'] = UNSUPPORTED_OPTIONS['--batch']
 
 
 @click.command(context_settings=dict(help_option_names=['-h', '--help']))
-@click.option('-l', '--list_of_files', type=click.File('r'),
-              callback=zotler.delete_files, expose_value=False, is_eager=True,
+@click.option('-l', '--list_of_files', type=click.File('r'), default=None,
               help=('File containing list of files to be deleted. Usually created by '
-                    'this script and specified by -o option. '
-                    'All other options will be omitted if this one is used.'))
+                    'this script and specified by -o option. Files outside ZotFile '
+                    'Custom Location and files referenced in Zotero database are '
+                    'skipped. Only -p, -d, -D, --immutable, -n, -j and -q options '
+                    'are used with this one.'))
+@click.option('--undo', 'undo_dir', type=click.Path(exists=True, file_okay=False),
+              default=None,
+              help='Move files quarantined in the run directory back to their '
+                   'original locations and remove the run directory. If '
+                   '--quarantine is given, the run has to be in that directory.')
+@click.option('--purge', 'purge_dir', type=click.Path(exists=True, file_okay=False),
+              default=None,
+              help='Delete the quarantine run directory with all its files. If '
+                   '--quarantine is given, the run has to be in that directory.')
 @click.option('-p', '--zotero_prefs', type=click.Path(exists=True), default=None,
               help='Path to Zotero settings file prefs.js. If omitted, path to '
                    '~/.zotero/xxxxxxxx.default/prefs.js file is used.')
 @click.option('-d', '--zotero_dbase', type=click.Path(exists=True, dir_okay=False),
               default=None,
-              help='Path to Zotero database (zotero.sqlite file). If omitted, Home'
-                   'directory specified by -d option or default location is used')
+              help='Path to Zotero database (zotero.sqlite file). If omitted, Home '
+                   'directory specified by -D option or Zotero data directory '
+                   'read from prefs.js is used.')
 @click.option('-D', '--zotero_home_dir', type=click.Path(exists=True, file_okay=False),
               default=None,
               help='Path to Zotero home directory. It is not used, if path to Zotero '
-                   'database file (-f) is provided. If omitted, default path'
-                   '~/Zotero/ is used.')
+                   'database file (-d) is provided. If omitted, Zotero data '
+                   'directory read from prefs.js (default ~/Zotero/) is used.')
+@click.option('--immutable', is_flag=True,
+              help='Open Zotero database as immutable, i.e. without any locking. '
+                   'Use it only if Zotero isn\'t modifying the database.')
+@click.option('--snapshot', is_flag=True,
+              help='Copy Zotero database to a temporary file before reading it.')
+@click.option('-e', '--engine', type=click.Choice(zotler.ENGINES), default='set',
+              help='Engine comparing existing and referenced files. The sqlite '
+                   'engine keeps paths in temporary database tables instead of '
+                   'memory (default: set).')
+@click.option('--exclude', multiple=True,
+              help='Don\'t list files and directories matching the glob pattern. '
+                   'Patterns without a slash match names in any directory, the '
+                   'others paths relative to ZotFile Custom Location. * and ? '
+                   'don\'t match slashes, ** matches any number of directories. '
+                   'Excluded directories are never scanned. Can be used '
+                   'repeatedly.')
+@click.option('--include', multiple=True,
+              help='List only files matching the glob pattern, matched like '
+                   '--exclude patterns. Can be used repeatedly.')
+@click.option('-n', '--normalization', type=click.Choice(NORMALIZATIONS),
+              default='none',
+              help='Match paths in Zotero database and names of files regardless of '
+                   'their Unicode normalization (nfc, nfd) or also case (casefold) '
+                   '(default: none).')
+@click.option('-m', '--missing_file', type=click.File('w'), default=None,
+              help='Save attachments referenced in Zotero database whose files '
+                   'don\'t exist to the file (tab separated itemID, key and path). '
+                   'Orphans and missing files are found in one pass with the set '
+                   'engine.')
+@click.option('--by_library', is_flag=True,
+              help='Scan every Zotero library (My Library and group libraries) as '
+                   'a separate partition and print number of its attachments, '
+                   'found and missing files. Orphan files are still files not '
+                   'referenced by any library.')
+@click.option('--library', 'library_ids', type=int, multiple=True,
+              help='Print the --by_library report only for the library with this '
+                   'libraryID. Can be used repeatedly.')
 @click.option('-x', '--force_delete', is_flag=True,
               help='Delete all orphan files immediately (default: False).')
+@click.option('--quarantine', 'quarantine_dir', type=click.Path(file_okay=False),
+              default=None,
+              help='Move all orphan files to a new run directory in this directory '
+                   'instead of deleting them. The directory must be on the same '
+                   'filesystem as ZotFile Custom Location. Use --undo or --purge '
+                   'with the run directory later.')
+@click.option('-j', '--jobs', type=click.IntRange(min=1), default=None,
+              help='Number of threads scanning directories of ZotFile Custom '
+                   'Location and deleting orphan files in parallel (default: 1). '
+                   'Number of processes in batch mode (default: number of CPUs).')
+@click.option('--no_cache', is_flag=True,
+              help='Don\'t use the cache of directory listings, list every '
+                   'directory of ZotFile Custom Location again.')
+@click.option('--rebuild_cache', is_flag=True,
+              help='Discard the cache of directory listings and build it again.')
+@click.option('-q', '--quiet', is_flag=True,
+              help='Don\'t list deleted files, print only a summary.')
+@click.option('--storage', is_flag=True,
+              help='List directories in storage/ of Zotero data directory that '
+                   'don\'t belong to any attachment in Zotero database instead of '
+                   'orphan files in ZotFile Custom Location. The data directory '
+                   'is read from prefs.js.')
+@click.option('--usage', is_flag=True,
+              help='Print number and size of orphan files, directories containing '
+                   'the largest amount of them and the largest orphan files '
+                   'instead of the list of orphan files.')
+@click.option('--top', type=click.IntRange(min=1), default=10,
+              help='Number of directories and files in the --usage report '
+                   '(default: 10).')
+@click.option('--duplicates', 'find_duplicates', is_flag=True,
+              help='List groups of byte-identical files in ZotFile Custom Location '
+                   'instead of orphan files and mark which of them are referenced '
+                   'in Zotero database.')
+@click.option('-w', '--watch', is_flag=True,
+              help='Keep running, watch ZotFile Custom Location and Zotero database '
+                   'and update the list of orphan files whenever it changes '
+                   '(Linux only). Filters, -n, -j, --engine, --immutable, '
+                   '--snapshot, --quarantine, -x and other options of the '
+                   'single scan can\'t be used with it.')
+@click.option('-b', '--batch', 'manifest', type=click.File('r'), default=None,
+              help='Batch mode. File with a tab separated pair of paths to prefs.js '
+                   'and zotero.sqlite on each line. Libraries are scanned in '
+                   'parallel processes and a report line is saved for each of them.')
+@click.option('--discover', type=click.Path(exists=True, file_okay=False),
+              multiple=True,
+              help='Batch mode. Home directory searched for Zotero profiles. '
+                   'Can be used repeatedly.')
+@click.option('--report_dir', type=click.Path(file_okay=False), default=None,
+              help='Save list of orphan files of each library scanned in batch mode '
+                   'to this directory.')
+@click.option('--format', 'output_format', type=click.Choice(output.FORMATS),
+              default='text',
+              help='Format of the list of orphan files: one path per line (text), '
+                   'NUL separated paths (nul), JSON Lines (jsonl) or CSV (csv) '
+                   'with size and modification time of the files (default: text).')
+@click.option('--diff', 'diff_file', type=click.Path(dir_okay=False), default=None,
+              help='Compare orphan files with the snapshot saved to the file by '
+                   'the previous run and list only new (+) and resolved (-) '
+                   'orphan files. The snapshot is replaced by the current one.')
+@click.option('--stats', type=click.Choice(STATS_FORMATS), default=None,
+              help='Print wall time, number of processed items, throughput and '
+                   'peak memory usage of each phase to STDERR as text or JSON.')
+@click.option('--profile', type=click.Path(dir_okay=False), default=None,
+              help='Save cProfile statistics of the run to the file.')
 @click.option('-o', '--output_file', type=click.File('w'), default=sys.stdout,
               help='Save list of orphan files to the file (default: STDOUT).')
 @click.option('-v', '--version', is_flag=True, callback=zotler.print_version,
               expose_value=False, is_eager=True,
               help='Show version number and exit.')
-def main(zotero_prefs, zotero_home_dir, zotero_dbase, force_delete,
+def main(list_of_files, undo_dir, purge_dir, zotero_prefs, zotero_home_dir,
+         zotero_dbase, immutable, snapshot, engine, exclude, include, normalization,
+         missing_file, by_library, library_ids, force_delete, quarantine_dir, jobs,
+         no_cache, rebuild_cache, quiet, storage, usage, top, find_duplicates, watch,
+         manifest, discover, report_dir, output_format, diff_file, stats, profile,
          output_file):
     """
     Clean attachments in ZotFile Custom Location directory.
@@ -49,10 +188,10 @@ def main(zotero_prefs, zotero_home_dir, zotero_dbase, force_delete,
     ~/.zotero/xxxxxxxx.default/prefs.js (Linux only). The first dictionary ending with
     .default is used.
 
-    Path to the Zotero database file zotero.sqlite can be specified using -f option or
-    -d option. Later option sets path to the Zotero home dictionary containing
-    zotero.sqlite file. Default path ~/Zotero/zotero.sqlite (Linux only) is used
-    if both options are omitted.
+    Path to the Zotero database file zotero.sqlite can be specified using -d option or
+    -D option. Later option sets path to the Zotero home dictionary containing
+    zotero.sqlite file. If both options are omitted, zotero.sqlite in the Zotero data
+    directory set in prefs.js (default ~/Zotero/) is used.
 
     \b
     Examples:
@@ -72,23 +211,273 @@ def main(zotero_prefs, zotero_home_dir, zotero_dbase, force_delete,
     Delete files listed in ~/orphans.txt file:
 
     python zotler.py -l ~/orphans.txt
+
+    Move orphan files to ~/.zotler-quarantine and put them back later:
+
+    \b
+    $ python zotler.py --quarantine ~/.zotler-quarantine
+    $ python zotler.py --undo ~/.zotler-quarantine/20181007-120000-xxxxxxxx
     """
 
-    if zotero_home_dir is None:
-        zotero_home_dir = os.path.join(str(Path.home()), 'Zotero')
+    if undo_dir is None and purge_dir is None and list_of_files is None:
+        if manifest is not None:
+            mode = '--batch'
+        elif discover:
+            mode = '--discover'
+        elif watch:
+            mode = '--watch'
+        elif storage:
+            mode = '--storage'
+        elif usage:
+            mode = '--usage'
+        elif find_duplicates:
+            mode = '--duplicates'
+        elif by_library or library_ids:
+            mode = '--by_library'
+        else:
+            mode = None
+        options = {
+            '--exclude': exclude, '--include': include,
+            '-n': normalization != 'none', '-j': jobs is not None,
+            '--engine': engine != 'set', '--immutable': immutable,
+            '--snapshot': snapshot, '-m': missing_file is not None,
+            '--by_library': by_library, '--library': library_ids,
+            '-x': force_delete, '--quarantine': quarantine_dir is not None,
+            '--format': output_format != 'text', '--diff': diff_file is not None,
+            '--stats': stats is not None}
+        # Options changing what is done with the orphans have limits of their own.
+        modes = [mode] + [i for i in ('-m', '-x', '--quarantine') if options[i]]
+        check_options([i for i in modes if i is not None], options)
+
+    profiler = None
+    if profile is not None:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+
+    path_filter = None
+    if exclude or include:
+        from zotler.walker import PathFilter
+        path_filter = PathFilter(exclude=exclude, include=include)
+
+    statistics = Statistics()
+    try:
+        if undo_dir is not None or purge_dir is not None:
+            from zotler.exceptions import ZotlerError
+
+            try:
+                if undo_dir is not None:
+                    zotler.undo_quarantine(undo_dir, quarantine_dir, verbose=not quiet)
+                else:
+                    zotler.purge_quarantine(purge_dir, quarantine_dir)
+            except ZotlerError as error:
+                raise click.UsageError(str(error))
+            return
+
+        if manifest is not None or discover:
+            batch_mode(manifest, discover, jobs, report_dir, output_file,
+                       engine=engine, immutable=immutable, snapshot=snapshot,
+                       normalization=normalization, path_filter=path_filter)
+            return
+
+        zotero_prefs = zotler.get_prefs_file(zotero_prefs)
+
+        if zotero_dbase is None:
+            if zotero_home_dir is None:
+                # The database lies in the data directory set in prefs.js.
+                zotero_dbase = zotler.get_database_path(zotero_prefs)
+            else:
+                zotero_dbase = os.path.join(zotero_home_dir, 'zotero.sqlite')
+
+        if list_of_files is not None:
+            from zotler import deletion
+
+            zotler.delete_files(list_of_files, zotero_prefs, zotero_dbase,
+                                jobs=deletion.DEFAULT_JOBS if jobs is None else jobs,
+                                verbose=not quiet, immutable=immutable,
+                                normalization=normalization)
+            return
+
+        if watch:
+            # The watcher keeps its own index of all files updated by inotify
+            # events and reads the live database.
+            watch_orphans(zotero_dbase, zotero_prefs, output_file, output_format)
+            return
+
+        jobs = 1 if jobs is None else jobs
+
+        if storage:
+            # Key directories of another data directory would all look orphaned.
+            data_dir = os.path.realpath(zotler.get_data_dir(zotero_prefs))
+            if os.path.dirname(os.path.realpath(zotero_dbase)) != data_dir:
+                raise click.UsageError(f'Database {zotero_dbase} does not belong to '
+                                       f'Zotero data directory {data_dir}.')
+
+        if quarantine_dir is not None:
+            from zotler import quarantine
+            from zotler.exceptions import ZotlerError
+
+            if storage:
+                checked_dir = os.path.join(zotler.get_data_dir(zotero_prefs),
+                                           'storage')
+            else:
+                checked_dir = zotler.get_base_path(zotero_prefs)
+            try:
+                quarantine.check_location(quarantine_dir, checked_dir)
+            except ZotlerError as error:
+                raise click.BadParameter(str(error), param_hint='--quarantine')
+
+        # Storage mode lists only the key directories, there is nothing to cache.
+        cache = None
+        if not no_cache and not storage:
+            from zotler.cache import DirectoryCache
+            cache = DirectoryCache(rebuild=rebuild_cache)
+
+        if storage:
+            storage_mode(zotero_dbase, zotero_prefs, force_delete, quiet,
+                         output_file, output_format, quarantine_dir,
+                         immutable=immutable, snapshot=snapshot, stats=statistics)
+        elif usage:
+            usage_mode(zotero_dbase, zotero_prefs, output_file, top=top, jobs=jobs,
+                       immutable=immutable, snapshot=snapshot,
+                       normalization=normalization, path_filter=path_filter,
+                       stats=statistics)
+        elif find_duplicates:
+            duplicates_mode(zotero_dbase, zotero_prefs, output_file, jobs=jobs,
+                            cache=cache, immutable=immutable, snapshot=snapshot,
+                            path_filter=path_filter)
+        else:
+            orphans_mode(zotero_dbase, zotero_prefs, force_delete, quiet,
+                         output_file, output_format, missing_file,
+                         quarantine_dir, by_library or bool(library_ids),
+                         library_ids or None, diff_file, jobs=jobs,
+                         cache=cache, immutable=immutable, snapshot=snapshot,
+                         engine=engine, normalization=normalization,
+                         path_filter=path_filter, stats=statistics)
+
+        if cache is not None:
+            cache.save()
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(profile)
+
+    if stats is not None:
+        print(statistics.report(stats), file=sys.stderr)
 
-    if zotero_dbase is None:
-        zotero_dbase = os.path.join(zotero_home_dir, 'zotero.sqlite')
 
-    zotero_prefs = zotler.get_prefs_file(zotero_prefs)
-    orphan_files = zotler.create_set_of_orphans(zotero_dbase, zotero_prefs)
+def check_options(modes, options):
+    for mode in modes:
+        unsupported = [i for i in UNSUPPORTED_OPTIONS.get(mode, ()) if options[i]]
+        if unsupported:
+            raise click.UsageError(f'{", ".join(unsupported)} cannot be used '
+                                   f'with {mode}.')
 
-    print(10 * '-')
 
-    if force_delete:
-        zotler.remove_files(orphan_files)
+def orphans_mode(zotero_dbase, zotero_prefs, force_delete, quiet, output_file,
+                 output_format, missing_file, quarantine_dir, by_library, library_ids,
+                 diff_file, jobs, stats, engine, **options):
+    if by_library:
+        from zotler import libraries
+
+        reports, orphan_files = libraries.scan_libraries(
+            zotero_dbase, zotero_prefs, library_ids=library_ids, jobs=jobs,
+            stats=stats, **options)
+        for report in reports:
+            print(libraries.format_partition_report(report), file=sys.stderr)
+            if missing_file is not None:
+                write_missing_files(report.missing, missing_file)
+    elif missing_file is None:
+        orphan_files = zotler.find_orphans(zotero_dbase, zotero_prefs, jobs=jobs,
+                                           stats=stats, engine=engine, **options)
     else:
-        print('\n'.join(orphan_files), file=output_file)
+        orphan_files, missing_files = zotler.find_orphans_and_missing_files(
+            zotero_dbase, zotero_prefs, jobs=jobs, stats=stats, **options)
+        write_missing_files(missing_files, missing_file)
+
+    # Status lines go to STDERR, so STDOUT holds only the list in its format.
+    print(10 * '-', file=sys.stderr)
+
+    if quarantine_dir is not None:
+        zotler.quarantine_files(orphan_files, quarantine_dir, verbose=not quiet,
+                                strip=False)
+    elif force_delete:
+        zotler.remove_files(orphan_files, jobs=jobs, verbose=not quiet)
+    elif diff_file is not None:
+        from zotler import snapshot
+
+        for change, path in snapshot.update_snapshot(orphan_files, diff_file):
+            print(change, path, file=output_file)
+    else:
+        output.write_orphans(orphan_files, output_file, output_format)
+
+
+def write_missing_files(missing_files, missing_file):
+    for missing in missing_files:
+        print(missing.item_id, missing.key, missing.path, sep='\t', file=missing_file)
+
+
+def storage_mode(zotero_dbase, zotero_prefs, force_delete, quiet, output_file,
+                 output_format, quarantine_dir, **options):
+    orphan_directories = zotler.find_orphan_storage_directories(
+        zotero_dbase, zotero_prefs, **options)
+
+    print(10 * '-', file=sys.stderr)
+
+    if quarantine_dir is not None:
+        zotler.quarantine_files(orphan_directories, quarantine_dir,
+                                verbose=not quiet, strip=False)
+    elif force_delete:
+        zotler.remove_directories(orphan_directories, verbose=not quiet)
+    else:
+        output.write_orphans(orphan_directories, output_file, output_format)
+
+
+def usage_mode(zotero_dbase, zotero_prefs, output_file, **options):
+    from zotler import usage
+
+    report = usage.create_usage_report(zotero_dbase, zotero_prefs, **options)
+    print(*usage.format_usage_report(report), sep='\n', file=output_file)
+
+
+def duplicates_mode(zotero_dbase, zotero_prefs, output_file, **options):
+    from zotler import duplicates
+
+    for group, referenced in duplicates.find_duplicate_attachments(
+            zotero_dbase, zotero_prefs, **options):
+        print(*duplicates.format_duplicates(group, referenced), sep='\n',
+              file=output_file)
+
+
+def batch_mode(manifest, discover, jobs, report_dir, output_file, **options):
+    from zotler import batch
+
+    libraries = list(batch.discover_libraries(discover))
+    if manifest is not None:
+        libraries.extend(batch.read_manifest(manifest))
+    for report in batch.run_batch(libraries, jobs=jobs, report_dir=report_dir,
+                                  **options):
+        print(batch.format_report(report), file=output_file)
+
+
+def watch_orphans(zotero_dbase, zotero_prefs, output_file, output_format):
+    from zotler.exceptions import ZotlerError
+    from zotler.watch import OrphanWatcher, save_orphans
+
+    def on_change(watcher):
+        if output_file is sys.stdout:
+            print(10 * '-', file=sys.stderr)
+            output.write_orphans(watcher.orphans, output_file, output_format)
+            output_file.flush()
+        else:
+            save_orphans(watcher.orphans, output_file.name, output_format)
+
+    try:
+        OrphanWatcher(zotero_dbase, zotero_prefs).run(on_change=on_change)
+    except KeyboardInterrupt:
+        pass
+    except ZotlerError as error:
+        raise click.ClickException(str(error))
 
 
 if __name__ == '__main__':
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+
+import contextlib
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+
+import click
+
+from test.benchmark.library_generator import generate_library
+from zotler import zotler
+
+DEFAULT_SIZES = (10000, 100000, 1000000)
+
+
+def run_get_relative_paths(library):
+    return sum(1 for _ in zotler.get_relative_paths(library.dbase))
+
+
+def run_get_paths_to_existing_files(library):
+    return sum(1 for _ in zotler.get_paths_to_existing_files(library.dest_dir))
+
+
+def run_create_set_of_orphans(library):
+    orphans = zotler.create_set_of_orphans(library.dbase, library.prefs)
+    if len(orphans) != library.orphans:
+        raise AssertionError(f'{len(orphans)} orphans found, '
+                             f'{library.orphans} expected.')
+    return library.files
+
+
+def run_remove_files(library):
+    orphans = zotler.create_set_of_orphans(library.dbase, library.prefs)
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        start = time.perf_counter()
+        zotler.remove_files(orphans)
+    return len(orphans), time.perf_counter() - start
+
+
+BENCHMARKS = (
+    ('get_relative_paths', run_get_relative_paths),
+    ('get_paths_to_existing_files', run_get_paths_to_existing_files),
+    ('create_set_of_orphans', run_create_set_of_orphans),
+    # Destructive, it has to be the last one.
+    ('remove_files', run_remove_files),
+)
+
+
+def get_max_rss():
+    # ru_maxrss is in kilobytes on Linux.
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def measure(function, library, queue):
+    rss_before = get_max_rss()
+    start = time.perf_counter()
+    result = function(library)
+    elapsed = time.perf_counter() - start
+    if isinstance(result, tuple):
+        result, elapsed = result
+    queue.put({'items': result,
+               'seconds': elapsed,
+               'peak_rss_bytes': get_max_rss() - rss_before})
+
+
+def run_in_subprocess(function, library):
+    # A fresh process per benchmark makes the peak RSS of each one independent.
+    context = multiprocessing.get_context('spawn')
+    queue = context.Queue()
+    process = context.Process(target=measure, args=(function, library, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+def run_benchmarks(size, workdir=None, depth=3, orphan_ratio=0.1):
+    with tempfile.TemporaryDirectory(dir=workdir, prefix='zotler-benchmark-') as root:
+        library = generate_library(root, files=size, depth=depth,
+                                   orphan_ratio=orphan_ratio)
+        return {name: run_in_subprocess(function, library)
+                for name, function in BENCHMARKS}
+
+
+def find_regressions(results, baseline, tolerance):
+    for size, benchmarks in results.items():
+        for name, result in benchmarks.items():
+            try:
+                expected = baseline[size][name]['seconds']
+            except KeyError:
+                continue
+            if result['seconds'] > expected * (1 + tolerance):
+                yield (f'{name} ({size} files): {result["seconds"]:.3f} s, '
+                       f'baseline {expected:.3f} s')
+
+
+def print_results(results):
+    print(f'{"files":>9} {"benchmark":<30} {"items":>9} {"seconds":>9} '
+          f'{"items/s":>11} {"peak RSS MiB":>13}')
+    for size, benchmarks in results.items():
+        for name, result in benchmarks.items():
+            throughput = result['items'] / result['seconds'] if result['seconds'] else 0
+            print(f'{size:>9} {name:<30} {result["items"]:>9} '
+                  f'{result["seconds"]:>9.3f} {throughput:>11.0f} '
+                  f'{result["peak_rss_bytes"] / 2 ** 20:>13.1f}')
+
+
+@click.command(context_settings=dict(help_option_names=['-h', '--help']))
+@click.option('-n', '--files', type=click.IntRange(min=1), multiple=True,
+              help='Size of the synthetic library. Can be used repeatedly '
+                   '(default: 10000, 100000 and 1000000).')
+@click.option('--depth', type=click.IntRange(min=1), default=3,
+              help='Depth of the attachment tree (default: 3).')
+@click.option('--orphan_ratio', type=click.FloatRange(0, 1), default=0.1,
+              help='Fraction of files not referenced in the database (default: 0.1).')
+@click.option('-w', '--workdir', type=click.Path(exists=True, file_okay=False),
+              default=None,
+              help='Directory for the synthetic libraries (default: system temp).')
+@click.option('-s', '--save', type=click.File('w'), default=None,
+              help='Save results as JSON to the file.')
+@click.option('-b', '--baseline', type=click.File('r'), default=None,
+              help='Compare results with JSON file saved by -s option and fail '
+                   'if any benchmark is slower than the baseline.')
+@click.option('-t', '--tolerance', type=click.FloatRange(min=0), default=0.2,
+              help='Allowed slowdown compared to the baseline (default: 0.2).')
+def main(files, depth, orphan_ratio, workdir, save, baseline, tolerance):
+    """
+    Time and memory-profile Zotler on synthetic Zotero libraries.
+
+    Every benchmark runs in a separate process, peak RSS is the growth
+    of the process' maximum resident set size during the benchmark.
+
+    \b
+    Example:
+    ----
+
+    $ python -m test.benchmark.benchmark -n 10000 -n 100000 -s baseline.json
+    """
+    results = {}
+    for size in files or DEFAULT_SIZES:
+        results[str(size)] = run_benchmarks(size, workdir=workdir, depth=depth,
+                                            orphan_ratio=orphan_ratio)
+    print_results(results)
+
+    if save is not None:
+        json.dump(results, save, indent=2)
+
+    if baseline is not None:
+        regressions = list(find_regressions(results, json.load(baseline), tolerance))
+        if regressions:
+            print('Regressions:', *regressions, sep='\n', file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    exit(main())
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+
+from collections import namedtuple
+import math
+import os
+import random
+import sqlite3
+
+import click
+
+Library = namedtuple('Library', ['dbase', 'prefs', 'dest_dir', 'files', 'orphans'])
+
+KEY_CHARACTERS = '23456789ABCDEFGHIJKLMNPQRSTUVWXYZ'
+KEY_LENGTH = 8
+
+
+def create_key(item_id):
+    # Multiplier coprime with the number of keys makes the mapping a bijection.
+    number = (item_id * 2654435761) % len(KEY_CHARACTERS) ** KEY_LENGTH
+    characters = []
+    for _ in range(KEY_LENGTH):
+        number, remainder = divmod(number, len(KEY_CHARACTERS))
+        characters.append(KEY_CHARACTERS[remainder])
+    return ''.join(characters)
+
+
+def get_directory_names(directories, depth):
+    branching = max(2, math.ceil(directories ** (1 / depth)))
+    for index in range(directories):
+        parts = []
+        for _ in range(depth):
+            index, remainder = divmod(index, branching)
+            parts.append(f'Collection {remainder:03d}')
+        yield os.path.join(*reversed(parts))
+
+
+def get_relative_paths(files, depth, files_per_directory):
+    directories = math.ceil(files / files_per_directory)
+    remaining = files
+    for directory in get_directory_names(directories, depth):
+        for i in range(min(files_per_directory, remaining)):
+            yield os.path.join(directory, f'Author{i:04d}-2018-Title of paper {i}.pdf')
+        remaining -= files_per_directory
+
+
+def create_database(path, relative_paths):
+    connection = sqlite3.connect(path)
+    connection.executescript('''
+        CREATE TABLE items (
+            itemID INTEGER PRIMARY KEY,
+            itemTypeID INT NOT NULL DEFAULT 2,
+            libraryID INT NOT NULL DEFAULT 1,
+            key TEXT NOT NULL,
+            UNIQUE (libraryID, key)
+        );
+        CREATE TABLE itemAttachments (
+            itemID INTEGER PRIMARY KEY,
+            parentItemID INT,
+            linkMode INT,
+            contentType TEXT,
+            path TEXT
+        );
+    ''')
+    for item_id, relative_path in enumerate(relative_paths, start=1):
+        connection.execute('INSERT INTO items (itemID, key) VALUES (?, ?)',
+                           (item_id, create_key(item_id)))
+        connection.execute('INSERT INTO itemAttachments '
+                           '(itemID, linkMode, contentType, path) '
+                           'VALUES (?, 2, ?, ?)',
+                           (item_id, 'application/pdf', f'attachments:{relative_path}'))
+    connection.commit()
+    connection.close()
+
+
+def create_prefs_file(path, dest_dir):
+    with open(path, 'w') as prefs_file:
+        print(f'user_pref("extensions.zotfile.dest_dir", "{dest_dir}");', file=prefs_file)
+
+
+def generate_library(root, files=10000, depth=3, orphan_ratio=0.1,
+                     files_per_directory=50, seed=0):
+    randomizer = random.Random(seed)
+    dest_dir = os.path.join(root, 'ZotFile')
+    referenced = []
+    orphans = 0
+
+    for relative_path in get_relative_paths(files, depth, files_per_directory):
+        path = os.path.join(dest_dir, relative_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as attachment:
+            attachment.write(os.urandom(randomizer.randint(1, 64)))
+        if randomizer.random() < orphan_ratio:
+            orphans += 1
+        else:
+            referenced.append(relative_path)
+
+    dbase = os.path.join(root, 'zotero.sqlite')
+    create_database(dbase, referenced)
+    prefs = os.path.join(root, 'prefs.js')
+    create_prefs_file(prefs, dest_dir)
+
+    return Library(dbase=dbase, prefs=prefs, dest_dir=dest_dir, files=files,
+                   orphans=orphans)
+
+
+@click.command(context_settings=dict(help_option_names=['-h', '--help']))
+@click.argument('root', type=click.Path(file_okay=False))
+@click.option('-n', '--files', type=click.IntRange(min=1), default=10000,
+              help='Number of attachment files (default: 10000).')
+@click.option('--depth', type=click.IntRange(min=1), default=3,
+              help='Depth of the attachment tree (default: 3).')
+@click.option('--orphan_ratio', type=click.FloatRange(0, 1), default=0.1,
+              help='Fraction of files not referenced in the database (default: 0.1).')
+@click.option('--seed', type=int, default=0, help='Random seed (default: 0).')
+def main(root, files, depth, orphan_ratio, seed):
+    """
+    Create synthetic Zotero library (zotero.sqlite, prefs.js and ZotFile
+    attachment tree) in ROOT directory.
+    """
+    library = generate_library(root, files=files, depth=depth,
+                               orphan_ratio=orphan_ratio, seed=seed)
+    print(f'{library.files} files, {library.orphans} orphans in {library.dest_dir}')
+
+
+if __name__ == '__main__':
+    exit(main())
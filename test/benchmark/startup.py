@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import click
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+GUI_FIRST_PAINT = '''
+import sys
+from PyQt5.QtCore import QTimer
+from PyQt5.QtWidgets import QApplication
+from zotler.gui.ui.main_window import MainWindow
+
+app = QApplication(sys.argv)
+window = MainWindow()
+QTimer.singleShot(0, app.quit)
+app.exec_()
+'''
+
+COMMANDS = (
+    ('import zotler.zotler', ['-c', 'import zotler.zotler']),
+    ('zotler --version', ['-m', 'bin.zotler', '--version']),
+    ('zotler --help', ['-m', 'bin.zotler', '--help']),
+    ('gui first paint', ['-c', GUI_FIRST_PAINT]),
+)
+
+
+def time_command(arguments, repeat):
+    env = dict(os.environ, QT_QPA_PLATFORM=os.environ.get('QT_QPA_PLATFORM',
+                                                          'offscreen'))
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, *arguments], cwd=ROOT_DIR, env=env,
+                       check=True, stdout=subprocess.DEVNULL,
+                       stderr=subprocess.DEVNULL)
+        times.append(time.perf_counter() - start)
+    return {'min_seconds': min(times), 'median_seconds': statistics.median(times)}
+
+
+def run_benchmarks(repeat):
+    results = {}
+    for name, arguments in COMMANDS:
+        try:
+            results[name] = time_command(arguments, repeat)
+        except subprocess.CalledProcessError:
+            # PyQt5 or a display may be missing.
+            print(f'{name} failed, skipping it.', file=sys.stderr)
+    return results
+
+
+def find_regressions(results, baseline, tolerance):
+    for name, result in results.items():
+        try:
+            expected = baseline[name]['min_seconds']
+        except KeyError:
+            continue
+        if result['min_seconds'] > expected * (1 + tolerance):
+            yield f'{name}: {result["min_seconds"]:.3f} s, baseline {expected:.3f} s'
+
+
+def print_results(results):
+    print(f'{"command":<25} {"min ms":>9} {"median ms":>10}')
+    for name, result in results.items():
+        print(f'{name:<25} {result["min_seconds"] * 1000:>9.1f} '
+              f'{result["median_seconds"] * 1000:>10.1f}')
+
+
+@click.command(context_settings=dict(help_option_names=['-h', '--help']))
+@click.option('-r', '--repeat', type=click.IntRange(min=1), default=20,
+              help='Number of runs of every command (default: 20).')
+@click.option('-s', '--save', type=click.File('w'), default=None,
+              help='Save results as JSON to the file.')
+@click.option('-b', '--baseline', type=click.File('r'), default=None,
+              help='Compare results with JSON file saved by -s option and fail '
+                   'if any command starts slower than the baseline.')
+@click.option('-t', '--tolerance', type=click.FloatRange(min=0), default=0.2,
+              help='Allowed slowdown compared to the baseline (default: 0.2).')
+def main(repeat, save, baseline, tolerance):
+    """
+    Time start of Zotler's CLI and GUI.
+
+    Every command is run repeatedly in a new Python interpreter, the GUI
+    runs until its first paint on the offscreen Qt platform.
+
+    \b
+    Example:
+    ----
+
+    $ python -m test.benchmark.startup -s startup.json
+    """
+    results = run_benchmarks(repeat)
+    print_results(results)
+
+    if save is not None:
+        json.dump(results, save, indent=2)
+
+    if baseline is not None:
+        regressions = list(find_regressions(results, json.load(baseline), tolerance))
+        if regressions:
+            print('Regressions:', *regressions, sep='\n', file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    exit(main())
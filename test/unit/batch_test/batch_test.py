@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+
+import io
+import os
+
+from zotler import batch
+
+
+def test_read_manifest_skips_comments_and_fills_in_database():
+    manifest = io.StringIO('# prefs\tdbase\n'
+                           '\n'
+                           '/lorem/prefs.js\t/lorem/zotero.sqlite\n')
+
+    assert list(batch.read_manifest(manifest)) == [('/lorem/prefs.js',
+                                                    '/lorem/zotero.sqlite')]
+
+
+def test_discover_libraries_finds_default_profiles(mocker, tmpdir, prefs_path):
+    mocker.patch('platform.system').return_value = 'Linux'
+    profiles_dir = tmpdir.mkdir('home').mkdir('.zotero').mkdir('zotero')
+    profiles_dir.mkdir('lorem')
+    prefs_path.copy(profiles_dir.mkdir('abcd.default').join('prefs.js'))
+    libraries = list(batch.discover_libraries([str(tmpdir.join('home')),
+                                               str(tmpdir.join('missing'))]))
+
+    assert libraries == [(str(profiles_dir.join('abcd.default', 'prefs.js')),
+                          '/home/user/Zotero/zotero.sqlite')]
+
+
+def test_run_batch_reports_every_library(tmpdir, zotfile_library):
+    libraries = [(zotfile_library['prefs'], zotfile_library['dbase']),
+                 (zotfile_library['prefs'], str(tmpdir.join('missing.sqlite')))]
+    report_dir = str(tmpdir.join('reports'))
+    reports = sorted(batch.run_batch(libraries, jobs=2, report_dir=report_dir),
+                     key=lambda i: i.dbase)
+    missing, found = reports
+
+    assert found.orphans == 3
+    assert found.error is None
+    with open(found.output_file) as report_file:
+        assert sorted(report_file.read().split()) == zotfile_library['orphans']
+    assert missing.orphans is None
+    assert missing.error is not None
+    assert os.path.basename(found.output_file) == batch.get_output_file_name(
+        1, zotfile_library['prefs'])
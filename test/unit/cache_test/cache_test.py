@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+
+import os
+import pytest
+
+from zotler import cache, walker
+
+
+@pytest.fixture()
+def old_profiles_dir(profiles_dir):
+    for directory in (profiles_dir, *profiles_dir.listdir()):
+        if directory.isdir():
+            os.utime(str(directory), (1000000000, 1000000000))
+    return profiles_dir
+
+
+@pytest.fixture()
+def cache_path(tmpdir_factory):
+    return str(tmpdir_factory.mktemp('cache').join('directories.pickle'))
+
+
+def test_default_cache_path_respects_xdg_cache_home(monkeypatch):
+    monkeypatch.setenv('XDG_CACHE_HOME', '/lorem')
+
+    assert cache.default_cache_path() == '/lorem/zotler/directories.pickle'
+
+
+def test_scan_reuses_listing_of_unchanged_directory(mocker, old_profiles_dir,
+                                                    cache_path):
+    directory_cache = cache.DirectoryCache(cache_path)
+    directory = str(old_profiles_dir.join('profile2'))
+    expected = directory_cache.scan(directory)
+    mocked_scan = mocker.patch.object(walker, 'scan_directory')
+
+    assert directory_cache.scan(directory) == expected
+    mocked_scan.assert_not_called()
+
+
+def test_scan_lists_modified_directory_again(old_profiles_dir, cache_path):
+    directory_cache = cache.DirectoryCache(cache_path)
+    directory = old_profiles_dir.join('profile2')
+    directory_cache.scan(str(directory))
+    directory.join('file23.txt').write('lorem ipsum')
+    os.utime(str(directory), (1100000000, 1100000000))
+    files, _ = directory_cache.scan(str(directory))
+
+    assert sorted(files) == ['file21.txt', 'file22.txt', 'file23.txt']
+
+
+def test_scan_does_not_cache_recently_modified_directory(profiles_dir, cache_path):
+    directory_cache = cache.DirectoryCache(cache_path)
+    directory_cache.scan(str(profiles_dir.join('profile2')))
+
+    assert len(directory_cache) == 0
+
+
+def test_save_and_load_round_trip(old_profiles_dir, cache_path):
+    directory_cache = cache.DirectoryCache(cache_path)
+    for directory, _ in walker.walk_directories(str(old_profiles_dir),
+                                                scan=directory_cache.scan):
+        pass
+    directory_cache.save()
+
+    assert len(cache.DirectoryCache(cache_path)) == 4
+    assert len(cache.DirectoryCache(cache_path, rebuild=True)) == 0
+
+
+def test_save_evicts_least_recently_used_entries(old_profiles_dir, cache_path):
+    directory_cache = cache.DirectoryCache(cache_path, max_entries=2)
+    for directory in ('profile1', 'profile2', 'profile3.default', 'profile1'):
+        directory_cache.scan(str(old_profiles_dir.join(directory)))
+    directory_cache.save()
+    loaded = cache.DirectoryCache(cache_path)
+    loaded_dirs = sorted(os.path.basename(i) for i in loaded._entries)
+
+    assert loaded_dirs == ['profile1', 'profile3.default']
+
+
+def test_load_ignores_corrupted_cache_file(cache_path):
+    with open(cache_path, 'wb') as cache_file:
+        cache_file.write(b'lorem ipsum')
+
+    assert len(cache.DirectoryCache(cache_path)) == 0
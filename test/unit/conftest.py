@@ -72,6 +72,20 @@ def sql_result():
     )
 
 
+@pytest.fixture()
+def zotero_dbase(tmpdir, sql_result):
+    import sqlite3
+    path = str(tmpdir.join('zotero.sqlite'))
+    connection = sqlite3.connect(path)
+    connection.execute('CREATE TABLE itemAttachments '
+                       '(itemID INTEGER PRIMARY KEY, path TEXT)')
+    connection.executemany('INSERT INTO itemAttachments (path) VALUES (?)',
+                           sql_result + ((None, ), ))
+    connection.commit()
+    connection.close()
+    return path
+
+
 @pytest.fixture()
 def relative_paths():
     return [
@@ -101,3 +115,35 @@ def expected_relative_paths():
 @pytest.fixture()
 def paths_to_files():
     return [i for i in ('lorem.txt', 'ipsum.txt  ', 'dolor.txt\n')]
+
+
+@pytest.fixture()
+def zotfile_library(tmpdir, relative_paths):
+    import sqlite3
+    dest_dir = tmpdir.mkdir('ZotFile')
+    orphans = ('Programming/R/orphan.pdf', 'Programming/Python/PEP/PEP_20.pdf',
+               'orphan.txt')
+    for relative_path in relative_paths[1:] + list(orphans):
+        dest_dir.join(relative_path).write('lorem ipsum', ensure=True)
+
+    prefs_file = tmpdir.join('prefs.js')
+    prefs_file.write(f'user_pref("extensions.zotfile.dest_dir", "{dest_dir}");\n')
+
+    dbase_path = str(tmpdir.join('zotero.sqlite'))
+    connection = sqlite3.connect(dbase_path)
+    connection.execute('CREATE TABLE items (itemID INTEGER PRIMARY KEY, key TEXT)')
+    connection.execute('CREATE TABLE itemAttachments '
+                       '(itemID INTEGER PRIMARY KEY, path TEXT)')
+    for item_id, relative_path in enumerate(relative_paths, 1):
+        connection.execute('INSERT INTO items VALUES (?, ?)',
+                           (item_id, f'KEY{item_id:05d}'))
+        connection.execute('INSERT INTO itemAttachments VALUES (?, ?)',
+                           (item_id, f'attachments:{relative_path}'))
+    connection.commit()
+    connection.close()
+
+    return {'dbase': dbase_path,
+            'prefs': str(prefs_file),
+            'dest_dir': str(dest_dir),
+            'orphans': sorted(os.path.normpath(os.path.join(str(dest_dir), i))
+                              for i in orphans)}
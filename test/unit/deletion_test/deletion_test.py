@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+
+import pytest
+
+from zotler import deletion
+
+
+def test_group_by_directory_skips_empty_lines():
+    groups = deletion.group_by_directory(['/lorem/a.pdf\n', '  \n', '/lorem/b.pdf',
+                                          '/ipsum/c.pdf', 'd.pdf'])
+
+    assert groups == {'/lorem': ['a.pdf', 'b.pdf'], '/ipsum': ['c.pdf'], '': ['d.pdf']}
+
+
+def test_split_into_batches():
+    batches = list(deletion.split_into_batches({'/lorem': ['a', 'b', 'c']}, 2))
+
+    assert batches == [('/lorem', ['a', 'b']), ('/lorem', ['c'])]
+
+
+@pytest.mark.parametrize('use_dir_fd', [True, False])
+def test_unlink_batch(mocker, tmpdir, use_dir_fd):
+    mocker.patch.object(deletion, 'USE_DIR_FD', use_dir_fd)
+    tmpdir.join('lorem.pdf').write('lorem ipsum')
+    tmpdir.mkdir('ipsum')
+    result = deletion.unlink_batch(str(tmpdir), ['lorem.pdf', 'dolor.pdf', 'ipsum'])
+
+    assert result.removed == ['lorem.pdf']
+    assert result.missing == ['dolor.pdf']
+    assert [name for name, _ in result.failed] == ['ipsum']
+    assert not tmpdir.join('lorem.pdf').exists()
+
+
+def test_unlink_batch_in_missing_directory(tmpdir):
+    result = deletion.unlink_batch(str(tmpdir.join('lorem')), ['ipsum.pdf'])
+
+    assert result.missing == ['ipsum.pdf']
+
+
+@pytest.mark.parametrize('jobs', [1, 3])
+def test_remove_files_in_batches(tmpdir, jobs):
+    paths = []
+    for directory in ('lorem', 'ipsum'):
+        for i in range(5):
+            file = tmpdir.join(directory, f'{i}.pdf')
+            file.write('lorem ipsum', ensure=True)
+            paths.append(str(file))
+    results = list(deletion.remove_files_in_batches(paths, jobs=jobs, batch_size=2))
+
+    assert len(results) == 6
+    assert sum(len(i.removed) for i in results) == 10
+    assert tmpdir.join('lorem').listdir() == []
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+
+import os
+import pytest
+
+from zotler import duplicates
+
+
+@pytest.fixture()
+def duplicate_files(tmpdir):
+    small = b'lorem ipsum'
+    large = os.urandom(3 * duplicates.BLOCK_SIZE)
+    changed_byte = bytes([large[duplicates.BLOCK_SIZE] ^ 0xff])
+    large_changed_middle = (large[:duplicates.BLOCK_SIZE] + changed_byte
+                            + large[duplicates.BLOCK_SIZE + 1:])
+    contents = {'a.pdf': small, 'b.pdf': small, 'c.pdf': b'lorem ipsam',
+                'd.pdf': large, 'e.pdf': large, 'f.pdf': large_changed_middle,
+                'g.pdf': b'', 'h.pdf': b''}
+    for name, content in contents.items():
+        tmpdir.join(name).write_binary(content)
+    return [(str(tmpdir.join(name)), len(content)) for name, content in contents.items()]
+
+
+def test_hash_ends_ignores_middle_of_large_files(duplicate_files):
+    (path_d, size), _, (path_f, _) = duplicate_files[3:6]
+
+    assert duplicates.hash_ends(path_d, size) == duplicates.hash_ends(path_f, size)
+    assert duplicates.hash_file(path_d) != duplicates.hash_file(path_f)
+
+
+def test_hash_file_hashes_empty_files(duplicate_files):
+    path, _ = duplicate_files[6]
+
+    assert duplicates.hash_file(path) == duplicates.hash_ends(path, 0)
+
+
+def test_stat_files_skips_symlinks(tmpdir, duplicate_files):
+    os.symlink(duplicate_files[0][0], str(tmpdir.join('link.pdf')))
+
+    assert duplicates.stat_files(str(tmpdir), ['a.pdf', 'link.pdf', 'lorem.pdf']) == [
+        duplicate_files[0]]
+
+
+@pytest.mark.parametrize('jobs', [1, 4])
+def test_find_duplicates(duplicate_files, jobs):
+    groups = sorted(duplicates.find_duplicates(duplicate_files, jobs=jobs))
+    names = [[os.path.basename(path) for path in group.paths] for group in groups]
+
+    assert names == [['a.pdf', 'b.pdf'], ['d.pdf', 'e.pdf']]
+
+
+def test_find_duplicate_attachments_marks_referenced_files(zotfile_library):
+    orphan = zotfile_library['orphans'][1]
+    referenced = os.path.join(zotfile_library['dest_dir'], 'Programming', 'Python',
+                              'isum.pdf')
+    with open(orphan, 'w') as orphan_file:
+        orphan_file.write('dolor sit amet')
+    with open(referenced, 'w') as referenced_file:
+        referenced_file.write('dolor sit amet')
+    found = list(duplicates.find_duplicate_attachments(zotfile_library['dbase'],
+                                                       zotfile_library['prefs']))
+
+    assert len(found) == 2
+    group, is_referenced = [i for i in found if i[0].size == 14][0]
+    assert dict(zip(group.paths, is_referenced)) == {orphan: False, referenced: True}
+    assert list(duplicates.format_duplicates(group, is_referenced))[0] == (
+        '14 bytes, 2 copies:')
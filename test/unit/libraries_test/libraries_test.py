@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+
+import os
+import pytest
+import sqlite3
+
+from zotler import libraries
+
+
+@pytest.fixture()
+def group_library(zotfile_library):
+    # Items 1 and 2 are moved to a group library, the group references
+    # one of the orphans too.
+    connection = sqlite3.connect(zotfile_library['dbase'])
+    connection.execute('ALTER TABLE items ADD COLUMN libraryID INT DEFAULT 1')
+    connection.execute('UPDATE items SET libraryID = 2 WHERE itemID IN (1, 2)')
+    connection.execute('INSERT INTO items VALUES (5, ?, 2)', ('KEY00005', ))
+    connection.execute('INSERT INTO itemAttachments VALUES (5, ?)',
+                       ('attachments:orphan.txt', ))
+    connection.commit()
+    connection.close()
+    return zotfile_library
+
+
+def test_get_libraries_without_libraries_table(group_library):
+    connection = sqlite3.connect(group_library['dbase'])
+
+    assert libraries.get_libraries(connection) == [(1, None, None), (2, None, None)]
+
+
+def test_get_libraries_with_groups(group_library):
+    connection = sqlite3.connect(group_library['dbase'])
+    connection.execute('CREATE TABLE libraries (libraryID INTEGER PRIMARY KEY, '
+                       'type TEXT)')
+    connection.execute('CREATE TABLE groups (groupID INTEGER PRIMARY KEY, '
+                       'libraryID INT, name TEXT)')
+    connection.executemany('INSERT INTO libraries VALUES (?, ?)',
+                           [(1, 'user'), (2, 'group')])
+    connection.execute('INSERT INTO groups VALUES (100, 2, ?)', ('Lorem', ))
+
+    assert libraries.get_libraries(connection) == [(1, 'user', None),
+                                                   (2, 'group', 'Lorem')]
+
+
+@pytest.mark.parametrize('jobs', [1, 2])
+def test_scan_libraries(group_library, jobs):
+    reports, orphans = libraries.scan_libraries(group_library['dbase'],
+                                                group_library['prefs'], jobs=jobs)
+    missing = os.path.join(group_library['dest_dir'],
+                           'Programming', 'R', 'Packages', 'lorem.pdf')
+
+    assert [(i.library.library_id, i.attachments, i.found) for i in reports] == [
+        (1, 2, 2), (2, 3, 2)]
+    assert [i.path for i in reports[1].missing] == [missing]
+    assert sorted(orphans) == group_library['orphans'][:2]
+    assert libraries.format_partition_report(reports[1]) == (
+        'Library 2: 3 attachments, 2 files found, 1 missing')
+
+
+def test_scan_libraries_reports_selected_libraries(group_library):
+    reports, orphans = libraries.scan_libraries(group_library['dbase'],
+                                                group_library['prefs'],
+                                                library_ids=(1, ))
+
+    assert [i.library.library_id for i in reports] == [1]
+    assert sorted(orphans) == group_library['orphans'][:2]
+
+
+def test_scan_libraries_skips_filtered_paths(group_library):
+    from zotler.walker import PathFilter
+
+    reports, _ = libraries.scan_libraries(group_library['dbase'],
+                                          group_library['prefs'],
+                                          path_filter=PathFilter(exclude=['*.pdf']))
+
+    assert [(i.attachments, i.found, len(i.missing)) for i in reports] == [
+        (0, 0, 0), (2, 2, 0)]
+
+
+def test_scan_libraries_shares_one_snapshot(mocker, group_library):
+    create_snapshot_file = mocker.spy(libraries, 'create_snapshot_file')
+    reports, orphans = libraries.scan_libraries(group_library['dbase'],
+                                                group_library['prefs'], jobs=2,
+                                                snapshot=True)
+
+    assert [(i.attachments, i.found) for i in reports] == [(2, 2), (3, 2)]
+    assert sorted(orphans) == group_library['orphans'][:2]
+    create_snapshot_file.assert_called_once()
+    assert not os.path.exists(create_snapshot_file.spy_return)
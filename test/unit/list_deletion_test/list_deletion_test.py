@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+
+import os
+import pytest
+import sqlite3
+
+from zotler import list_deletion
+from zotler.exceptions import ZotlerError
+
+
+def remove(paths, zotfile_library, **kwargs):
+    checked_chunks = []
+    removed = []
+    for checked, results in list_deletion.remove_listed_files(
+            paths, zotfile_library['prefs'], zotfile_library['dbase'], **kwargs):
+        checked_chunks.append(checked)
+        removed.extend(os.path.join(i.directory, j) for i in results for j in i.removed)
+    return checked_chunks, removed
+
+
+def test_iterate_chunks_splits_paths():
+    assert list(list_deletion.iterate_chunks('abcde', 2)) == [['a', 'b'], ['c', 'd'],
+                                                              ['e']]
+
+
+def test_remove_listed_files_removes_orphans(zotfile_library):
+    orphans = zotfile_library['orphans']
+    _, removed = remove(orphans, zotfile_library)
+
+    assert sorted(removed) == orphans
+    assert not any(os.path.exists(i) for i in orphans)
+
+
+def test_remove_listed_files_skips_files_outside_location(tmpdir, zotfile_library):
+    outside = tmpdir.join('outside.txt')
+    outside.write('lorem ipsum')
+    checked_chunks, removed = remove([str(outside)], zotfile_library)
+
+    assert checked_chunks[0].outside == [str(outside)]
+    assert removed == []
+    assert outside.exists()
+
+
+def test_remove_listed_files_skips_symlinks_leading_out(tmpdir, zotfile_library):
+    target = tmpdir.mkdir('target')
+    target.join('outside.txt').write('lorem ipsum')
+    link = os.path.join(zotfile_library['dest_dir'], 'link')
+    os.symlink(str(target), link)
+    path = os.path.join(link, 'outside.txt')
+    checked_chunks, removed = remove([path], zotfile_library)
+
+    assert checked_chunks[0].outside == [path]
+    assert removed == []
+    assert target.join('outside.txt').exists()
+
+
+def test_remove_listed_files_skips_paths_with_nul_bytes(zotfile_library):
+    orphans = zotfile_library['orphans']
+    path = orphans[0] + '\0'
+    checked_chunks, removed = remove([path, orphans[1]], zotfile_library)
+
+    assert checked_chunks[0].invalid == [path]
+    assert removed == [orphans[1]]
+    assert os.path.exists(orphans[0])
+
+
+def test_remove_listed_files_keeps_referenced_files(zotfile_library, relative_paths):
+    referenced = os.path.normpath(os.path.join(zotfile_library['dest_dir'],
+                                               relative_paths[1]))
+    checked_chunks, removed = remove([referenced], zotfile_library)
+
+    assert checked_chunks[0].referenced == [referenced]
+    assert removed == []
+    assert os.path.exists(referenced)
+
+
+def add_attachment(zotfile_library, path):
+    connection = sqlite3.connect(zotfile_library['dbase'])
+    connection.execute('INSERT INTO itemAttachments (path) VALUES (?)', (path, ))
+    connection.commit()
+    connection.close()
+
+
+def test_remove_listed_files_keeps_files_referenced_with_backslashes(zotfile_library):
+    add_attachment(zotfile_library, 'attachments:Programming\\R\\orphan.pdf')
+    referenced = os.path.join(zotfile_library['dest_dir'], 'Programming', 'R',
+                              'orphan.pdf')
+    checked_chunks, removed = remove([referenced], zotfile_library)
+
+    assert checked_chunks[0].referenced == [referenced]
+    assert removed == []
+
+
+@pytest.mark.parametrize('normalization', ['none', 'nfc'])
+def test_remove_listed_files_keeps_files_referenced_by_absolute_paths(zotfile_library,
+                                                                      normalization):
+    referenced = zotfile_library['orphans'][0]
+    add_attachment(zotfile_library, referenced)
+    checked_chunks, removed = remove([referenced], zotfile_library,
+                                     normalization=normalization)
+
+    assert checked_chunks[0].referenced == [referenced]
+    assert removed == []
+
+
+@pytest.mark.parametrize('normalization, kept', [('none', False), ('nfc', True)])
+def test_remove_listed_files_normalizes_paths(zotfile_library, normalization, kept):
+    add_attachment(zotfile_library, 'attachments:Caf\u00e9.pdf')
+    nfd_path = os.path.join(zotfile_library['dest_dir'], 'Cafe\u0301.pdf')
+    with open(nfd_path, 'w') as nfd_file:
+        nfd_file.write('lorem ipsum')
+    remove([nfd_path], zotfile_library, normalization=normalization)
+
+    assert os.path.exists(nfd_path) == kept
+
+
+def test_remove_listed_files_checks_list_in_chunks(zotfile_library):
+    orphans = zotfile_library['orphans']
+    checked_chunks, removed = remove(orphans, zotfile_library, chunk_size=2)
+
+    assert [len(i.allowed) for i in checked_chunks] == [2, 1]
+    assert sorted(removed) == orphans
+
+
+def test_quarantine_listed_files_moves_only_orphans(tmpdir, zotfile_library,
+                                                    relative_paths):
+    referenced = os.path.normpath(os.path.join(zotfile_library['dest_dir'],
+                                               relative_paths[1]))
+    run = list_deletion.create_quarantine_run(zotfile_library['prefs'],
+                                              str(tmpdir.join('quarantine')))
+    moved = [i.source for _, results in list_deletion.quarantine_listed_files(
+                 zotfile_library['orphans'] + [referenced], run,
+                 zotfile_library['prefs'], zotfile_library['dbase'])
+             for i in results if i.error is None]
+
+    assert sorted(moved) == zotfile_library['orphans']
+    assert os.path.exists(referenced)
+
+
+def test_create_quarantine_run_checks_location(zotfile_library):
+    quarantine_dir = os.path.join(zotfile_library['dest_dir'], 'quarantine')
+    with pytest.raises(ZotlerError):
+        list_deletion.create_quarantine_run(zotfile_library['prefs'], quarantine_dir)
+    assert not os.path.exists(quarantine_dir)
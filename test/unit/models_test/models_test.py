@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+
+import os
+import pytest
+import time
+
+from zotler import output
+
+QtCore = pytest.importorskip('PyQt5.QtCore')
+models = pytest.importorskip('zotler.gui.ui.models')
+
+Qt = QtCore.Qt
+
+
+@pytest.fixture()
+def list_file(tmpdir):
+    def create(paths, output_format='text'):
+        path = str(tmpdir.join('orphans'))
+        with open(path, 'w') as file:
+            output.write_orphans(paths, file, output_format)
+        return path
+    return create
+
+
+@pytest.fixture()
+def paths(tmpdir):
+    return [os.path.join(str(tmpdir), f'Lorem{i}.pdf') for i in range(5)]
+
+
+def shown(model):
+    return [model.data(model.index(i)) for i in range(model.rowCount())]
+
+
+@pytest.fixture()
+def application():
+    # Results of the worker threads are delivered by the event loop.
+    return QtCore.QCoreApplication.instance() or QtCore.QCoreApplication([])
+
+
+def wait_for_sizes(application, model, timeout=5):
+    deadline = time.monotonic() + timeout
+    while model.reading_sizes and time.monotonic() < deadline:
+        application.processEvents()
+        time.sleep(0.01)
+
+
+def test_model_fetches_paths_in_batches(mocker, list_file, paths):
+    mocker.patch.object(models, 'FETCH_SIZE', 2)
+    model = models.OrphanListModel(list_file(paths))
+
+    assert model.rowCount() == 0
+    assert model.canFetchMore()
+    model.fetchMore()
+    assert shown(model) == paths[:2]
+    model.fetchMore()
+    model.fetchMore()
+    assert shown(model) == paths
+    assert not model.canFetchMore()
+
+
+def test_model_filters_paths(list_file, paths):
+    model = models.OrphanListModel(list_file(paths))
+    model.set_filter('lorem3')
+
+    assert shown(model) == [paths[3]]
+    model.set_filter('')
+    assert shown(model) == paths
+
+
+def test_model_keeps_check_states_while_filtering(list_file, paths):
+    model = models.OrphanListModel(list_file(paths))
+    model.set_filter('lorem1')
+    model.setData(model.index(0), Qt.Unchecked, Qt.CheckStateRole)
+    model.set_filter('')
+
+    assert [model.data(model.index(i), Qt.CheckStateRole)
+            for i in range(model.rowCount())] == [Qt.Checked, Qt.Unchecked,
+                                                  Qt.Checked, Qt.Checked, Qt.Checked]
+    assert model.checked == 4
+
+
+def test_model_sorts_paths_by_size_read_in_worker(application, tmpdir, list_file,
+                                                  paths):
+    for size, path in enumerate(paths):
+        tmpdir.join(os.path.basename(path)).write('x' * size)
+    model = models.OrphanListModel(list_file(paths))
+    model.set_sort_order(models.SORT_ORDERS[2])
+
+    assert model.reading_sizes
+    assert shown(model) == paths
+    wait_for_sizes(application, model)
+    assert not model.reading_sizes
+    assert shown(model) == paths[::-1]
+    model.close()
+
+
+@pytest.mark.parametrize('output_format', ['jsonl', 'csv'])
+def test_model_sorts_paths_by_sizes_in_list(tmpdir, list_file, paths, output_format):
+    for size, path in enumerate(paths):
+        tmpdir.join(os.path.basename(path)).write('x' * size)
+    model = models.OrphanListModel(list_file(paths, output_format))
+    # Sizes of the files changed since the list was saved don't matter.
+    for path in paths:
+        tmpdir.join(os.path.basename(path)).write('')
+    model.set_sort_order(models.SORT_ORDERS[2])
+
+    assert not model.reading_sizes
+    assert shown(model) == paths[::-1]
+    model.close()
+
+
+@pytest.mark.parametrize('output_format', output.FORMATS)
+def test_model_saves_checked_paths_in_list_format(list_file, paths, output_format):
+    if output_format != 'text':
+        paths[1] = paths[1].replace('Lorem1', 'Lorem\n1')
+    path = list_file(paths, output_format)
+    model = models.OrphanListModel(path)
+    model.set_filter('lorem2')
+    model.set_shown_checked(False)
+    model.save()
+    model.close()
+
+    with open(path) as file:
+        assert output.detect_format(output.read_first_chunk(file)) == output_format
+        file.seek(0)
+        assert list(output.read_paths(file)) == paths[:2] + paths[3:]
+
+
+def test_model_doesnt_save_unchanged_list(list_file, paths):
+    path = list_file(paths, 'nul')
+    mtime = os.stat(path).st_mtime_ns
+    model = models.OrphanListModel(path)
+    model.save()
+
+    assert os.stat(path).st_mtime_ns == mtime
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+
+import io
+import json
+import pytest
+
+from zotler import output
+from zotler.exceptions import InvalidModeError
+
+
+@pytest.fixture()
+def orphan_paths(tmpdir):
+    paths = [tmpdir.join('lorem.pdf'), tmpdir.join('ipsum\ndolor.pdf'),
+             tmpdir.join(' sit amet .pdf')]
+    for path in paths:
+        path.write('lorem ipsum')
+    return [str(i) for i in paths]
+
+
+@pytest.mark.parametrize('output_format', ['nul', 'jsonl', 'csv'])
+def test_written_orphans_can_be_read_back(orphan_paths, output_format, mocker):
+    mocker.patch.object(output, 'READ_SIZE', 7)
+    output_file = io.StringIO()
+    output.write_orphans(iter(orphan_paths), output_file, output_format)
+    output_file.seek(0)
+
+    assert list(output.read_paths(output_file)) == orphan_paths
+
+
+@pytest.mark.parametrize('output_format', ['jsonl', 'csv'])
+def test_read_entries_contain_sizes_of_listed_files(orphan_paths, output_format):
+    output_file = io.StringIO()
+    output.write_orphans(orphan_paths[:1] + ['/lorem/ipsum.pdf'], output_file,
+                         output_format)
+    output_file.seek(0)
+
+    assert list(output.read_entries(output_file)) == [(orphan_paths[0], 11),
+                                                      ('/lorem/ipsum.pdf', None)]
+
+
+def test_write_orphans_in_text_format(orphan_paths):
+    output_file = io.StringIO()
+    output.write_orphans(orphan_paths[:1], output_file)
+
+    assert output_file.getvalue() == f'{orphan_paths[0]}\n'
+
+
+def test_write_orphans_in_jsonl_format_contains_size(orphan_paths):
+    output_file = io.StringIO()
+    output.write_orphans(orphan_paths[:1] + ['/lorem/ipsum.pdf'], output_file, 'jsonl')
+    records = [json.loads(i) for i in output_file.getvalue().splitlines()]
+
+    assert records[0]['size'] == 11
+    assert records[1] == {'path': '/lorem/ipsum.pdf', 'size': None, 'mtime': None}
+
+
+def test_write_orphans_raises_error_for_unknown_format():
+    with pytest.raises(InvalidModeError):
+        output.write_orphans([], io.StringIO(), 'lorem')
+
+
+def test_read_paths_strips_text_lines(paths_to_files):
+    list_file = io.StringIO(''.join(f'{i}\n' for i in paths_to_files) + '\n')
+
+    assert list(output.read_paths(list_file)) == ['lorem.txt', 'ipsum.txt',
+                                                  'dolor.txt']
+
+
+@pytest.mark.parametrize('output_format', output.FORMATS)
+def test_detect_format_of_written_orphans(orphan_paths, output_format):
+    output_file = io.StringIO()
+    output.write_orphans(orphan_paths, output_file, output_format)
+    output_file.seek(0)
+
+    assert output.detect_format(output.read_first_chunk(output_file)) == output_format
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+
+import os
+import pytest
+
+from zotler import path_index, zotler
+from zotler.exceptions import InvalidModeError
+from zotler.path_index import PathIndex
+
+
+@pytest.fixture()
+def index(absolute_paths):
+    return PathIndex(absolute_paths)
+
+
+def test_path_index_contains_added_paths(index, relative_paths):
+    assert len(index) == 4
+    for relative_path in relative_paths:
+        assert os.path.join('lorem', relative_path) in index
+
+
+@pytest.mark.parametrize('path', [
+    'lorem/Programming/Python/PEP_8.pdf',
+    'ipsum/Programming/Python/isum.pdf',
+    'lorem',
+])
+def test_path_index_does_not_contain_other_paths(index, path):
+    assert path not in index
+
+
+def test_path_index_normalizes_paths(index):
+    assert 'lorem/Programming/R/../Python/./isum.pdf' in index
+
+
+def test_path_index_counts_duplicates_once(index):
+    index.add('lorem/Programming/Python/isum.pdf')
+    index.add_directory('lorem/Programming/Python', ['isum.pdf', 'dolor.pdf'])
+
+    assert len(index) == 5
+
+
+def test_path_index_iterates_over_paths(index, relative_paths):
+    assert sorted(index) == sorted(os.path.join('lorem', i) for i in relative_paths)
+
+
+def test_path_index_difference(index):
+    other = PathIndex()
+    other.add_directory('./lorem/Programming/Python', ['isum.pdf', 'dolor.pdf'])
+    other.add('lorem/Programming/R/Packages/lorem.pdf')
+
+    assert index - other == {'lorem/Programming/R/Packages/lorem.R.html',
+                             'lorem/Programming/Python/PEP/PEP_8.pdf'}
+
+
+def test_create_index_of_existing_files(profiles_dir, expected_relative_paths):
+    index = zotler.create_index_of_existing_files(str(profiles_dir))
+    expected_paths = [os.path.normpath(os.path.join(profiles_dir, i))
+                      for i in expected_relative_paths]
+
+    assert sorted(index) == sorted(expected_paths)
+
+
+def test_path_index_discard(index):
+    index.discard('lorem/Programming/Python/isum.pdf')
+    index.discard('lorem/Programming/Python/dolor.pdf')
+
+    assert len(index) == 3
+    assert 'lorem/Programming/Python/isum.pdf' not in index
+
+
+def test_path_index_discard_tree(index):
+    removed = index.discard_tree('lorem/Programming/Python')
+
+    assert sorted(removed) == ['lorem/Programming/Python/PEP/PEP_8.pdf',
+                               'lorem/Programming/Python/isum.pdf']
+    assert sorted(index) == ['lorem/Programming/R/Packages/lorem.R.html',
+                             'lorem/Programming/R/Packages/lorem.pdf']
+
+
+NFC_NAME = 'Caf\u00e9.pdf'
+NFD_NAME = 'Cafe\u0301.pdf'
+
+
+@pytest.mark.parametrize('normalization, expected', [
+    ('none', {f'lorem/{NFD_NAME}', 'lorem/NOTES.pdf'}),
+    ('nfc', {'lorem/NOTES.pdf'}),
+    ('nfd', {'lorem/NOTES.pdf'}),
+    ('casefold', set()),
+])
+def test_path_index_difference_with_normalization(normalization, expected):
+    existing = PathIndex()
+    existing.add_directory('lorem', [NFD_NAME, 'NOTES.pdf'])
+    referenced = PathIndex([f'lorem/{NFC_NAME}', 'lorem/notes.pdf'],
+                           key=path_index.get_normalizer(normalization))
+
+    assert existing - referenced == expected
+    assert (f'lorem/{NFD_NAME}' in referenced) == (normalization != 'none')
+
+
+def test_get_normalizer_rejects_unknown_normalization():
+    with pytest.raises(InvalidModeError):
+        path_index.get_normalizer('lorem')
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+
+import os
+import pytest
+
+from zotler import quarantine
+from zotler.exceptions import ZotlerError
+
+
+@pytest.fixture()
+def library(tmpdir):
+    paths = []
+    for directory in ('lorem', 'ipsum'):
+        for i in range(2):
+            file = tmpdir.join('library', directory, f'{i}.pdf')
+            file.write('lorem ipsum', ensure=True)
+            paths.append(str(file))
+    return paths
+
+
+def test_move_files_keeps_directory_layout(tmpdir, library):
+    run = quarantine.QuarantineRun.create(str(tmpdir.join('quarantine')))
+    results = list(run.move_files(library + [str(tmpdir.join('dolor.pdf')), '\n']))
+
+    assert [i.error for i in results[:-1]] == [None] * 4
+    assert isinstance(results[-1].error, FileNotFoundError)
+    assert not any(os.path.exists(i) for i in library)
+    assert all(os.path.isfile(i.target) for i in results[:-1])
+    assert results[0].target.endswith(os.path.join('library', 'lorem', '0.pdf'))
+    assert list(run.read_journal()) == [(i.source, i.target) for i in results[:-1]]
+    assert quarantine.list_runs(str(tmpdir.join('quarantine')))[0].directory == \
+        run.directory
+
+
+def test_undo_restores_files_and_removes_run(tmpdir, library):
+    run = quarantine.QuarantineRun.create(str(tmpdir.join('quarantine')))
+    list(run.move_files(library))
+    tmpdir.join('library', 'ipsum').remove()
+    results = list(run.undo())
+
+    assert [i.error for i in results] == [None] * 4
+    assert all(os.path.isfile(i) for i in library)
+    assert not os.path.exists(run.directory)
+
+
+def test_undo_keeps_run_with_conflicting_files(tmpdir, library):
+    run = quarantine.QuarantineRun.create(str(tmpdir.join('quarantine')))
+    list(run.move_files(library))
+    tmpdir.join('library', 'lorem', '0.pdf').write('dolor')
+    results = list(run.undo())
+
+    assert isinstance(results[0].error, FileExistsError)
+    assert tmpdir.join('library', 'lorem', '0.pdf').read() == 'dolor'
+    assert os.path.isfile(results[0].source)
+    assert [i.error for i in results[1:]] == [None] * 3
+
+
+def test_undo_can_be_repeated_after_conflict(tmpdir, library):
+    run = quarantine.QuarantineRun.create(str(tmpdir.join('quarantine')))
+    list(run.move_files(library))
+    conflicting = tmpdir.join('library', 'lorem', '0.pdf')
+    conflicting.write('dolor')
+    list(run.undo())
+    conflicting.remove()
+    results = list(run.undo())
+
+    assert results[0].error is None
+    assert all(isinstance(i.error, FileNotFoundError) for i in results[1:])
+    assert conflicting.read() == 'lorem ipsum'
+    assert not os.path.exists(run.directory)
+
+
+def test_purge_removes_run(tmpdir, library):
+    run = quarantine.QuarantineRun.create(str(tmpdir.join('quarantine')))
+    list(run.move_files(library))
+    run.purge()
+
+    assert not os.path.exists(run.directory)
+    assert not any(os.path.exists(i) for i in library)
+
+
+def test_check_location_rejects_directory_in_library(tmpdir, library):
+    with pytest.raises(ZotlerError):
+        quarantine.check_location(str(tmpdir.join('library', 'quarantine')),
+                                  str(tmpdir.join('library')))
+    quarantine.check_location(str(tmpdir.join('quarantine', 'new')),
+                              str(tmpdir.join('library')))
+
+
+def test_open_accepts_only_run_directories(tmpdir, library):
+    quarantine_dir = str(tmpdir.join('quarantine'))
+    run = quarantine.QuarantineRun.create(quarantine_dir)
+    list(run.move_files(library[:1]))
+
+    assert quarantine.QuarantineRun.open(run.directory, quarantine_dir).directory == \
+        os.path.normpath(run.directory)
+    with pytest.raises(ZotlerError):
+        quarantine.QuarantineRun.open(run.directory, str(tmpdir.join('library')))
+    with pytest.raises(ZotlerError):
+        quarantine.QuarantineRun.open(str(tmpdir.join('library')))
+    tmpdir.join('quarantine', os.path.basename(run.directory), 'lorem.txt').write('')
+    with pytest.raises(ZotlerError):
+        quarantine.QuarantineRun.open(run.directory)
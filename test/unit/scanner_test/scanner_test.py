@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+
+import os
+import pytest
+import sqlite3
+
+from zotler.exceptions import CancelledError
+from zotler.scanner import OrphanScanner
+
+
+def test_scan_yields_orphans(zotfile_library):
+    with OrphanScanner(zotfile_library['dbase'], zotfile_library['prefs']) as scanner:
+        assert sorted(scanner.scan()) == zotfile_library['orphans']
+
+
+def test_scan_reads_references_only_after_database_change(zotfile_library):
+    orphan = zotfile_library['orphans'][2]
+    with OrphanScanner(zotfile_library['dbase'], zotfile_library['prefs']) as scanner:
+        list(scanner.scan())
+        assert not scanner.refresh_references()
+
+        connection = sqlite3.connect(zotfile_library['dbase'])
+        connection.execute('INSERT INTO itemAttachments (path) VALUES (?)',
+                           (f'attachments:{os.path.basename(orphan)}', ))
+        connection.commit()
+        connection.close()
+
+        assert orphan not in list(scanner.scan())
+    phases = [i.name for i in scanner.stats.phases]
+    assert phases.count('database query') == 2
+
+
+def test_scan_reports_progress(mocker, zotfile_library):
+    progress = mocker.Mock()
+    with OrphanScanner(zotfile_library['dbase'], zotfile_library['prefs'],
+                       progress=progress) as scanner:
+        list(scanner.scan())
+
+    assert mocker.call('rows read', 4) in progress.call_args_list
+    assert progress.call_args_list[-1] == mocker.call('orphans found', 3)
+
+
+def test_scan_can_be_cancelled(zotfile_library):
+    with OrphanScanner(zotfile_library['dbase'], zotfile_library['prefs'],
+                       cancel=lambda: True) as scanner:
+        with pytest.raises(CancelledError):
+            list(scanner.scan())
+
+
+def test_scan_skips_other_attachments(zotfile_library):
+    connection = sqlite3.connect(zotfile_library['dbase'])
+    connection.execute('INSERT INTO itemAttachments (path) VALUES (?)',
+                       ('storage:lorem.pdf', ))
+    connection.commit()
+    connection.close()
+    with OrphanScanner(zotfile_library['dbase'], zotfile_library['prefs']) as scanner:
+        assert sorted(scanner.scan()) == zotfile_library['orphans']
+        assert len(scanner.referenced_files) == 4
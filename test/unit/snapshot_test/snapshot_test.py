@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+
+import gzip
+import pytest
+
+from zotler import output, snapshot
+from zotler.exceptions import ZotlerError
+
+
+def test_write_and_read_snapshot(mocker, tmpdir):
+    mocker.patch.object(output, 'READ_SIZE', 5)
+    snapshot_file = str(tmpdir.join('orphans.gz'))
+    paths = ['/lorem/ipsum.pdf', '/dolor\nsit.pdf', '/lorem/amet.pdf']
+    snapshot.write_snapshot(paths, snapshot_file)
+
+    assert list(snapshot.read_snapshot(snapshot_file)) == sorted(paths)
+    assert tmpdir.listdir() == [tmpdir.join('orphans.gz')]
+
+
+def test_read_snapshot_rejects_other_files(tmpdir):
+    other_file = tmpdir.join('orphans.gz')
+    with gzip.open(str(other_file), 'wt') as file:
+        file.write('/lorem/ipsum.pdf\n')
+
+    with pytest.raises(ZotlerError):
+        list(snapshot.read_snapshot(str(other_file)))
+
+
+def test_diff_sorted():
+    changes = list(snapshot.diff_sorted(['a', 'b', 'd', 'f'], ['b', 'c', 'd', 'g']))
+
+    assert changes == [('-', 'a'), ('+', 'c'), ('-', 'f'), ('+', 'g')]
+
+
+def test_update_snapshot(tmpdir):
+    snapshot_file = str(tmpdir.join('orphans.gz'))
+
+    assert list(snapshot.update_snapshot({'b', 'a'}, snapshot_file)) == [
+        ('+', 'a'), ('+', 'b')]
+    assert list(snapshot.update_snapshot({'c', 'b'}, snapshot_file)) == [
+        ('-', 'a'), ('+', 'c')]
+    assert list(snapshot.read_snapshot(snapshot_file)) == ['b', 'c']
+    assert tmpdir.listdir() == [tmpdir.join('orphans.gz')]
+
+
+def test_update_snapshot_keeps_old_snapshot_if_interrupted(tmpdir):
+    snapshot_file = str(tmpdir.join('orphans.gz'))
+    snapshot.write_snapshot(['a'], snapshot_file)
+    changes = snapshot.update_snapshot(['b', 'c'], snapshot_file)
+    next(changes)
+    changes.close()
+
+    assert list(snapshot.read_snapshot(snapshot_file)) == ['a']
+    assert tmpdir.listdir() == [tmpdir.join('orphans.gz')]
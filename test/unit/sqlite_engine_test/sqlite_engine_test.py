@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+
+import os
+import sqlite3
+
+from zotler import path_index, sqlite_engine
+
+
+def test_create_absolute_path_function_strips_prefix():
+    absolute_path = sqlite_engine.create_absolute_path_function('/lorem')
+
+    assert absolute_path('attachments:ipsum/../dolor.pdf') == '/lorem/dolor.pdf'
+
+
+def test_iterate_orphans_ignores_non_zotfile_attachments(zotero_dbase):
+    connection = sqlite3.connect(zotero_dbase)
+    connection.execute('INSERT INTO itemAttachments (path) VALUES (?)',
+                       ('storage:Programming/Python/isum.pdf', ))
+    existing_files = [os.path.join('/lorem', i)
+                      for i in ('Programming/Python/isum.pdf', 'ipsum.pdf')]
+    orphans = list(sqlite_engine.iterate_orphans(connection, '/lorem',
+                                                 existing_files))
+
+    assert orphans == ['/lorem/ipsum.pdf']
+
+
+def test_iterate_orphans_drops_temporary_tables(zotero_dbase):
+    connection = sqlite3.connect(zotero_dbase)
+    orphans = sqlite_engine.iterate_orphans(connection, '/lorem', ['/lorem/a.pdf'])
+    next(orphans)
+    orphans.close()
+    tables = connection.execute('SELECT name FROM temp.sqlite_master').fetchall()
+
+    assert tables == []
+
+
+def test_iterate_orphans_with_normalization(zotero_dbase):
+    connection = sqlite3.connect(zotero_dbase)
+    connection.execute('INSERT INTO itemAttachments (path) VALUES (?)',
+                       ('attachments:Caf\u00e9.pdf', ))
+    existing_files = ['/lorem/Cafe\u0301.pdf', '/lorem/ipsum.pdf']
+    orphans = list(sqlite_engine.iterate_orphans(
+        connection, '/lorem', existing_files,
+        normalize=path_index.get_normalizer('nfc')))
+
+    assert orphans == ['/lorem/ipsum.pdf']
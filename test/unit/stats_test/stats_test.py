@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+
+import json
+import pytest
+
+from zotler import zotler
+from zotler.stats import Statistics
+
+
+def test_phase_records_time_items_and_throughput(mocker):
+    mocker.patch('time.perf_counter', side_effect=[10.0, 12.0])
+    statistics = Statistics()
+    with statistics.phase('lorem', 'files') as phase:
+        phase.items = 100
+
+    assert phase.seconds == 2.0
+    assert phase.throughput == 50.0
+    assert phase.peak_rss > 0
+
+
+def test_phase_is_stopped_after_exception():
+    statistics = Statistics()
+    with pytest.raises(ZeroDivisionError):
+        with statistics.phase('lorem'):
+            1 / 0
+
+    assert statistics.phases[0].seconds is not None
+
+
+def test_iterate_stops_phase_after_last_item():
+    statistics = Statistics()
+    items = statistics.iterate('lorem', 'files', iter('abc'))
+
+    assert next(items) == 'a'
+    assert statistics.phases[0].seconds is None
+    assert list(items) == ['b', 'c']
+    assert statistics.phases[0].seconds is not None
+    assert statistics.phases[0].items == 3
+
+
+def test_report_as_json():
+    statistics = Statistics()
+    with statistics.phase('lorem', 'files') as phase:
+        phase.items = 5
+    report = json.loads(statistics.report('json'))
+
+    assert report[0]['phase'] == 'lorem'
+    assert report[0]['items'] == 5
+
+
+def test_report_as_text():
+    statistics = Statistics()
+    with statistics.phase('lorem'):
+        pass
+    lines = statistics.report('text').splitlines()
+
+    assert lines[0].split()[:3] == ['phase', 'seconds', 'items']
+    assert lines[1].startswith('lorem')
+
+
+@pytest.mark.parametrize('engine, phases', [
+    ('set', ['get_base_path', 'database query', 'tree walk', 'difference']),
+    ('sqlite', ['get_base_path', 'database query', 'tree walk', 'anti-join']),
+])
+def test_find_orphans_records_phases(engine, phases, zotfile_library):
+    statistics = Statistics()
+    list(zotler.find_orphans(zotfile_library['dbase'], zotfile_library['prefs'],
+                             engine=engine, stats=statistics))
+
+    assert [i.name for i in statistics.phases] == phases
+    assert statistics.phases[2].items == 6
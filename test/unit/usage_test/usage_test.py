@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+
+import os
+import pytest
+
+from zotler import usage, walker
+
+
+def test_scan_directory_with_sizes(tmpdir):
+    tmpdir.join('lorem.pdf').write('lorem ipsum')
+    tmpdir.mkdir('ipsum')
+    files, subdirs = walker.scan_directory_with_sizes(str(tmpdir))
+
+    assert files == ['lorem.pdf']
+    assert files[0].size == 11
+    assert subdirs == ['ipsum']
+
+
+def test_get_ancestors_stops_at_base_dir():
+    assert list(usage.get_ancestors('/lorem/ipsum/dolor', '/lorem')) == [
+        '/lorem/ipsum/dolor', '/lorem/ipsum', '/lorem']
+
+
+@pytest.mark.parametrize('jobs', [1, 3])
+def test_create_usage_report(zotfile_library, jobs):
+    dest_dir = zotfile_library['dest_dir']
+    large_orphan = os.path.join(dest_dir, 'Programming', 'R', 'orphan.pdf')
+    with open(large_orphan, 'w') as orphan_file:
+        orphan_file.write(100 * 'lorem ipsum')
+    with open(zotfile_library['orphans'][0], 'w') as orphan_file:
+        orphan_file.write('lorem ipsum dolor')
+    report = usage.create_usage_report(zotfile_library['dbase'],
+                                       zotfile_library['prefs'], top=2, jobs=jobs)
+
+    assert (report.files, report.bytes) == (3, 1128)
+    assert report.top_directories == [
+        (1128, 3, dest_dir),
+        (1117, 2, os.path.join(dest_dir, 'Programming'))]
+    assert report.top_files == [(1100, large_orphan),
+                                (17, zotfile_library['orphans'][0])]
+    assert list(usage.format_usage_report(report))[0] == '3 orphan files, 1.1 KiB'
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+
+import os
+import pytest
+
+from zotler import walker, zotler
+
+
+def test_scan_directory_splits_files_and_subdirs(profiles_dir):
+    files, subdirs = walker.scan_directory(str(profiles_dir))
+
+    assert files == []
+    assert sorted(subdirs) == ['profile1', 'profile2', 'profile3.default']
+
+
+def test_scan_directory_returns_empty_lists_for_missing_directory(tmpdir):
+    assert walker.scan_directory(str(tmpdir.join('lorem'))) == ([], [])
+
+
+def test_scan_directory_does_not_descend_into_symlinked_dirs(profiles_dir):
+    os.symlink(str(profiles_dir.join('profile2')),
+               str(profiles_dir.join('profile1', 'link')))
+    files, subdirs = walker.scan_directory(str(profiles_dir.join('profile1')))
+
+    assert (files, subdirs) == ([], [])
+
+
+@pytest.mark.parametrize('jobs', [1, 4])
+def test_walk_directories_visits_every_directory(jobs, profiles_dir):
+    listing = {os.path.relpath(directory, str(profiles_dir)): sorted(files)
+               for directory, files
+               in walker.walk_directories(str(profiles_dir), jobs=jobs)}
+
+    assert listing == {'.': [],
+                       'profile1': [],
+                       'profile2': ['file21.txt', 'file22.txt'],
+                       'profile3.default': ['file1.txt', 'file2.txt', 'prefs.js']}
+
+
+def test_get_paths_to_existing_files_in_parallel(profiles_dir,
+                                                 expected_relative_paths):
+    existing_paths = list(zotler.get_paths_to_existing_files(profiles_dir, jobs=3))
+    expected_paths = [os.path.normpath(os.path.join(profiles_dir, i))
+                      for i in expected_relative_paths]
+
+    assert sorted(existing_paths) == sorted(expected_paths)
+
+
+@pytest.mark.parametrize('patterns, expected', [
+    (['*.txt'], ['a/b.txt', 'b.txt', 'c/d/b.txt']),
+    (['a/*.txt'], ['a/b.txt']),
+    (['c'], ['c', 'a/c']),
+    (['c/*.txt'], []),
+    (['c/**/*.txt'], ['c/d/b.txt']),
+    (['**/b.txt'], ['a/b.txt', 'b.txt', 'c/d/b.txt']),
+    (['a/b.[!t]*'], ['a/b.pdf']),
+    (['?/c'], ['a/c']),
+])
+def test_compile_globs(patterns, expected):
+    regex = walker.compile_globs(patterns)
+    paths = ['a/b.txt', 'b.txt', 'c/d/b.txt', 'c', 'a/c', 'a/b.pdf']
+
+    assert sorted(i for i in paths if regex.match(i)) == sorted(expected)
+
+
+@pytest.mark.parametrize('jobs', [1, 4])
+def test_walk_directories_prunes_excluded_directories(mocker, jobs, profiles_dir):
+    scan = mocker.Mock(side_effect=walker.scan_directory)
+    path_filter = walker.PathFilter(exclude=['profile2', '*.js'], include=['*.txt',
+                                                                          '*.js'])
+    listing = {os.path.relpath(directory, str(profiles_dir)): sorted(files)
+               for directory, files
+               in walker.walk_directories(str(profiles_dir), jobs=jobs, scan=scan,
+                                          path_filter=path_filter)}
+
+    assert listing == {'.': [],
+                       'profile1': [],
+                       'profile3.default': ['file1.txt', 'file2.txt']}
+    assert str(profiles_dir.join('profile2')) not in [i[0][0]
+                                                      for i in scan.call_args_list]
+
+
+@pytest.mark.parametrize('path, expected', [
+    ('profile3.default/file1.txt', True),
+    ('profile2/file21.txt', False),
+    ('profile3.default/prefs.js', False),
+    ('profile3.default/file1.pdf', False),
+])
+def test_path_filter_matches_like_walk(path, expected):
+    path_filter = walker.PathFilter(exclude=['profile2', '*.js'], include=['*.txt',
+                                                                          '*.js'])
+
+    assert path_filter.matches(path) == expected
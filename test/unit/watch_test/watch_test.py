@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+
+import errno
+import os
+import pytest
+import sqlite3
+
+from zotler.exceptions import ZotlerError
+from zotler.watch import Inotify, OrphanWatcher, save_orphans
+
+
+@pytest.fixture()
+def watcher(zotfile_library):
+    watcher = OrphanWatcher(zotfile_library['dbase'], zotfile_library['prefs'])
+    watcher.start()
+    yield watcher
+    watcher.stop()
+
+
+def test_watcher_finds_initial_orphans(watcher, zotfile_library):
+    assert watcher.orphans == zotfile_library['orphans']
+
+
+def test_watcher_tracks_created_and_deleted_files(watcher, zotfile_library):
+    dest_dir = zotfile_library['dest_dir']
+    new_file = os.path.join(dest_dir, 'Programming', 'R', 'new.pdf')
+    with open(new_file, 'w') as file:
+        file.write('lorem ipsum')
+    os.remove(zotfile_library['orphans'][0])
+    assert watcher.process_events(timeout=1)
+
+    assert watcher.orphans == sorted(zotfile_library['orphans'][1:] + [new_file])
+
+
+def test_watcher_tracks_directory_trees(watcher, zotfile_library):
+    dest_dir = zotfile_library['dest_dir']
+    os.rename(os.path.join(dest_dir, 'Programming'), os.path.join(dest_dir, 'Moved'))
+    watcher.process_events(timeout=1)
+
+    expected = [os.path.join(dest_dir, 'orphan.txt')]
+    expected += [os.path.join(dest_dir, 'Moved', i)
+                 for i in ('Python/PEP/PEP_20.pdf', 'Python/PEP/PEP_8.pdf',
+                           'Python/isum.pdf', 'R/Packages/lorem.R.html',
+                           'R/orphan.pdf')]
+    assert watcher.orphans == sorted(expected)
+
+
+def test_watcher_refreshes_changed_references(watcher, zotfile_library):
+    assert not watcher.refresh_references()
+
+    connection = sqlite3.connect(zotfile_library['dbase'])
+    connection.execute('INSERT INTO itemAttachments (path) VALUES (?)',
+                       ('attachments:orphan.txt', ))
+    connection.execute('DELETE FROM itemAttachments WHERE path = ?',
+                       ('attachments:Programming/Python/isum.pdf', ))
+    connection.commit()
+    connection.close()
+
+    assert watcher.refresh_references()
+    expected = [i for i in zotfile_library['orphans'] if not i.endswith('orphan.txt')]
+    expected.append(os.path.join(zotfile_library['dest_dir'],
+                                 'Programming', 'Python', 'isum.pdf'))
+    assert watcher.orphans == sorted(expected)
+
+
+def test_watcher_counts_absolute_paths_as_references(watcher, zotfile_library):
+    connection = sqlite3.connect(zotfile_library['dbase'])
+    connection.execute('INSERT INTO itemAttachments (path) VALUES (?)',
+                       (zotfile_library['orphans'][0], ))
+    connection.commit()
+    connection.close()
+
+    assert watcher.refresh_references()
+    assert watcher.orphans == zotfile_library['orphans'][1:]
+
+
+def test_watcher_skips_directories_it_cannot_watch(mocker, zotfile_library):
+    mocker.patch.object(Inotify, 'add_watch',
+                        side_effect=OSError(errno.EACCES, 'Permission denied'))
+    watcher = OrphanWatcher(zotfile_library['dbase'], zotfile_library['prefs'])
+    watcher.start()
+    watcher.stop()
+
+    assert watcher.orphans == zotfile_library['orphans']
+
+
+def test_watcher_reports_watch_limit(mocker, zotfile_library):
+    mocker.patch.object(Inotify, 'add_watch',
+                        side_effect=OSError(errno.ENOSPC, 'No space left on device'))
+    watcher = OrphanWatcher(zotfile_library['dbase'], zotfile_library['prefs'])
+    with pytest.raises(ZotlerError, match='fs.inotify.max_user_watches'):
+        watcher.start()
+    watcher.stop()
+
+
+def test_save_orphans(tmpdir):
+    path = str(tmpdir.join('orphans.txt'))
+    save_orphans(['/lorem/a.pdf', '/lorem/b.pdf'], path)
+
+    assert tmpdir.join('orphans.txt').read() == '/lorem/a.pdf\n/lorem/b.pdf\n'
+    assert tmpdir.listdir() == [tmpdir.join('orphans.txt')]
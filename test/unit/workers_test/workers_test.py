@@ -0,0 +1,21 @@
+#!/usr/bin/env python3
+
+import os
+import pytest
+
+pytest.importorskip('PyQt5.QtCore')
+workers = pytest.importorskip('zotler.gui.workers')
+
+
+def test_delete_orphans_worker_reports_skipped_files(tmpdir, zotfile_library):
+    orphans = zotfile_library['orphans']
+    list_file = tmpdir.join('orphans.txt')
+    list_file.write(''.join(f'{i}\n' for i in orphans + ['/lorem/ipsum.pdf']))
+    worker = workers.DeleteOrphansWorker(str(list_file), zotfile_library['prefs'],
+                                         zotfile_library['dbase'])
+    report = worker.work()
+
+    assert (report.removed, report.skipped, report.failed) == (len(orphans), 1, 0)
+    assert report.messages == ['Skipping /lorem/ipsum.pdf: outside ZotFile Custom '
+                               'Location.']
+    assert not any(os.path.exists(i) for i in orphans)
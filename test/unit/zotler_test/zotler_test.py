@@ -3,8 +3,10 @@
 from pathlib import Path
 import pytest
 import os
+import sqlite3
 
-from zotler import zotler
+from zotler import deletion, output, zotler
+from zotler.exceptions import InvalidModeError
 
 
 def test_print_version_prints_version_and_exits(mocker, ctx):
@@ -25,22 +27,20 @@ def test_print_version_returns_none_if_value_is_sent(mocker, ctx):
     mocked_exit.assert_not_called()
 
 
-def test_delete_files_calls_remove_files(mocker, ctx):
-    mocked_exit = mocker.patch.object(ctx, 'exit')
-    mocked_remove_files = mocker.patch.object(zotler, 'remove_files')
-    zotler.delete_files(ctx, None, 'lorem')
-
-    mocked_remove_files.assert_called_once_with('lorem')
-    mocked_exit.assert_called_once_with()
-
+def test_delete_files_removes_only_unreferenced_files(tmpdir, zotfile_library,
+                                                    relative_paths, capsys):
+    referenced = os.path.normpath(os.path.join(zotfile_library['dest_dir'],
+                                               relative_paths[1]))
+    list_file = tmpdir.join('orphans.txt')
+    list_file.write('\n'.join(zotfile_library['orphans'] + [referenced]))
+    with open(str(list_file)) as file:
+        summary = zotler.delete_files(file, zotfile_library['prefs'],
+                                      zotfile_library['dbase'], jobs=1)
 
-def test_delete_files_returns_none_if_value_iscalls_remove_files(mocker, ctx):
-    mocked_exit = mocker.patch.object(ctx, 'exit')
-    mocked_remove_files = mocker.patch.object(zotler, 'remove_files')
-
-    assert zotler.delete_files(ctx, None, None) is None
-    mocked_remove_files.assert_not_called()
-    mocked_exit.assert_not_called()
+    assert summary == deletion.DeletionSummary(3, 0, 0)
+    assert os.path.exists(referenced)
+    assert f'Skipping {referenced}: referenced in Zotero database.' in \
+        capsys.readouterr().out
 
 
 @pytest.mark.parametrize('system, expected', [
@@ -81,15 +81,112 @@ def test_get_base_path_returns_proper_value(prefs_path):
     assert zotler.get_base_path(prefs_path) == '/home/user/lorem/ipsum/Zotero'
 
 
+def test_get_preference_returns_none_if_missing(prefs_path):
+    assert zotler.get_preference(prefs_path, 'extensions.zotfile.lorem') is None
+
+
+def test_get_database_path_uses_data_dir(prefs_path):
+    assert zotler.get_database_path(prefs_path) == '/home/user/Zotero/zotero.sqlite'
+
+
+def test_get_database_path_defaults_to_home_dir(tmpdir):
+    prefs_file = tmpdir.join('prefs.js')
+    prefs_file.write('user_pref("extensions.zotfile.dest_dir", "/lorem");\n')
+
+    assert (zotler.get_database_path(str(prefs_file), '/home/ipsum')
+            == '/home/ipsum/Zotero/zotero.sqlite')
+
+
+@pytest.fixture()
+def storage_library(tmpdir):
+    data_dir = tmpdir.mkdir('Zotero')
+    prefs_file = tmpdir.join('prefs.js')
+    prefs_file.write(f'user_pref("extensions.zotero.dataDir", "{data_dir}");\n')
+    connection = sqlite3.connect(str(data_dir.join('zotero.sqlite')))
+    connection.execute('CREATE TABLE items (itemID INTEGER PRIMARY KEY, key TEXT)')
+    connection.execute('CREATE TABLE itemAttachments '
+                       '(itemID INTEGER PRIMARY KEY, path TEXT)')
+    connection.executemany('INSERT INTO items VALUES (?, ?)',
+                           [(1, 'ABCD2345'), (2, 'EFGH6789'), (3, 'JKLM2345')])
+    connection.executemany('INSERT INTO itemAttachments VALUES (?, ?)',
+                           [(1, 'storage:lorem.pdf'), (2, None)])
+    connection.commit()
+    connection.close()
+    for key in ('ABCD2345', 'EFGH6789', 'JKLM2345', 'NPQR6789'):
+        data_dir.join('storage', key, 'ipsum.pdf').write('lorem ipsum', ensure=True)
+    data_dir.join('storage', 'lorem.txt').write('lorem ipsum')
+    data_dir.mkdir('storage', 'lorem')
+    return str(prefs_file), str(data_dir)
+
+
+def test_get_data_dir_defaults_to_home_dir(tmpdir):
+    prefs_file = tmpdir.join('prefs.js')
+    prefs_file.write('user_pref("extensions.zotfile.dest_dir", "/lorem");\n')
+
+    assert zotler.get_data_dir(str(prefs_file), '/home/ipsum') == '/home/ipsum/Zotero'
+
+
+def test_find_orphan_storage_directories(storage_library):
+    prefs_file, data_dir = storage_library
+    orphans = zotler.find_orphan_storage_directories(
+        os.path.join(data_dir, 'zotero.sqlite'), prefs_file)
+
+    assert orphans == [os.path.join(data_dir, 'storage', 'JKLM2345'),
+                       os.path.join(data_dir, 'storage', 'NPQR6789')]
+
+
+def test_remove_directories(storage_library):
+    _, data_dir = storage_library
+    directories = [os.path.join(data_dir, 'storage', 'NPQR6789'),
+                   os.path.join(data_dir, 'storage', 'STUV2345')]
+    summary = zotler.remove_directories(directories)
+
+    assert summary == (1, 1, 0)
+    assert not os.path.exists(directories[0])
+
+
 def test_get_relative_paths_parses_correct_values(mocker, sql_result,
                                                   relative_paths):
-    mocked_sql = mocker.patch.object(zotler, 'sqlite3')
-    mocked_sql.connect().cursor().fetchall.return_value = sql_result
+    mocked_connect = mocker.patch('sqlite3.connect')
+    mocked_connect().cursor().fetchmany.side_effect = [sql_result, ()]
     found_paths = list(zotler.get_relative_paths(''))
 
     assert sorted(found_paths) == sorted(relative_paths)
 
 
+def test_get_relative_paths_reads_database_in_batches(mocker, sql_result,
+                                                      relative_paths):
+    mocker.patch.object(zotler, 'FETCH_SIZE', 2)
+    mocked_connect = mocker.patch('sqlite3.connect')
+    mocked_fetchmany = mocked_connect().cursor().fetchmany
+    mocked_fetchmany.side_effect = [sql_result[:2], sql_result[2:], ()]
+    found_paths = list(zotler.get_relative_paths(''))
+
+    assert found_paths == relative_paths
+    mocked_fetchmany.assert_called_with(2)
+
+
+def test_connect_to_database_opens_read_only_connection(zotero_dbase):
+    connection = zotler.connect_to_database(zotero_dbase)
+
+    with pytest.raises(sqlite3.OperationalError):
+        connection.execute('DELETE FROM itemAttachments')
+
+
+@pytest.mark.parametrize('immutable, snapshot', [
+    (False, False),
+    (True, False),
+    (False, True),
+    (True, True),
+])
+def test_get_relative_paths_reads_real_database(immutable, snapshot, zotero_dbase,
+                                                relative_paths):
+    found_paths = list(zotler.get_relative_paths(zotero_dbase, immutable=immutable,
+                                                 snapshot=snapshot))
+
+    assert sorted(found_paths) == sorted(relative_paths)
+
+
 def test_get_absolute_paths(relative_paths, absolute_paths):
     abs_paths = list(zotler.get_absolute_paths('lorem', relative_paths))
 
@@ -104,10 +201,143 @@ def test_get_pahs_to_existing_files(profiles_dir, expected_relative_paths):
     assert sorted(existing_paths) == sorted(expected_paths)
 
 
-def test_remove_files_removes_stripped_files(mocker, paths_to_files):
+def test_create_set_of_orphans(zotfile_library):
+    orphans = zotler.create_set_of_orphans(zotfile_library['dbase'],
+                                           zotfile_library['prefs'])
+
+    assert sorted(orphans) == zotfile_library['orphans']
+
+
+@pytest.mark.parametrize('engine', zotler.ENGINES)
+def test_find_orphans_engines_agree(engine, zotfile_library):
+    orphans = zotler.find_orphans(zotfile_library['dbase'], zotfile_library['prefs'],
+                                  engine=engine)
+
+    assert sorted(orphans) == zotfile_library['orphans']
+
+
+def test_find_orphans_raises_error_for_unknown_engine(zotfile_library):
+    with pytest.raises(InvalidModeError):
+        list(zotler.find_orphans(zotfile_library['dbase'], zotfile_library['prefs'],
+                                 engine='lorem'))
+
+
+def test_get_attachment_records_skips_other_attachments(zotfile_library):
+    connection = sqlite3.connect(zotfile_library['dbase'])
+    connection.execute('INSERT INTO itemAttachments (path) VALUES (?)',
+                       ('storage:lorem.pdf', ))
+    connection.commit()
+    connection.close()
+    records = list(zotler.get_attachment_records(zotfile_library['dbase']))
+
+    assert len(records) == 4
+    assert records[0] == (1, 'KEY00001', 'Programming/R/Packages/lorem.pdf')
+
+
+@pytest.mark.parametrize('engine', zotler.ENGINES)
+def test_find_orphans_skips_other_attachments(engine, zotfile_library):
+    connection = sqlite3.connect(zotfile_library['dbase'])
+    connection.execute('INSERT INTO itemAttachments (path) VALUES (?)',
+                       ('storage:lorem.pdf', ))
+    connection.commit()
+    connection.close()
+    orphans = zotler.find_orphans(zotfile_library['dbase'], zotfile_library['prefs'],
+                                  engine=engine)
+
+    assert sorted(orphans) == zotfile_library['orphans']
+
+
+@pytest.mark.parametrize('path, expected', [
+    ('attachments:lorem/ipsum.pdf', 'lorem/ipsum.pdf'),
+    ('/lorem/ipsum/dolor.pdf', os.path.join('ipsum', 'dolor.pdf')),
+    ('/dolor/ipsum.pdf', None),
+    ('storage:ipsum.pdf', None),
+])
+def test_get_relative_attachment_path(path, expected):
+    assert zotler.get_relative_attachment_path(path, '/lorem') == expected
+
+
+def test_find_orphans_counts_absolute_paths_as_references(zotfile_library):
+    referenced = zotfile_library['orphans'][:2]
+    connection = sqlite3.connect(zotfile_library['dbase'])
+    connection.executemany('INSERT INTO itemAttachments (path) VALUES (?)',
+                           [(i, ) for i in referenced + ['/lorem/ipsum.pdf']])
+    connection.commit()
+    connection.close()
+
+    for engine in zotler.ENGINES:
+        orphans = zotler.find_orphans(zotfile_library['dbase'], zotfile_library['prefs'],
+                                      engine=engine)
+        assert sorted(orphans) == zotfile_library['orphans'][2:]
+    orphans, missing = zotler.find_orphans_and_missing_files(
+        zotfile_library['dbase'], zotfile_library['prefs'])
+    assert sorted(orphans) == zotfile_library['orphans'][2:]
+    assert len(missing) == 1
+
+
+def test_find_orphans_and_missing_files(zotfile_library):
+    orphans, missing = zotler.find_orphans_and_missing_files(zotfile_library['dbase'],
+                                                             zotfile_library['prefs'])
+    expected_path = os.path.join(zotfile_library['dest_dir'],
+                                 'Programming', 'R', 'Packages', 'lorem.pdf')
+
+    assert sorted(orphans) == zotfile_library['orphans']
+    assert missing == [(1, 'KEY00001', expected_path)]
+
+
+def test_find_orphans_and_missing_files_skips_filtered_paths(zotfile_library):
+    from zotler.walker import PathFilter
+
+    path_filter = PathFilter(exclude=['lorem.R.html', 'Python'])
+    orphans, missing = zotler.find_orphans_and_missing_files(
+        zotfile_library['dbase'], zotfile_library['prefs'], path_filter=path_filter)
+
+    assert sorted(orphans) == [i for i in zotfile_library['orphans'] if 'Python' not in i]
+    assert [i.key for i in missing] == ['KEY00001']
+
+
+@pytest.mark.parametrize('normalization, orphan_found', [('none', True), ('nfc', False)])
+def test_find_orphans_with_normalization(zotfile_library, normalization, orphan_found):
+    nfd_path = os.path.join(zotfile_library['dest_dir'], 'Cafe\u0301.pdf')
+    with open(nfd_path, 'w') as nfd_file:
+        nfd_file.write('lorem ipsum')
+    connection = sqlite3.connect(zotfile_library['dbase'])
+    connection.execute('INSERT INTO itemAttachments (path) VALUES (?)',
+                       ('attachments:Caf\u00e9.pdf', ))
+    connection.commit()
+    connection.close()
+
+    for engine in zotler.ENGINES:
+        orphans = zotler.find_orphans(zotfile_library['dbase'], zotfile_library['prefs'],
+                                      engine=engine, normalization=normalization)
+        assert (nfd_path in set(orphans)) == orphan_found
+    _, missing = zotler.find_orphans_and_missing_files(
+        zotfile_library['dbase'], zotfile_library['prefs'], normalization=normalization)
+    assert len(missing) == (2 if orphan_found else 1)
+
+
+@pytest.mark.parametrize('use_dir_fd', [True, False])
+def test_remove_files_removes_stripped_files(mocker, paths_to_files, use_dir_fd):
+    mocker.patch.object(deletion, 'USE_DIR_FD', use_dir_fd)
+    mocked_unlink = mocker.patch('os.unlink')
     mocked_remove = mocker.patch('os.remove')
     zotler.remove_files(paths_to_files)
 
-    mocked_remove.assert_any_call('lorem.txt')
-    mocked_remove.assert_any_call('ipsum.txt')
-    mocked_remove.assert_any_call('dolor.txt')
+    if use_dir_fd:
+        mocked_unlink.assert_any_call('lorem.txt', dir_fd=mocker.ANY)
+        mocked_unlink.assert_any_call('ipsum.txt', dir_fd=mocker.ANY)
+        mocked_unlink.assert_any_call('dolor.txt', dir_fd=mocker.ANY)
+    else:
+        mocked_remove.assert_any_call('lorem.txt')
+        mocked_remove.assert_any_call('ipsum.txt')
+        mocked_remove.assert_any_call('dolor.txt')
+
+
+def test_remove_files_prints_summary(capsys, zotfile_library):
+    summary = zotler.remove_files(zotfile_library['orphans'] + ['/lorem/ipsum.pdf'],
+                                  jobs=2, verbose=False)
+    output = capsys.readouterr().out
+
+    assert summary == (3, 1, 0)
+    assert output == '3 files removed, 1 not found, 0 failed.\n'
+    assert not any(os.path.exists(i) for i in zotfile_library['orphans'])
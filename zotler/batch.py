@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import os
+
+from zotler import zotler
+
+LibraryReport = namedtuple('LibraryReport',
+                           ['prefs', 'dbase', 'orphans', 'output_file', 'error'])
+
+
+def read_manifest(manifest_file):
+    for line in manifest_file:
+        line = line.strip()
+        if line == '' or line.startswith('#'):
+            continue
+        prefs, _, dbase = line.partition('\t')
+        prefs = prefs.strip()
+        dbase = dbase.strip()
+        if dbase == '':
+            dbase = zotler.get_database_path(prefs)
+        yield prefs, dbase
+
+
+def discover_libraries(home_dirs):
+    for home_dir in home_dirs:
+        profiles_dir = zotler.system_specific_path_to_profiles(home_dir)
+        if not os.path.isdir(profiles_dir):
+            continue
+        for item in sorted(os.listdir(profiles_dir)):
+            prefs = os.path.join(profiles_dir, item, 'prefs.js')
+            if item.endswith('default') and os.path.isfile(prefs):
+                yield prefs, zotler.get_database_path(prefs, home_dir)
+
+
+def get_output_file_name(index, prefs):
+    profile = os.path.basename(os.path.dirname(os.path.abspath(prefs)))
+    return f'{index:04d}-{profile}.txt'
+
+
+def scan_library(index, prefs, dbase, report_dir=None, **options):
+    output_file = None
+    try:
+        orphans = zotler.find_orphans(dbase, prefs, **options)
+        if report_dir is None:
+            count = sum(1 for _ in orphans)
+        else:
+            output_file = os.path.join(report_dir, get_output_file_name(index, prefs))
+            count = 0
+            with open(output_file, 'w') as report_file:
+                for count, orphan in enumerate(orphans, 1):
+                    print(orphan, file=report_file)
+    except Exception as error:
+        return LibraryReport(prefs, dbase, None, output_file, str(error))
+    return LibraryReport(prefs, dbase, count, output_file, None)
+
+
+def run_batch(libraries, jobs=None, report_dir=None, **options):
+    if report_dir is not None:
+        os.makedirs(report_dir, exist_ok=True)
+
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        futures = [executor.submit(scan_library, index, prefs, dbase,
+                                   report_dir=report_dir, **options)
+                   for index, (prefs, dbase) in enumerate(libraries, 1)]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def format_report(report):
+    if report.error is not None:
+        return f'{report.prefs}\t{report.dbase}\tERROR: {report.error}'
+    line = f'{report.prefs}\t{report.dbase}\t{report.orphans} orphan files'
+    if report.output_file is not None:
+        line += f'\t{report.output_file}'
+    return line
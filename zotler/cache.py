@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+
+from collections import OrderedDict
+import os
+from pathlib import Path
+import pickle
+import tempfile
+import threading
+import time
+
+from zotler import walker
+
+CACHE_VERSION = 1
+DEFAULT_MAX_ENTRIES = 1000000
+# Listings of directories modified less than this many seconds ago aren't
+# cached, a file added within the same mtime tick would be missed otherwise.
+RACY_INTERVAL = 2
+
+
+def default_cache_path():
+    cache_home = os.environ.get('XDG_CACHE_HOME',
+                                os.path.join(str(Path.home()), '.cache'))
+    return os.path.join(cache_home, 'zotler', 'directories.pickle')
+
+
+class DirectoryCache:
+    def __init__(self, path=None, max_entries=DEFAULT_MAX_ENTRIES, rebuild=False):
+        self.path = default_cache_path() if path is None else path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict() if rebuild else self._load()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def scan(self, directory):
+        key = os.fspath(directory)
+        try:
+            mtime = os.stat(key).st_mtime_ns
+        except OSError:
+            return walker.scan_directory(key)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == mtime:
+                self._entries.move_to_end(key)
+                return entry[1], entry[2]
+
+        files, subdirs = walker.scan_directory(key)
+        if time.time() - mtime / 1e9 > RACY_INTERVAL:
+            with self._lock:
+                self._entries[key] = (mtime, files, subdirs)
+                self._entries.move_to_end(key)
+        return files, subdirs
+
+    def save(self):
+        with self._lock:
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            data = {'version': CACHE_VERSION, 'entries': self._entries}
+
+            cache_dir = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(cache_dir, exist_ok=True)
+            file_descriptor, temp_path = tempfile.mkstemp(dir=cache_dir,
+                                                          prefix='.zotler-')
+            try:
+                with os.fdopen(file_descriptor, 'wb') as cache_file:
+                    pickle.dump(data, cache_file, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(temp_path, self.path)
+            except BaseException:
+                os.remove(temp_path)
+                raise
+
+    def _load(self):
+        try:
+            with open(self.path, 'rb') as cache_file:
+                data = pickle.load(cache_file)
+        except (OSError, EOFError, pickle.UnpicklingError,
+                AttributeError, ImportError, IndexError):
+            return OrderedDict()
+
+        if not isinstance(data, dict) or data.get('version') != CACHE_VERSION:
+            return OrderedDict()
+        return data['entries']
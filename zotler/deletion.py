@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+
+from collections import deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+import os
+
+DEFAULT_JOBS = 8
+BATCH_SIZE = 1000
+
+BatchResult = namedtuple('BatchResult', ['directory', 'removed', 'missing', 'failed'])
+DeletionSummary = namedtuple('DeletionSummary', ['removed', 'missing', 'failed'])
+
+USE_DIR_FD = os.unlink in os.supports_dir_fd and hasattr(os, 'O_DIRECTORY')
+
+
+def group_by_directory(filepaths, strip=True):
+    groups = {}
+    for file in filepaths:
+        path = file.strip() if strip else file
+        if path == '':
+            continue
+        directory, name = os.path.split(path)
+        groups.setdefault(directory, []).append(name)
+    return groups
+
+
+def split_into_batches(groups, batch_size=BATCH_SIZE):
+    for directory, names in groups.items():
+        for i in range(0, len(names), batch_size):
+            yield directory, names[i:i + batch_size]
+
+
+def unlink_batch(directory, names):
+    if not USE_DIR_FD:
+        return _remove_batch(directory, names)
+
+    try:
+        dir_fd = os.open(directory or os.curdir, os.O_RDONLY | os.O_DIRECTORY)
+    except FileNotFoundError:
+        return BatchResult(directory, [], list(names), [])
+    except OSError as error:
+        return BatchResult(directory, [], [], [(name, error) for name in names])
+
+    removed, missing, failed = [], [], []
+    try:
+        for name in names:
+            try:
+                os.unlink(name, dir_fd=dir_fd)
+            except FileNotFoundError:
+                missing.append(name)
+            except OSError as error:
+                failed.append((name, error))
+            else:
+                removed.append(name)
+    finally:
+        os.close(dir_fd)
+    return BatchResult(directory, removed, missing, failed)
+
+
+def _remove_batch(directory, names):
+    removed, missing, failed = [], [], []
+    for name in names:
+        try:
+            os.remove(os.path.join(directory, name))
+        except FileNotFoundError:
+            missing.append(name)
+        except OSError as error:
+            failed.append((name, error))
+        else:
+            removed.append(name)
+    return BatchResult(directory, removed, missing, failed)
+
+
+def remove_files_in_batches(filepaths, jobs=DEFAULT_JOBS, batch_size=BATCH_SIZE,
+                            strip=True):
+    batches = split_into_batches(group_by_directory(filepaths, strip), batch_size)
+    if jobs <= 1:
+        for directory, names in batches:
+            yield unlink_batch(directory, names)
+    else:
+        yield from _remove_in_parallel(batches, jobs)
+
+
+def _remove_in_parallel(batches, jobs):
+    # Only a few batches are queued ahead, so closing the generator stops
+    # the deletion quickly.
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        running = deque()
+        try:
+            for directory, names in batches:
+                running.append(executor.submit(unlink_batch, directory, names))
+                if len(running) >= 2 * jobs:
+                    yield running.popleft().result()
+            while running:
+                yield running.popleft().result()
+        finally:
+            for future in running:
+                future.cancel()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import mmap
+import os
+import stat
+
+from zotler import zotler
+from zotler.path_index import PathIndex
+
+BLOCK_SIZE = 64 * 1024
+DEFAULT_JOBS = 4
+
+DuplicateGroup = namedtuple('DuplicateGroup', ['size', 'digest', 'paths'])
+
+
+def stat_files(directory, names):
+    # Symlinks aren't followed, only regular files are compared.
+    sizes = []
+    for name in names:
+        path = os.path.normpath(os.path.join(directory, name))
+        try:
+            file_stat = os.lstat(path)
+        except OSError:
+            continue
+        if stat.S_ISREG(file_stat.st_mode):
+            sizes.append((path, file_stat.st_size))
+    return sizes
+
+
+def hash_ends(path, size):
+    digest = hashlib.blake2b()
+    with open(path, 'rb') as file:
+        digest.update(file.read(BLOCK_SIZE))
+        if size > BLOCK_SIZE:
+            file.seek(max(BLOCK_SIZE, size - BLOCK_SIZE))
+            digest.update(file.read(BLOCK_SIZE))
+    return digest.hexdigest()
+
+
+def hash_file(path):
+    digest = hashlib.blake2b()
+    with open(path, 'rb') as file:
+        # mmap can't map an empty file, the file could be truncated meanwhile.
+        if os.fstat(file.fileno()).st_size == 0:
+            return digest.hexdigest()
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped_file:
+            digest.update(mapped_file)
+    return digest.hexdigest()
+
+
+def group_by(executor, function, groups):
+    # Splits every group of candidates by the value of function(path, key).
+    futures = [(key, path, executor.submit(function, path, key))
+               for key, paths in groups.items()
+               for path in paths]
+    new_groups = {}
+    for key, path, future in futures:
+        try:
+            value = future.result()
+        except OSError:
+            continue
+        new_groups.setdefault((key, value), []).append(path)
+    return {key: paths for key, paths in new_groups.items() if len(paths) > 1}
+
+
+def find_duplicates(sizes, jobs=DEFAULT_JOBS):
+    by_size = {}
+    for path, size in sizes:
+        if size > 0:
+            by_size.setdefault(size, []).append(path)
+    candidates = {size: paths for size, paths in by_size.items() if len(paths) > 1}
+
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        candidates = group_by(executor, hash_ends, candidates)
+        for (size, digest), paths in candidates.items():
+            # Ends of small files cover their whole content.
+            if size <= 2 * BLOCK_SIZE:
+                yield DuplicateGroup(size, digest, sorted(paths))
+
+        large_files = {key: paths for key, paths in candidates.items()
+                       if key[0] > 2 * BLOCK_SIZE}
+        full_hashes = group_by(executor, lambda path, _: hash_file(path), large_files)
+        for ((size, _), digest), paths in full_hashes.items():
+            yield DuplicateGroup(size, digest, sorted(paths))
+
+
+def find_duplicate_attachments(zotero_dbase, zotero_prefs, jobs=DEFAULT_JOBS,
+                               cache=None, immutable=False, snapshot=False,
+                               path_filter=None):
+    base_path = zotler.get_base_path(zotero_prefs)
+    relative_paths = zotler.get_relative_paths(zotero_dbase, immutable=immutable,
+                                               snapshot=snapshot, base_path=base_path)
+    referenced = PathIndex(zotler.get_absolute_paths(base_path, relative_paths))
+
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        listings = zotler.walk_existing_directories(base_path, jobs=jobs, cache=cache,
+                                                    path_filter=path_filter)
+        sizes = [size
+                 for directory_sizes in executor.map(lambda i: stat_files(*i), listings)
+                 for size in directory_sizes]
+
+    for group in find_duplicates(sizes, jobs=jobs):
+        yield group, [path in referenced for path in group.paths]
+
+
+def format_duplicates(group, referenced):
+    yield f'{group.size} bytes, {len(group.paths)} copies:'
+    for path, is_referenced in zip(group.paths, referenced):
+        yield f'    {"referenced" if is_referenced else "orphan":<10}  {path}'
@@ -7,3 +7,7 @@ class ZotlerError(Exception):
 
 class InvalidModeError(ZotlerError):
     pass
+
+
+class CancelledError(ZotlerError):
+    pass
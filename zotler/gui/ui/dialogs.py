@@ -1,8 +1,12 @@
 #!/usr/bin/env python3
 
-from PyQt5.QtWidgets import QMessageBox, QTextEdit, QHBoxLayout, QVBoxLayout, QDialog, QLabel, QPushButton
+from PyQt5.QtWidgets import QMessageBox, QHBoxLayout, QVBoxLayout, QDialog, QLabel, \
+    QLineEdit, QListView, QPushButton
 from PyQt5.QtCore import Qt
 
+from zotler.gui.ui.custom_widgets import LabeledComboBox
+from zotler.gui.ui.models import SORT_ORDERS, OrphanListModel
+
 
 class AboutDialog(QMessageBox):
     def __init__(self, parent, icon=QMessageBox.Information, title='',
@@ -20,30 +24,60 @@ class AboutDialog(QMessageBox):
         self.setStandardButtons(QMessageBox.Ok)
 
 
-class ShowStdinDialog(QDialog):
+class ReviewOrphansDialog(QDialog):
     def __init__(self, parent, file_path):
         super().__init__(parent)
 
-        self._file_path = file_path
+        self.model = OrphanListModel(file_path, parent=self)
         self.layout = QVBoxLayout()
 
         self.label = QLabel('Delete these files?')
-        self.text_box = QTextEdit()
+        self.count_label = QLabel()
+
+        self.tools_layout = QHBoxLayout()
+        self.filter_text = QLineEdit()
+        self.sort_order = LabeledComboBox(values=SORT_ORDERS, label='Sort by:')
+        self.check_button = QPushButton('Check shown')
+        self.uncheck_button = QPushButton('Uncheck shown')
+
+        self.list_view = QListView()
 
         self.buttons_layout = QHBoxLayout()
         self.ok_button = QPushButton('Save and delete')
         self.cancel_button = QPushButton('Save and don\'t delete')
 
-        self. show_ui()
+        self.show_ui()
 
     def show_ui(self):
         self.cancel_button.clicked.connect(self.cancel_pushed)
         self.ok_button.clicked.connect(self.ok_pushed)
+        self.filter_text.textChanged.connect(self.model.set_filter)
+        self.sort_order.input_widget.currentTextChanged.connect(
+            self.model.set_sort_order)
+        self.check_button.clicked.connect(lambda: self.model.set_shown_checked(True))
+        self.uncheck_button.clicked.connect(
+            lambda: self.model.set_shown_checked(False))
+        self.model.counts_changed.connect(self.update_count)
+        self.model.modelReset.connect(self.update_count)
+        self.finished.connect(self.model.close)
 
         self.setModal(True)
+        self.resize(800, 500)
+
+        self.filter_text.setPlaceholderText('Filter paths')
+        self.tools_layout.addWidget(self.filter_text, 2)
+        self.tools_layout.addWidget(self.sort_order, 0)
+        self.tools_layout.addWidget(self.check_button, 0)
+        self.tools_layout.addWidget(self.uncheck_button, 0)
+
+        # Rows of the same height let the view lay out only the visible ones.
+        self.list_view.setUniformItemSizes(True)
+        self.list_view.setModel(self.model)
 
         self.layout.addWidget(self.label)
-        self.layout.addWidget(self.text_box)
+        self.layout.addLayout(self.tools_layout)
+        self.layout.addWidget(self.list_view)
+        self.layout.addWidget(self.count_label)
 
         self.buttons_layout.addStretch(2)
         self.buttons_layout.addWidget(self.cancel_button, 0, Qt.AlignBottom)
@@ -51,9 +85,13 @@ class ShowStdinDialog(QDialog):
         self.layout.addLayout(self.buttons_layout)
 
         self.setLayout(self.layout)
+        self.update_count()
 
-        with open(self._file_path) as file:
-            self.text_box.setText(file.read())
+    def update_count(self):
+        more = '' if self.model.is_complete else '+'
+        sizes = ', reading sizes...' if self.model.reading_sizes else ''
+        self.count_label.setText(f'{self.model.checked} of {self.model.loaded}{more} '
+                                 f'files checked, {self.model.rowCount()} shown{sizes}')
 
     def cancel_pushed(self):
         self.save_file()
@@ -64,5 +102,4 @@ class ShowStdinDialog(QDialog):
         self.accept()
 
     def save_file(self):
-        with open(self._file_path, 'w') as file:
-            file.write(self.text_box.toPlainText())
+        self.model.save()
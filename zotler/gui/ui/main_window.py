@@ -2,17 +2,18 @@
 
 import os
 from pathlib import Path
-import tempfile
 
-from PyQt5.QtCore import Qt, QCoreApplication
+from PyQt5.QtCore import Qt, QCoreApplication, QThread
 from PyQt5.QtGui import QFont, QPixmap, QIcon
 from PyQt5.QtWidgets import QLabel, QMainWindow, QPushButton, QWidget, \
-    QHBoxLayout, QVBoxLayout, QStackedWidget, QMessageBox
+    QHBoxLayout, QVBoxLayout, QStackedWidget, QMessageBox, QProgressDialog
 
 from zotler import __author__, __name__, __version__, zotler
 from zotler.gui.ui.custom_widgets import LabeledComboBox
-from zotler.gui.ui.variable_areas import DeleteOrphans, FindOrphans
-from zotler.gui.ui.dialogs import AboutDialog, ShowStdinDialog
+from zotler.gui.ui.variable_areas import DeleteOrphans, FindOrphans, ManageQuarantine
+from zotler.gui.ui.dialogs import AboutDialog, ReviewOrphansDialog
+from zotler.gui.workers import DeleteOrphansWorker, FindOrphansWorker, \
+    PurgeQuarantineWorker, QuarantineOrphansWorker, UndoQuarantineWorker
 from zotler.exceptions import InvalidModeError
 
 
@@ -29,23 +30,30 @@ class MainWindow(QMainWindow):
         self.icon = QPixmap(self.path_to_icon)
         self.title = f'{__name__.title()} v{__version__}'
 
-        path_to_license = os.path.join(os.path.dirname(__file__),
-                                       '..', '..', '..', 'LICENSE.md')
-        with open(path_to_license) as license_file:
-            license_text = '\n'.join(license_file.readlines())
-
-        self.about_dialog = AboutDialog(self,
-                                        icon=self.icon,
-                                        title=self.title,
-                                        name=self.title,
-                                        copyright_text=f'(c)2018 by {__author__}',
-                                        license_text=license_text
-                                        )
+        self._about_dialog = None
 
         self.main_widget = MainWidget(parent=self)
 
         self.init_ui()
 
+    @property
+    def about_dialog(self):
+        # The license is read and the dialog built when it's opened first time.
+        if self._about_dialog is None:
+            path_to_license = os.path.join(os.path.dirname(__file__),
+                                           '..', '..', '..', 'LICENSE.md')
+            with open(path_to_license) as license_file:
+                license_text = '\n'.join(license_file.readlines())
+
+            self._about_dialog = AboutDialog(self,
+                                             icon=self.icon,
+                                             title=self.title,
+                                             name=self.title,
+                                             copyright_text=f'(c)2018 by {__author__}',
+                                             license_text=license_text
+                                             )
+        return self._about_dialog
+
     def init_ui(self):
         self.setWindowIcon(QIcon(self.path_to_icon))
         self.setWindowTitle(self.title)
@@ -72,7 +80,8 @@ class MainWidget(QWidget):
         self.author_name = QLabel(f'(c)2018 by {__author__}')
 
         self.choose_mode = LabeledComboBox(values=('Find and delete orphan files',
-                                                   'Delete orphan files'),
+                                                   'Delete orphan files',
+                                                   'Manage quarantine'),
                                            label='Choose mode:',
                                            vertical=True)
         self.load_defaults_button = QPushButton('Fill in default values')
@@ -81,9 +90,11 @@ class MainWidget(QWidget):
         self.specific_area_stack = QStackedWidget(self)
         self.find_orphans = FindOrphans()
         self.delete_orphans = DeleteOrphans()
+        self.manage_quarantine = ManageQuarantine()
         self.variable_area_widgets = (
             self.find_orphans,
             self.delete_orphans,
+            self.manage_quarantine,
         )
 
         self.buttons_layout = QHBoxLayout()
@@ -91,6 +102,10 @@ class MainWidget(QWidget):
         self.cancel_button = QPushButton('Cancel')
         self.ok_button = QPushButton('OK')
 
+        self.worker = None
+        self.worker_thread = None
+        self.progress_dialog = None
+
         self.init_ui()
 
     def init_ui(self):
@@ -157,18 +172,18 @@ class MainWidget(QWidget):
         self.change_defaults_button_status(index)
 
     def change_defaults_button_status(self, index):
-        if index == 1:
+        if index == 2:
             self.load_defaults_button.setEnabled(False)
         else:
             self.load_defaults_button.setEnabled(True)
 
     def fill_in_default_values(self):
         path_to_prefs_file = zotler.get_prefs_file(silent=True)
-        self.find_orphans.path_to_prefs_file.text = path_to_prefs_file
-
         zotero_home_dir = os.path.join(str(Path.home()), 'Zotero')
-        self.find_orphans.path_to_database_file.text = os.path.join(zotero_home_dir,
-                                                                    'zotero.sqlite')
+        path_to_database_file = os.path.join(zotero_home_dir, 'zotero.sqlite')
+        for area in (self.find_orphans, self.delete_orphans):
+            area.path_to_prefs_file.text = path_to_prefs_file
+            area.path_to_database_file.text = path_to_database_file
 
     def open_about(self):
         self.parent.about_dialog.show()
@@ -194,35 +209,135 @@ class MainWidget(QWidget):
 
         elif self.choose_mode.text == 'Delete orphan files':
             path_to_orphans_file = self.delete_orphans.path_to_list_of_orphans.text.strip()
+            zotero_prefs = self.delete_orphans.path_to_prefs_file.text
+            zotero_dbase = self.delete_orphans.path_to_database_file.text
 
-            error_message = self.validate_path(path_to_orphans_file)
-            if error_message is None:
+            error_messages = (
+                i
+                for i in (self.validate_path(path_to_orphans_file),
+                          self.validate_path(zotero_prefs),
+                          self.validate_path(zotero_dbase))
+                if i is not None
+            )
+
+            joined_messages = '\n'.join(error_messages)
+            if len(joined_messages) > 0:
+                self.show_error_dialog(joined_messages)
+            else:
                 self.delete_orphans_action(path_to_orphans_file)
+
+        elif self.choose_mode.text == 'Manage quarantine':
+            path_to_run_dir = self.manage_quarantine.path_to_run_dir.text.strip()
+
+            error_message = self.validate_path(path_to_run_dir, is_directory=True)
+            if error_message is None:
+                self.manage_quarantine_action(path_to_run_dir)
             else:
                 self.show_error_dialog(error_message)
         else:
             raise InvalidModeError('Invalid mode\'s been chosen.')
 
     def find_orphans_action(self, zotero_prefs, zotero_dbase, path_to_output_file):
-        orphan_files = zotler.create_set_of_orphans(zotero_dbase, zotero_prefs)
-
-        if path_to_output_file == '':
-            _, path_to_output_file = tempfile.mkstemp(prefix='zotler_gui-')
+        worker = FindOrphansWorker(zotero_prefs, zotero_dbase, path_to_output_file)
+        self.start_worker(worker, 'Searching for orphan files...',
+                          self.delete_orphans_action)
 
-        with open(path_to_output_file, 'w') as output_file:
-            print('\n'.join(orphan_files), file=output_file)
+    def delete_orphans_action(self, path_to_orphans_file):
+        review_dialog = ReviewOrphansDialog(self, file_path=path_to_orphans_file)
+        is_accepted = review_dialog.exec()
+        area = self.specific_area_stack.currentWidget()
+        quarantine_dir = area.path_to_quarantine_dir.text.strip()
+        if not is_accepted:
+            self.quit_action()
+        elif quarantine_dir != '':
+            worker = QuarantineOrphansWorker(path_to_orphans_file,
+                                             area.path_to_prefs_file.text,
+                                             area.path_to_database_file.text,
+                                             quarantine_dir)
+            self.start_worker(worker, 'Moving orphan files to quarantine...',
+                              self.quarantine_finished)
+        else:
+            worker = DeleteOrphansWorker(path_to_orphans_file,
+                                         area.path_to_prefs_file.text,
+                                         area.path_to_database_file.text)
+            self.start_worker(worker, 'Deleting orphan files...',
+                              self.deletion_finished)
+
+    def manage_quarantine_action(self, path_to_run_dir):
+        if self.manage_quarantine.action.text == 'Restore quarantined files':
+            worker = UndoQuarantineWorker(path_to_run_dir)
+            self.start_worker(worker, 'Restoring quarantined files...',
+                              self.manage_quarantine_finished)
+        else:
+            worker = PurgeQuarantineWorker(path_to_run_dir)
+            self.start_worker(worker, 'Deleting quarantined files...',
+                              self.manage_quarantine_finished)
 
-        self.delete_orphans_action(path_to_output_file)
+    def quarantine_finished(self, run_directory):
+        msg = QMessageBox()
+        msg.setIcon(QMessageBox.Information)
+        msg.setWindowTitle('Quarantine')
+        msg.setText(f'Orphan files were moved to {run_directory}.')
+        msg.exec_()
+        self.quit_action()
 
-    def delete_orphans_action(self, path_to_orphans_file):
-        text_dialog = ShowStdinDialog(self, file_path=path_to_orphans_file)
-        is_accepted = text_dialog.exec()
-        if is_accepted:
-            with open(path_to_orphans_file, 'r') as file:
-                zotler.remove_files(file.readlines())
+    def deletion_finished(self, report):
+        msg = QMessageBox()
+        msg.setIcon(QMessageBox.Warning if report.failed else QMessageBox.Information)
+        msg.setWindowTitle('Deletion')
+        msg.setText(f'{report.removed} files removed, {report.skipped} skipped, '
+                    f'{report.failed} failed.')
+        if report.messages:
+            msg.setDetailedText('\n'.join(report.messages))
+        msg.exec_()
+        self.quit_action()
 
+    def manage_quarantine_finished(self, _):
         self.quit_action()
 
+    def start_worker(self, worker, label, finished_action):
+        self.progress_dialog = QProgressDialog(label, 'Cancel', 0, 0, self)
+        self.progress_dialog.setWindowModality(Qt.WindowModal)
+        self.progress_dialog.setMinimumDuration(0)
+        self.progress_dialog.canceled.connect(self.cancel_worker)
+
+        self.worker = worker
+        self.worker_thread = QThread(self)
+        worker.moveToThread(self.worker_thread)
+        self.worker_thread.started.connect(worker.run)
+        self.worker_thread.finished.connect(worker.deleteLater)
+
+        worker.progress.connect(self.show_progress)
+        for signal in (worker.finished, worker.failed, worker.cancelled):
+            signal.connect(self.worker_thread.quit)
+            signal.connect(self.close_progress_dialog)
+        worker.failed.connect(self.worker_failed)
+        worker.finished.connect(finished_action)
+
+        self.setEnabled(False)
+        self.worker_thread.start()
+        self.progress_dialog.show()
+
+    def show_progress(self, phase, count):
+        if self.progress_dialog is not None:
+            label = self.progress_dialog.labelText().split('\n')[0]
+            self.progress_dialog.setLabelText(f'{label}\n{count} {phase}')
+
+    def worker_failed(self, message):
+        self.show_error_dialog(message)
+
+    def cancel_worker(self):
+        if self.worker is not None:
+            self.worker.cancel()
+
+    def close_progress_dialog(self, *_):
+        self.worker = None
+        self.setEnabled(True)
+        if self.progress_dialog is not None:
+            self.progress_dialog.canceled.disconnect(self.cancel_worker)
+            self.progress_dialog.close()
+            self.progress_dialog = None
+
     @staticmethod
     def show_error_dialog(joined_messages):
         msg = QMessageBox()
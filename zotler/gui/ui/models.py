@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+
+from PyQt5.QtCore import Qt, QAbstractListModel, QModelIndex, QThread, pyqtSignal
+
+from zotler import output
+from zotler.gui.workers import ReadSizesWorker
+from zotler.usage import format_size
+
+FETCH_SIZE = 1000
+SORT_ORDERS = ('List order', 'Path', 'Size (largest first)')
+
+
+class OrphanListModel(QAbstractListModel):
+    # Paths are read from the list file only as the view scrolls to them.
+    # Filtering and sorting need the whole list. Sizes are taken from jsonl
+    # and csv lists, otherwise they are read only for sorting, in a worker
+    # thread, and for tool tips. Unchecked paths are kept in a set, so the
+    # check states survive filtering and sorting.
+    counts_changed = pyqtSignal()
+
+    def __init__(self, file_path, parent=None):
+        super().__init__(parent)
+        self.file_path = file_path
+        self._file = open(file_path)
+        # The list is saved in the same format it has been read in.
+        self.list_format = output.detect_format(output.read_first_chunk(self._file))
+        self._file.seek(0)
+        self._reader = self._read_paths(output.read_entries(self._file))
+        self._paths = []
+        self._shown = self._paths
+        self._unchecked = set()
+        self._sizes = {}
+        self._size_worker = None
+        self._size_thread = None
+        self._filter = ''
+        self._sort_order = SORT_ORDERS[0]
+
+    @property
+    def is_complete(self):
+        return self._reader is None
+
+    @property
+    def loaded(self):
+        return len(self._paths)
+
+    @property
+    def checked(self):
+        return len(self._paths) - len(self._unchecked)
+
+    @property
+    def changed(self):
+        return len(self._unchecked) > 0
+
+    @property
+    def reading_sizes(self):
+        return self._size_worker is not None
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._shown)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        path = self._shown[index.row()]
+        if role == Qt.DisplayRole:
+            return path
+        if role == Qt.CheckStateRole:
+            return Qt.Unchecked if path in self._unchecked else Qt.Checked
+        if role == Qt.ToolTipRole:
+            size = self.get_size(path)
+            return 'File not found' if size is None else format_size(size)
+        return None
+
+    def setData(self, index, value, role=Qt.EditRole):
+        if not index.isValid() or role != Qt.CheckStateRole:
+            return False
+        path = self._shown[index.row()]
+        if value == Qt.Checked:
+            self._unchecked.discard(path)
+        else:
+            self._unchecked.add(path)
+        self.dataChanged.emit(index, index, [Qt.CheckStateRole])
+        self.counts_changed.emit()
+        return True
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable | Qt.ItemIsUserCheckable
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and not self.is_complete
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self.is_complete:
+            return
+        paths = []
+        for path in self._reader:
+            paths.append(path)
+            if len(paths) >= FETCH_SIZE:
+                break
+        else:
+            self._close_reader()
+        if paths:
+            # Only the unfiltered list in file order is fetched incrementally.
+            self.beginInsertRows(QModelIndex(), len(self._paths),
+                                 len(self._paths) + len(paths) - 1)
+            self._paths.extend(paths)
+            self.endInsertRows()
+        self.counts_changed.emit()
+
+    def load_all(self):
+        if self.is_complete:
+            return
+        self.beginResetModel()
+        self._paths.extend(self._reader)
+        self._close_reader()
+        self.endResetModel()
+        self.counts_changed.emit()
+
+    def close(self):
+        self._close_reader()
+        if self._size_worker is not None:
+            self._size_worker.cancel()
+            self._size_worker = None
+            self._size_thread.quit()
+            self._size_thread.wait()
+
+    def get_size(self, path):
+        if path not in self._sizes:
+            self._sizes[path] = output.get_file_info(path)[1]
+        return self._sizes[path]
+
+    def set_filter(self, text):
+        self._filter = text.casefold()
+        self._update_shown()
+
+    def set_sort_order(self, sort_order):
+        self._sort_order = sort_order
+        self._update_shown()
+
+    def set_shown_checked(self, checked):
+        if checked:
+            self._unchecked.difference_update(self._shown)
+        else:
+            self._unchecked.update(self._shown)
+        if self._shown:
+            self.dataChanged.emit(self.index(0), self.index(len(self._shown) - 1),
+                                  [Qt.CheckStateRole])
+        self.counts_changed.emit()
+
+    def iterate_checked(self):
+        self.load_all()
+        return (i for i in self._paths if i not in self._unchecked)
+
+    def save(self):
+        # The list is written again only if some files were unchecked.
+        if not self.changed:
+            return
+        paths = list(self.iterate_checked())
+        with open(self.file_path, 'w') as file:
+            output.write_orphans(paths, file, self.list_format)
+
+    def _update_shown(self):
+        if self._filter == '' and self._sort_order == SORT_ORDERS[0]:
+            # The list stays in file order and can be fetched incrementally.
+            self.beginResetModel()
+            self._shown = self._paths
+            self.endResetModel()
+            return
+
+        self.load_all()
+        self.beginResetModel()
+        shown = self._paths
+        if self._filter != '':
+            shown = [i for i in shown if self._filter in i.casefold()]
+        if self._sort_order == SORT_ORDERS[1]:
+            shown = sorted(shown)
+        elif self._sort_order == SORT_ORDERS[2]:
+            unknown = [i for i in shown if i not in self._sizes]
+            if unknown:
+                # The list is sorted again when the sizes are read.
+                self._read_sizes(unknown)
+            else:
+                shown = sorted(shown, key=self._get_sort_size, reverse=True)
+        self._shown = shown
+        self.endResetModel()
+
+    def _read_sizes(self, paths):
+        if self._size_worker is not None:
+            return
+        self._size_worker = ReadSizesWorker(paths)
+        self._size_thread = QThread(self)
+        self._size_worker.moveToThread(self._size_thread)
+        self._size_thread.started.connect(self._size_worker.run)
+        self._size_thread.finished.connect(self._size_worker.deleteLater)
+        self._size_thread.finished.connect(self._size_thread.deleteLater)
+        for signal in (self._size_worker.finished, self._size_worker.failed,
+                       self._size_worker.cancelled):
+            signal.connect(self._size_thread.quit)
+        self._size_worker.finished.connect(self._sizes_read)
+        self._size_thread.start()
+        self.counts_changed.emit()
+
+    def _sizes_read(self, sizes):
+        if self._size_worker is None:
+            # The model has been closed meanwhile.
+            return
+        self._sizes.update(sizes)
+        self._size_worker = self._size_thread = None
+        self._update_shown()
+        self.counts_changed.emit()
+
+    def _get_sort_size(self, path):
+        size = self.get_size(path)
+        return -1 if size is None else size
+
+    def _read_paths(self, entries):
+        # Sizes in the list are stored while its paths are read.
+        has_sizes = self.list_format in ('jsonl', 'csv')
+        try:
+            for path, size in entries:
+                if has_sizes:
+                    self._sizes[path] = size
+                yield path
+        finally:
+            entries.close()
+
+    def _close_reader(self):
+        if self._reader is not None:
+            self._reader.close()
+            self._reader = None
+            self._file.close()
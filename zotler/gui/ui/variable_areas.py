@@ -4,7 +4,7 @@
 from PyQt5.QtCore import Qt
 from PyQt5.QtWidgets import QWidget, QVBoxLayout
 
-from zotler.gui.ui.custom_widgets import LabeledPath, LabeledCheckBox
+from zotler.gui.ui.custom_widgets import LabeledComboBox, LabeledPath, LabeledCheckBox
 
 
 class DeleteOrphans(QWidget):
@@ -20,6 +20,34 @@ class DeleteOrphans(QWidget):
             vertical=True,
         )
 
+        self.path_to_prefs_file = LabeledPath(
+            parent=self,
+            label='Path to the Zotero settings file prefs.js:',
+            name='path_to_prefs_file',
+            tooltip='Files outside ZotFile Custom Location set in prefs.js are '
+                    'never deleted or moved.',
+            vertical=True,
+        )
+
+        self.path_to_database_file = LabeledPath(
+            parent=self,
+            label='Path to the Zotero database file zotero.sqlite:',
+            name='path_to_database_file',
+            tooltip='Files referenced in Zotero database are never deleted or moved.',
+            vertical=True,
+        )
+
+        self.path_to_quarantine_dir = LabeledPath(
+            parent=self,
+            label='Path to the quarantine directory '
+                  '(Orphan files will be deleted if empty):',
+            name='path_to_quarantine_dir',
+            tooltip='Orphan files are moved to a new run directory in this directory '
+                    'and can be restored later.',
+            vertical=True,
+            open_dir=True,
+        )
+
         self.init_ui()
 
     def init_ui(self):
@@ -27,6 +55,40 @@ class DeleteOrphans(QWidget):
         self.main_layout.setSpacing(10)
 
         self.main_layout.addWidget(self.path_to_list_of_orphans, 0, Qt.AlignBottom)
+        self.main_layout.addWidget(self.path_to_prefs_file, 0, Qt.AlignBottom)
+        self.main_layout.addWidget(self.path_to_database_file, 0, Qt.AlignBottom)
+        self.main_layout.addWidget(self.path_to_quarantine_dir, 0, Qt.AlignBottom)
+        self.main_layout.addStretch(2)
+
+        self.setLayout(self.main_layout)
+
+
+class ManageQuarantine(QWidget):
+    def __init__(self, parent=None):
+        super().__init__(parent, flags=Qt.WindowFlags())
+
+        self.main_layout = QVBoxLayout()
+        self.path_to_run_dir = LabeledPath(
+            parent=self,
+            label='Path to the quarantine run directory:',
+            name='path_to_run_dir',
+            tooltip='Run directory created in the quarantine directory',
+            vertical=True,
+            open_dir=True,
+        )
+        self.action = LabeledComboBox(values=('Restore quarantined files',
+                                              'Delete quarantined files'),
+                                      label='Action:',
+                                      vertical=True)
+
+        self.init_ui()
+
+    def init_ui(self):
+        self.main_layout.setContentsMargins(0, 10, 0, 0)
+        self.main_layout.setSpacing(10)
+
+        self.main_layout.addWidget(self.path_to_run_dir, 0, Qt.AlignBottom)
+        self.main_layout.addWidget(self.action, 0, Qt.AlignBottom)
         self.main_layout.addStretch(2)
 
         self.setLayout(self.main_layout)
@@ -63,6 +125,17 @@ class FindOrphans(QWidget):
             vertical=True,
         )
 
+        self.path_to_quarantine_dir = LabeledPath(
+            parent=self,
+            label='Path to the quarantine directory '
+                  '(Orphan files will be deleted if empty):',
+            name='path_to_quarantine_dir',
+            tooltip='Orphan files are moved to a new run directory in this directory '
+                    'and can be restored later.',
+            vertical=True,
+            open_dir=True,
+        )
+
         self.init_ui()
 
     def init_ui(self):
@@ -73,6 +146,7 @@ class FindOrphans(QWidget):
         self.main_layout.addWidget(self.path_to_prefs_file, 0, Qt.AlignBottom)
         self.main_layout.addWidget(self.path_to_database_file, 0, Qt.AlignBottom)
         self.main_layout.addWidget(self.path_to_output_file, 0, Qt.AlignBottom)
+        self.main_layout.addWidget(self.path_to_quarantine_dir, 0, Qt.AlignBottom)
         self.main_layout.addStretch(2)
 
         self.setLayout(self.main_layout)
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+
+from abc import ABCMeta, abstractmethod
+from collections import namedtuple
+import os
+import tempfile
+import threading
+import time
+
+from PyQt5.QtCore import QObject, pyqtSignal, pyqtSlot
+
+from zotler import list_deletion, output, quarantine
+from zotler.exceptions import CancelledError
+from zotler.scanner import OrphanScanner
+
+REPORT_INTERVAL = 0.1
+
+DeletionReport = namedtuple('DeletionReport', ['removed', 'skipped', 'failed',
+                                               'messages'])
+
+
+class WorkerMeta(type(QObject), ABCMeta):
+    pass
+
+
+class Worker(QObject, metaclass=WorkerMeta):
+    progress = pyqtSignal(str, int)
+    finished = pyqtSignal(object)
+    failed = pyqtSignal(str)
+    cancelled = pyqtSignal()
+
+    def __init__(self):
+        super().__init__()
+        self._cancel_event = threading.Event()
+        self._last_report = 0
+
+    def cancel(self):
+        # Called directly from the GUI thread, the worker's event loop is busy.
+        self._cancel_event.set()
+
+    @pyqtSlot()
+    def run(self):
+        try:
+            result = self.work()
+        except CancelledError:
+            self.cancelled.emit()
+        except Exception as error:
+            self.failed.emit(str(error))
+        else:
+            self.finished.emit(result)
+
+    @abstractmethod
+    def work(self):
+        # Runs in the worker thread, the result is emitted by finished.
+        pass
+
+    def report(self, phase, count, force=False):
+        if self._cancel_event.is_set():
+            raise CancelledError('Cancelled by user.')
+        now = time.monotonic()
+        if force or now - self._last_report >= REPORT_INTERVAL:
+            self._last_report = now
+            self.progress.emit(phase, count)
+
+    def count(self, iterable, phase):
+        count = 0
+        for count, item in enumerate(iterable, 1):
+            self.report(phase, count)
+            yield item
+        self.report(phase, count, force=True)
+
+
+class FindOrphansWorker(Worker):
+    def __init__(self, zotero_prefs, zotero_dbase, path_to_output_file=''):
+        super().__init__()
+        self.zotero_prefs = zotero_prefs
+        self.zotero_dbase = zotero_dbase
+        self.path_to_output_file = path_to_output_file
+
+    def work(self):
+        scanner = OrphanScanner(self.zotero_dbase, self.zotero_prefs,
+                                progress=self.report,
+                                cancel=self._cancel_event.is_set)
+
+        path_to_output_file = self.path_to_output_file
+        if path_to_output_file == '':
+            file_descriptor, path_to_output_file = tempfile.mkstemp(prefix='zotler_gui-')
+            os.close(file_descriptor)
+
+        with scanner, open(path_to_output_file, 'w') as output_file:
+            for orphan_file in scanner.scan():
+                print(orphan_file, file=output_file)
+        return path_to_output_file
+
+
+class ReadSizesWorker(Worker):
+    def __init__(self, paths):
+        super().__init__()
+        self.paths = paths
+
+    def work(self):
+        return {path: output.get_file_info(path)[1]
+                for path in self.count(self.paths, 'files checked')}
+
+
+class DeleteOrphansWorker(Worker):
+    def __init__(self, path_to_orphans_file, zotero_prefs, zotero_dbase):
+        super().__init__()
+        self.path_to_orphans_file = path_to_orphans_file
+        self.zotero_prefs = zotero_prefs
+        self.zotero_dbase = zotero_dbase
+
+    def work(self):
+        removed = skipped = failed = 0
+        messages = []
+        with open(self.path_to_orphans_file, 'r') as file:
+            # Files outside ZotFile Custom Location or referenced in Zotero
+            # database are left in place.
+            for checked, results in list_deletion.remove_listed_files(
+                    output.read_paths(file), self.zotero_prefs, self.zotero_dbase):
+                messages.extend(f'Skipping {i}: outside ZotFile Custom Location.'
+                                for i in checked.outside)
+                messages.extend(f'Skipping {i}: referenced in Zotero database.'
+                                for i in checked.referenced)
+                messages.extend(f'Skipping {i!r}: invalid path.'
+                                for i in checked.invalid)
+                skipped += (len(checked.outside) + len(checked.referenced)
+                            + len(checked.invalid))
+                for result in results:
+                    removed += len(result.removed)
+                    skipped += len(result.missing)
+                    failed += len(result.failed)
+                    messages.extend(
+                        f'File {os.path.join(result.directory, i)} not found.'
+                        for i in result.missing)
+                    messages.extend(
+                        f'Cannot remove {os.path.join(result.directory, i)}: {j}'
+                        for i, j in result.failed)
+                    self.report('files deleted', removed)
+        self.report('files deleted', removed, force=True)
+        return DeletionReport(removed, skipped, failed, messages)
+
+
+class QuarantineOrphansWorker(Worker):
+    def __init__(self, path_to_orphans_file, zotero_prefs, zotero_dbase,
+                 quarantine_dir):
+        super().__init__()
+        self.path_to_orphans_file = path_to_orphans_file
+        self.zotero_prefs = zotero_prefs
+        self.zotero_dbase = zotero_dbase
+        self.quarantine_dir = quarantine_dir
+
+    def work(self):
+        run = list_deletion.create_quarantine_run(self.zotero_prefs,
+                                                  self.quarantine_dir)
+        moved = 0
+        with open(self.path_to_orphans_file, 'r') as file:
+            for _, results in list_deletion.quarantine_listed_files(
+                    output.read_paths(file), run, self.zotero_prefs,
+                    self.zotero_dbase):
+                for result in results:
+                    if result.error is None:
+                        moved += 1
+                        self.report('files moved', moved)
+        self.report('files moved', moved, force=True)
+        return run.directory
+
+
+class UndoQuarantineWorker(Worker):
+    def __init__(self, run_directory):
+        super().__init__()
+        self.run_directory = run_directory
+
+    def work(self):
+        results = quarantine.QuarantineRun.open(self.run_directory).undo()
+        for _ in self.count((i for i in results if i.error is None),
+                            'files restored'):
+            pass
+        return self.run_directory
+
+
+class PurgeQuarantineWorker(Worker):
+    def __init__(self, run_directory):
+        super().__init__()
+        self.run_directory = run_directory
+
+    def work(self):
+        quarantine.QuarantineRun.open(self.run_directory).purge()
+        return self.run_directory
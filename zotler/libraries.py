@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+import os
+import sqlite3
+import tempfile
+
+from zotler import zotler
+from zotler.path_index import PathIndex, get_normalizer
+from zotler.stats import Statistics
+
+Library = namedtuple('Library', ['library_id', 'type', 'name'])
+PartitionReport = namedtuple('PartitionReport', ['library', 'attachments', 'found',
+                                                 'missing'])
+
+
+def get_libraries(connection):
+    try:
+        records = connection.execute(
+            'SELECT libraries.libraryID, libraries.type, groups.name '
+            'FROM libraries LEFT JOIN groups USING (libraryID) '
+            'ORDER BY libraries.libraryID'
+        ).fetchall()
+    except sqlite3.OperationalError:
+        # Databases without the libraries table know only the libraries
+        # their items belong to.
+        records = connection.execute(
+            'SELECT DISTINCT libraryID, NULL, NULL FROM items ORDER BY libraryID'
+        ).fetchall()
+    return [Library(*record) for record in records]
+
+
+def read_library_attachments(connection, library_id, base_path=None):
+    cursor = connection.cursor()
+    cursor.execute('SELECT itemAttachments.itemID, items.key, itemAttachments.path '
+                   'FROM itemAttachments JOIN items USING (itemID) '
+                   'WHERE items.libraryID = ? AND itemAttachments.path IS NOT NULL',
+                   (library_id, ))
+    for item_id, key, path in zotler.iterate_records(cursor):
+        relative_path = zotler.get_relative_attachment_path(path, base_path)
+        if relative_path is not None:
+            yield item_id, key, relative_path
+
+
+def scan_partition(zotero_dbase, library, base_path, existing_files, normalize=None,
+                   immutable=False, path_filter=None):
+    # Every partition has its own connection, so partitions can be read
+    # in parallel threads.
+    connection = zotler.connect_to_database(zotero_dbase, immutable=immutable)
+    try:
+        referenced = PathIndex(key=normalize)
+        attachments = found = 0
+        missing = []
+        for item_id, key, relative_path in read_library_attachments(
+                connection, library.library_id, base_path):
+            if path_filter is not None and not path_filter.matches(
+                    os.path.normpath(relative_path)):
+                continue
+            attachments += 1
+            path = os.path.normpath(os.path.join(base_path, relative_path))
+            referenced.add(path)
+            if path in existing_files:
+                found += 1
+            else:
+                missing.append(zotler.MissingAttachment(item_id, key, path))
+    finally:
+        connection.close()
+    return PartitionReport(library, attachments, found, missing), referenced
+
+
+def create_snapshot_file(zotero_dbase, immutable=False):
+    # Partitions are read by their own connections, a temporary file lets
+    # all of them share one snapshot.
+    file_descriptor, snapshot_file = tempfile.mkstemp(prefix='zotler-snapshot-',
+                                                      suffix='.sqlite')
+    os.close(file_descriptor)
+    source = zotler.connect_to_database(zotero_dbase, immutable=immutable)
+    try:
+        target = sqlite3.connect(snapshot_file)
+        try:
+            source.backup(target)
+        finally:
+            target.close()
+    except BaseException:
+        os.remove(snapshot_file)
+        raise
+    finally:
+        source.close()
+    return snapshot_file
+
+
+def scan_libraries(zotero_dbase, zotero_prefs, library_ids=None, jobs=1, cache=None,
+                   immutable=False, snapshot=False, normalization='none',
+                   path_filter=None, stats=None):
+    if not snapshot:
+        return _scan_libraries(zotero_dbase, zotero_prefs, library_ids, jobs, cache,
+                               immutable, normalization, path_filter, stats)
+
+    snapshot_file = create_snapshot_file(zotero_dbase, immutable=immutable)
+    try:
+        return _scan_libraries(snapshot_file, zotero_prefs, library_ids, jobs, cache,
+                               True, normalization, path_filter, stats)
+    finally:
+        os.remove(snapshot_file)
+
+
+def _scan_libraries(zotero_dbase, zotero_prefs, library_ids, jobs, cache, immutable,
+                    normalization, path_filter, stats):
+    if stats is None:
+        stats = Statistics()
+    normalize = get_normalizer(normalization)
+
+    with stats.phase('get_base_path'):
+        base_path = zotler.get_base_path(zotero_prefs)
+
+    connection = zotler.connect_to_database(zotero_dbase, immutable=immutable)
+    try:
+        libraries = get_libraries(connection)
+    finally:
+        connection.close()
+
+    with stats.phase('tree walk', 'files') as phase:
+        existing_files = zotler.create_index_of_existing_files(
+            base_path, jobs=jobs, cache=cache, path_filter=path_filter)
+        phase.items = len(existing_files)
+        existing_keys = (existing_files if normalize is None
+                         else PathIndex(existing_files, key=normalize))
+
+    # Every library is scanned, a file referenced only by a library left out
+    # of the report is still not an orphan.
+    with stats.phase('database query', 'libraries') as phase:
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            results = list(executor.map(
+                lambda library: scan_partition(zotero_dbase, library, base_path,
+                                               existing_keys, normalize=normalize,
+                                               immutable=immutable,
+                                               path_filter=path_filter),
+                libraries))
+        phase.items = len(results)
+
+    with stats.phase('difference', 'files') as phase:
+        referenced = PathIndex(key=normalize)
+        for _, library_referenced in results:
+            referenced.update(library_referenced)
+        orphans = existing_files - referenced
+        phase.items = len(existing_files)
+
+    reports = [report for report, _ in results
+               if library_ids is None or report.library.library_id in library_ids]
+    return reports, orphans
+
+
+def format_partition_report(report):
+    library = report.library
+    description = ' '.join(str(i) for i in (library.type, library.name) if i)
+    if description:
+        description = f' ({description})'
+    return (f'Library {library.library_id}{description}: '
+            f'{report.attachments} attachments, {report.found} files found, '
+            f'{len(report.missing)} missing')
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+
+from collections import namedtuple
+import os
+
+from zotler import deletion, quarantine, zotler
+from zotler.exceptions import ZotlerError
+from zotler.path_index import get_normalizer
+
+# Three forms of each path have to fit into the 999 parameters of a query.
+CHUNK_SIZE = 300
+
+CheckedChunk = namedtuple('CheckedChunk', ['allowed', 'outside', 'referenced', 'invalid'])
+
+
+def iterate_chunks(paths, chunk_size=CHUNK_SIZE):
+    chunk = []
+    for path in paths:
+        chunk.append(path)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class ListChecker:
+    # Paths from a list of orphan files are deleted only if they lie inside
+    # ZotFile Custom Location and are still not referenced in Zotero database.
+
+    def __init__(self, base_path, connection, normalize=None):
+        self.base_path = os.path.normpath(os.path.abspath(base_path))
+        self.prefix = os.path.join(self.base_path, '')
+        self.real_prefix = os.path.join(os.path.realpath(self.base_path), '')
+        self.connection = connection
+        self.normalize = normalize
+        self._referenced_keys = None
+
+    def is_inside(self, path, real_directories):
+        if not path.startswith(self.prefix):
+            return False
+        # Symlinked directories could lead out of the location.
+        directory = os.path.dirname(path)
+        real_directory = real_directories.get(directory)
+        if real_directory is None:
+            real_directory = real_directories[directory] = os.path.join(
+                os.path.realpath(directory), '')
+        return real_directory.startswith(self.real_prefix)
+
+    def find_referenced(self, paths):
+        if self.normalize is not None:
+            return self._find_referenced_keys(paths)
+
+        # Zotero stores paths relative to the location, written with slashes
+        # or backslashes depending on the system they were saved on, or
+        # absolute paths if it has no base directory set.
+        candidates = {}
+        for path in paths:
+            candidates[path] = path
+            relative_path = path[len(self.prefix):].replace(os.sep, '/')
+            for form in (relative_path, relative_path.replace('/', '\\')):
+                candidates[zotler.ATTACHMENT_PREFIX + form] = path
+        keys = list(candidates)
+        cursor = self.connection.execute(
+            f'SELECT path FROM itemAttachments '
+            f'WHERE path IN ({", ".join("?" * len(keys))})', keys)
+        return {candidates[record[0]] for record in cursor}
+
+    def _find_referenced_keys(self, paths):
+        # Normalized paths can't be looked up by the query, all referenced
+        # paths are read once instead.
+        if self._referenced_keys is None:
+            relative_paths = zotler.read_relative_paths(self.connection,
+                                                        self.base_path)
+            self._referenced_keys = {self._get_key(i) for i in relative_paths}
+        return {i for i in paths
+                if self._get_key(i[len(self.prefix):]) in self._referenced_keys}
+
+    def _get_key(self, relative_path):
+        return self.normalize(relative_path.replace('\\', '/'))
+
+    def check(self, chunk):
+        real_directories = {}
+        inside, outside, invalid = [], [], []
+        for path in chunk:
+            # Paths with NUL bytes can't name any file.
+            if '\0' in path:
+                invalid.append(path)
+                continue
+            absolute_path = os.path.normpath(os.path.abspath(path))
+            if self.is_inside(absolute_path, real_directories):
+                inside.append(absolute_path)
+            else:
+                outside.append(path)
+        referenced = self.find_referenced(inside) if inside else set()
+        allowed = [i for i in inside if i not in referenced]
+        return CheckedChunk(allowed, outside, sorted(referenced), invalid)
+
+    def iterate_checked_chunks(self, paths, chunk_size=CHUNK_SIZE):
+        for chunk in iterate_chunks(paths, chunk_size):
+            yield self.check(chunk)
+
+
+def get_location(zotero_prefs):
+    base_path = zotler.get_base_path(zotero_prefs)
+    if base_path is None:
+        raise ZotlerError(f'ZotFile Custom Location is not set in {zotero_prefs}.')
+    return base_path
+
+
+def check_listed_files(paths, zotero_prefs, zotero_dbase, chunk_size=CHUNK_SIZE,
+                       immutable=False, normalization='none'):
+    base_path = get_location(zotero_prefs)
+    normalize = get_normalizer(normalization)
+    connection = zotler.connect_to_database(zotero_dbase, immutable=immutable)
+    try:
+        checker = ListChecker(base_path, connection, normalize=normalize)
+        yield from checker.iterate_checked_chunks(paths, chunk_size)
+    finally:
+        connection.close()
+
+
+def remove_listed_files(paths, zotero_prefs, zotero_dbase, jobs=deletion.DEFAULT_JOBS,
+                        chunk_size=CHUNK_SIZE, immutable=False, normalization='none'):
+    # Yields every checked chunk followed by results of deletion of its files,
+    # so only one chunk of the list is held in memory.
+    for checked in check_listed_files(paths, zotero_prefs, zotero_dbase,
+                                      chunk_size=chunk_size, immutable=immutable,
+                                      normalization=normalization):
+        results = deletion.remove_files_in_batches(checked.allowed, jobs=jobs,
+                                                   strip=False)
+        yield checked, results
+
+
+def create_quarantine_run(zotero_prefs, quarantine_dir):
+    quarantine.check_location(quarantine_dir, get_location(zotero_prefs))
+    return quarantine.QuarantineRun.create(quarantine_dir)
+
+
+def quarantine_listed_files(paths, run, zotero_prefs, zotero_dbase,
+                            chunk_size=CHUNK_SIZE, immutable=False,
+                            normalization='none'):
+    # Like remove_listed_files, the files are moved to the quarantine run
+    # created by create_quarantine_run.
+    for checked in check_listed_files(paths, zotero_prefs, zotero_dbase,
+                                      chunk_size=chunk_size, immutable=immutable,
+                                      normalization=normalization):
+        yield checked, run.move_files(checked.allowed, strip=False)
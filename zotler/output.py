@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+
+import csv
+import itertools
+import json
+import os
+
+from zotler.exceptions import InvalidModeError
+
+FORMATS = ('text', 'nul', 'jsonl', 'csv')
+CSV_HEADER = ('path', 'size', 'mtime')
+READ_SIZE = 64 * 1024
+
+
+def get_file_info(path):
+    try:
+        stat = os.lstat(path)
+    except OSError:
+        return path, None, None
+    return path, stat.st_size, stat.st_mtime
+
+
+def write_orphans(orphans, output_file, output_format='text'):
+    if output_format == 'text':
+        for path in orphans:
+            output_file.write(f'{path}\n')
+    elif output_format == 'nul':
+        for path in orphans:
+            output_file.write(f'{path}\0')
+    elif output_format == 'jsonl':
+        for path in orphans:
+            info = dict(zip(CSV_HEADER, get_file_info(path)))
+            output_file.write(f'{json.dumps(info)}\n')
+    elif output_format == 'csv':
+        writer = csv.writer(output_file, lineterminator='\n')
+        writer.writerow(CSV_HEADER)
+        for path in orphans:
+            writer.writerow(get_file_info(path))
+    else:
+        raise InvalidModeError(f'Unknown output format {output_format}.')
+
+
+def read_chunks(list_file):
+    while True:
+        chunk = list_file.read(READ_SIZE)
+        if not chunk:
+            return
+        yield chunk
+
+
+def read_nul_separated(chunks):
+    rest = ''
+    for chunk in chunks:
+        *paths, rest = (rest + chunk).split('\0')
+        yield from (i for i in paths if i != '')
+    if rest != '':
+        yield rest
+
+
+def read_lines(chunks):
+    rest = ''
+    for chunk in chunks:
+        *lines, rest = (rest + chunk).split('\n')
+        yield from (f'{line}\n' for line in lines)
+    if rest != '':
+        yield rest
+
+
+def read_first_chunk(list_file):
+    first_chunk = ''
+    for chunk in read_chunks(list_file):
+        first_chunk += chunk
+        if '\0' in chunk or '\n' in chunk:
+            break
+    return first_chunk
+
+
+def detect_format(first_chunk):
+    # The first separator tells NUL separated lists from the line based ones.
+    first_line = first_chunk.split('\n', 1)[0]
+    if '\0' in first_line:
+        return 'nul'
+    if first_chunk.lstrip().startswith('{'):
+        return 'jsonl'
+    if first_line.strip() == ','.join(CSV_HEADER):
+        return 'csv'
+    return 'text'
+
+
+def read_entries(list_file):
+    # Yields pairs of path and size. Only jsonl and csv lists carry the size,
+    # it is None in the others and for files not found when listed.
+    first_chunk = read_first_chunk(list_file)
+    chunks = itertools.chain((first_chunk, ), read_chunks(list_file))
+    list_format = detect_format(first_chunk)
+
+    if list_format == 'nul':
+        for path in read_nul_separated(chunks):
+            yield path, None
+        return
+
+    lines = read_lines(chunks)
+    if list_format == 'jsonl':
+        for line in lines:
+            if line.strip() != '':
+                info = json.loads(line)
+                yield info['path'], info.get('size')
+    elif list_format == 'csv':
+        next(lines)
+        for row in csv.reader(lines):
+            if row:
+                size = row[1] if len(row) > 1 else ''
+                yield row[0], int(size) if size != '' else None
+    else:
+        for line in lines:
+            path = line.strip()
+            if path != '':
+                yield path, None
+
+
+def read_paths(list_file):
+    for path, _ in read_entries(list_file):
+        yield path
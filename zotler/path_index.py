@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+
+import os
+import unicodedata
+
+from zotler.exceptions import InvalidModeError
+
+NORMALIZATIONS = ('none', 'nfc', 'nfd', 'casefold')
+
+
+def normalize_nfc(path):
+    return unicodedata.normalize('NFC', path)
+
+
+def normalize_nfd(path):
+    return unicodedata.normalize('NFD', path)
+
+
+def normalize_casefold(path):
+    # Canonical caseless matching as defined by the Unicode standard.
+    return unicodedata.normalize('NFD', unicodedata.normalize('NFD', path).casefold())
+
+
+def get_normalizer(normalization):
+    normalizers = {'none': None,
+                   'nfc': normalize_nfc,
+                   'nfd': normalize_nfd,
+                   'casefold': normalize_casefold}
+    try:
+        return normalizers[normalization]
+    except KeyError:
+        raise InvalidModeError(f'Unknown normalization {normalization}.')
+
+
+class PathIndex:
+    # Paths are kept as a mapping of a directory to the set of file names in it,
+    # so long common prefixes aren't repeated for every file. If a key function
+    # is given, the index keeps and looks up paths in the form returned by it.
+
+    def __init__(self, paths=(), key=None):
+        self._key = key
+        self._directories = {}
+        self._length = 0
+        for path in paths:
+            self.add(path)
+
+    def __len__(self):
+        return self._length
+
+    def __iter__(self):
+        for directory, names in self._directories.items():
+            for name in names:
+                yield os.path.join(directory, name)
+
+    def __contains__(self, path):
+        directory, name = self._split(path)
+        names = self._directories.get(directory)
+        return names is not None and name in names
+
+    def __sub__(self, other):
+        return set(self.difference(other))
+
+    def add(self, path):
+        directory, name = self._split(path)
+        self._add_names(directory, (name, ))
+
+    def update(self, other):
+        # Both indexes have to use the same key.
+        for directory, names in other._directories.items():
+            self._add_names(directory, names)
+
+    def add_directory(self, directory, names):
+        directory = os.path.normpath(directory)
+        if directory == os.curdir:
+            directory = ''
+        if self._key is not None:
+            directory = self._key(directory)
+            names = [self._key(name) for name in names]
+        self._add_names(directory, names)
+
+    def discard(self, path):
+        directory, name = self._split(path)
+        names = self._directories.get(directory)
+        if names is not None and name in names:
+            names.remove(name)
+            self._length -= 1
+
+    def discard_tree(self, directory):
+        directory = os.path.normpath(directory)
+        if self._key is not None:
+            directory = self._key(directory)
+        prefix = os.path.join(directory, '')
+        removed = []
+        for key in [i for i in self._directories
+                    if i == directory or i.startswith(prefix)]:
+            names = self._directories.pop(key)
+            self._length -= len(names)
+            removed.extend(os.path.join(key, name) for name in names)
+        return removed
+
+    def difference(self, other):
+        # Paths are yielded in the form kept by this index, but they are looked
+        # up in the other one by its key. Each directory is normalized once.
+        key = other._key
+        for directory, names in self._directories.items():
+            if key is None:
+                other_names = other._directories.get(directory)
+                if other_names is not None:
+                    names = names - other_names
+            else:
+                other_names = other._directories.get(key(directory))
+                if other_names is not None:
+                    names = [i for i in names if key(i) not in other_names]
+            for name in names:
+                yield os.path.join(directory, name)
+
+    def _add_names(self, directory, names):
+        directory_names = self._directories.get(directory)
+        if directory_names is None:
+            directory_names = self._directories[directory] = set()
+        length = len(directory_names)
+        directory_names.update(names)
+        self._length += len(directory_names) - length
+
+    def _split(self, path):
+        path = os.path.normpath(path)
+        if self._key is not None:
+            path = self._key(path)
+        return os.path.split(path)
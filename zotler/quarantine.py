@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+
+from collections import namedtuple
+import errno
+import json
+import os
+import re
+import shutil
+import tempfile
+import time
+
+from zotler.exceptions import ZotlerError
+
+JOURNAL_NAME = 'journal.jsonl'
+FILES_DIR_NAME = 'files'
+RUN_NAME_PATTERN = re.compile(r'^\d{8}-\d{6}-\w+$')
+
+MoveResult = namedtuple('MoveResult', ['source', 'target', 'error'])
+
+
+def check_location(quarantine_dir, base_path):
+    quarantine_dir = os.path.realpath(quarantine_dir)
+    base_path = os.path.realpath(base_path)
+    if os.path.commonpath((quarantine_dir, base_path)) == base_path:
+        raise ZotlerError(f'Quarantine directory {quarantine_dir} cannot be inside '
+                          f'ZotFile Custom Location {base_path}.')
+
+    # Files are renamed, which works only within one filesystem.
+    existing_dir = quarantine_dir
+    while not os.path.exists(existing_dir):
+        existing_dir = os.path.dirname(existing_dir)
+    if os.stat(existing_dir).st_dev != os.stat(base_path).st_dev:
+        raise ZotlerError(f'Quarantine directory {quarantine_dir} is not on the same '
+                          f'filesystem as ZotFile Custom Location {base_path}.')
+
+
+def list_runs(quarantine_dir):
+    try:
+        names = sorted(os.listdir(quarantine_dir))
+    except FileNotFoundError:
+        return []
+    return [QuarantineRun(os.path.join(quarantine_dir, name)) for name in names
+            if os.path.isfile(os.path.join(quarantine_dir, name, JOURNAL_NAME))]
+
+
+class QuarantineRun:
+    def __init__(self, directory):
+        self.directory = directory
+        self.journal_path = os.path.join(directory, JOURNAL_NAME)
+        self.files_dir = os.path.join(directory, FILES_DIR_NAME)
+
+    @classmethod
+    def create(cls, quarantine_dir):
+        os.makedirs(quarantine_dir, exist_ok=True)
+        prefix = time.strftime('%Y%m%d-%H%M%S-')
+        run = cls(tempfile.mkdtemp(prefix=prefix, dir=quarantine_dir))
+        open(run.journal_path, 'a').close()
+        return run
+
+    @classmethod
+    def open(cls, directory, quarantine_dir=None):
+        # Only run directories made by create are accepted, so undo and purge
+        # never touch any other directory.
+        run = cls(os.path.normpath(os.path.abspath(directory)))
+        if quarantine_dir is not None and (
+                os.path.dirname(os.path.realpath(run.directory))
+                != os.path.realpath(quarantine_dir)):
+            raise ZotlerError(f'{directory} is not a run in quarantine directory '
+                              f'{quarantine_dir}.')
+        if (not re.match(RUN_NAME_PATTERN, os.path.basename(run.directory))
+                or os.path.islink(run.directory)
+                or not os.path.isfile(run.journal_path)
+                or not set(os.listdir(run.directory)) <= {JOURNAL_NAME,
+                                                          FILES_DIR_NAME}):
+            raise ZotlerError(f'{directory} is not a quarantine run directory.')
+        return run
+
+    def get_target(self, source):
+        # The whole absolute path is kept, so files of any directory can be
+        # moved back without knowing the ZotFile Custom Location.
+        drive, path = os.path.splitdrive(os.path.abspath(source))
+        parts = [self.files_dir]
+        if drive:
+            parts.append(drive.strip('\\/:').replace(':', '').replace('\\', '_')
+                         .replace('/', '_'))
+        parts.append(path.lstrip('\\/'))
+        return os.path.join(*parts)
+
+    def move_files(self, filepaths, strip=True):
+        created_dirs = set()
+        with open(self.journal_path, 'a') as journal:
+            for file in filepaths:
+                path = file.strip() if strip else file
+                if path == '':
+                    continue
+                source = os.path.abspath(path)
+                target = self.get_target(source)
+                try:
+                    _make_parent_dir(target, created_dirs)
+                    os.rename(source, target)
+                except OSError as error:
+                    yield MoveResult(source, target, error)
+                    continue
+                # Every move is journaled right away, an interrupted run can
+                # still be undone.
+                journal.write(f'{json.dumps({"source": source, "target": target})}\n')
+                journal.flush()
+                yield MoveResult(source, target, None)
+
+    def read_journal(self):
+        with open(self.journal_path, 'r') as journal:
+            for line in journal:
+                if line.strip() != '':
+                    entry = json.loads(line)
+                    yield entry['source'], entry['target']
+
+    def undo(self):
+        created_dirs = set()
+        failed = False
+        for source, target in self.read_journal():
+            try:
+                # Files restored by a previous undo are gone from the run,
+                # they don't conflict with themselves.
+                if not os.path.lexists(target):
+                    raise FileNotFoundError(errno.ENOENT, os.strerror(errno.ENOENT),
+                                            target)
+                if os.path.lexists(source):
+                    raise FileExistsError(errno.EEXIST, os.strerror(errno.EEXIST),
+                                          source)
+                _make_parent_dir(source, created_dirs)
+                os.rename(target, source)
+            except FileNotFoundError as error:
+                # Already restored or purged by hand.
+                yield MoveResult(target, source, error)
+            except OSError as error:
+                failed = True
+                yield MoveResult(target, source, error)
+            else:
+                yield MoveResult(target, source, None)
+        if not failed:
+            self.purge()
+
+    def purge(self):
+        shutil.rmtree(self.directory)
+
+
+def _make_parent_dir(path, created_dirs):
+    directory = os.path.dirname(path)
+    if directory not in created_dirs:
+        os.makedirs(directory, exist_ok=True)
+        created_dirs.add(directory)
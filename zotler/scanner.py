@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+
+from zotler import zotler
+from zotler.exceptions import CancelledError
+from zotler.path_index import PathIndex, get_normalizer
+from zotler.stats import Statistics
+
+PROGRESS_STEP = 1000
+
+
+class OrphanScanner:
+    # Keeps the base path, the database connection and the index of referenced
+    # files between scans. The index is read again only if the database has
+    # been changed since the last scan, i.e. PRAGMA data_version differs.
+    # Pass a DirectoryCache as cache to make walks of unchanged trees cheap too.
+
+    def __init__(self, zotero_dbase, zotero_prefs, jobs=1, cache=None,
+                 immutable=False, snapshot=False, normalization='none',
+                 path_filter=None, progress=None, cancel=None, stats=None):
+        self.zotero_dbase = zotero_dbase
+        self.jobs = jobs
+        self.cache = cache
+        self.immutable = immutable
+        self.snapshot = snapshot
+        self.path_filter = path_filter
+        self.progress = progress
+        self.cancel = cancel
+        self.stats = Statistics() if stats is None else stats
+        self._normalize = get_normalizer(normalization)
+        self._connection = None
+        self._data_version = None
+        self._referenced = None
+
+        with self.stats.phase('get_base_path'):
+            self.base_path = zotler.get_base_path(zotero_prefs)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    @property
+    def referenced_files(self):
+        if self._referenced is None:
+            self.refresh_references()
+        return self._referenced
+
+    def connect(self):
+        if self._connection is None:
+            self._connection = zotler.connect_to_database(self.zotero_dbase,
+                                                          immutable=self.immutable,
+                                                          snapshot=self.snapshot)
+        return self._connection
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def report(self, phase, count):
+        if self.cancel is not None and self.cancel():
+            raise CancelledError('Scan cancelled.')
+        if self.progress is not None:
+            self.progress(phase, count)
+
+    def refresh_references(self):
+        # A snapshot never changes, a new one has to be taken.
+        if self.snapshot:
+            self.close()
+        connection = self.connect()
+        data_version = connection.execute('PRAGMA data_version').fetchone()[0]
+        if (self._referenced is not None and not self.snapshot
+                and data_version == self._data_version):
+            return False
+
+        with self.stats.phase('database query', 'paths') as phase:
+            relative_paths = self._count(
+                zotler.read_relative_paths(connection, self.base_path), 'rows read')
+            self._referenced = PathIndex(
+                zotler.get_absolute_paths(self.base_path, relative_paths),
+                key=self._normalize)
+            phase.items = len(self._referenced)
+        self._data_version = data_version
+        return True
+
+    def walk(self):
+        existing_files = PathIndex()
+        with self.stats.phase('tree walk', 'files') as phase:
+            for directory, files in zotler.walk_existing_directories(
+                    self.base_path, jobs=self.jobs, cache=self.cache,
+                    path_filter=self.path_filter):
+                existing_files.add_directory(directory, files)
+                self.report('files scanned', len(existing_files))
+            phase.items = len(existing_files)
+        return existing_files
+
+    def scan(self):
+        self.refresh_references()
+        existing_files = self.walk()
+
+        orphans = self._count(existing_files.difference(self._referenced),
+                              'orphans found')
+        yield from self.stats.iterate('difference', 'files', orphans,
+                                      items=len(existing_files))
+
+    def _count(self, iterable, phase):
+        count = 0
+        for count, item in enumerate(iterable, 1):
+            if count % PROGRESS_STEP == 0:
+                self.report(phase, count)
+            yield item
+        self.report(phase, count)
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+
+import gzip
+import os
+import tempfile
+
+from zotler import output
+from zotler.exceptions import ZotlerError
+
+MAGIC = 'zotler-orphans-1'
+NEW = '+'
+RESOLVED = '-'
+
+
+def write_snapshot(paths, snapshot_file):
+    # Sorted NUL separated paths compressed by gzip. The file is replaced
+    # atomically, an interrupted run keeps the previous snapshot.
+    directory = os.path.dirname(os.path.abspath(snapshot_file))
+    file_descriptor, temp_path = tempfile.mkstemp(dir=directory,
+                                                  prefix='.zotler-snapshot-')
+    try:
+        with os.fdopen(file_descriptor, 'wb') as raw_file, \
+                gzip.open(raw_file, 'wt', encoding='utf-8', newline='') as file:
+            file.write(f'{MAGIC}\0')
+            for path in sorted(paths):
+                file.write(f'{path}\0')
+        os.replace(temp_path, snapshot_file)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+
+
+def read_snapshot(snapshot_file):
+    with gzip.open(snapshot_file, 'rt', encoding='utf-8', newline='') as file:
+        paths = output.read_nul_separated(output.read_chunks(file))
+        if next(paths, None) != MAGIC:
+            raise ZotlerError(f'{snapshot_file} is not a snapshot of orphan files.')
+        yield from paths
+
+
+def diff_sorted(old_paths, new_paths):
+    # Merge of two sorted streams, only the current path of each is kept.
+    old_paths = iter(old_paths)
+    new_paths = iter(new_paths)
+    old = next(old_paths, None)
+    new = next(new_paths, None)
+    while old is not None or new is not None:
+        if new is None or (old is not None and old < new):
+            yield RESOLVED, old
+            old = next(old_paths, None)
+        elif old is None or new < old:
+            yield NEW, new
+            new = next(new_paths, None)
+        else:
+            old = next(old_paths, None)
+            new = next(new_paths, None)
+
+
+def update_snapshot(orphans, snapshot_file):
+    # Yields changes since the previous snapshot, which is replaced by
+    # the new one after the whole difference has been consumed.
+    new_snapshot = f'{snapshot_file}.new'
+    write_snapshot(orphans, new_snapshot)
+    try:
+        old_paths = read_snapshot(snapshot_file) if os.path.exists(snapshot_file) else ()
+        yield from diff_sorted(old_paths, read_snapshot(new_snapshot))
+    except BaseException:
+        os.remove(new_snapshot)
+        raise
+    os.replace(new_snapshot, snapshot_file)
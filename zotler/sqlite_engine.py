@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+
+import os
+
+from zotler import zotler
+from zotler.stats import Statistics
+
+
+
+def create_absolute_path_function(base_path, normalize=None):
+    # Paths of attachments outside ZotFile Custom Location become NULL.
+    def absolute_path(path):
+        relative_path = zotler.get_relative_attachment_path(path, base_path)
+        if relative_path is None:
+            return None
+        path = os.path.normpath(os.path.join(base_path, relative_path))
+        return path if normalize is None else normalize(path)
+    return absolute_path
+
+
+def iterate_orphans(connection, base_path, existing_files, stats=None,
+                    normalize=None):
+    if stats is None:
+        stats = Statistics()
+    if normalize is None:
+        def normalize(path):
+            return path
+
+    connection.create_function('zotler_absolute_path', 1,
+                               create_absolute_path_function(base_path, normalize))
+    connection.execute('PRAGMA temp_store = FILE')
+    connection.execute('CREATE TEMP TABLE zotler_referenced_files '
+                       '(path TEXT PRIMARY KEY) WITHOUT ROWID')
+    # Existing files are matched by their normalized form, the key.
+    connection.execute('CREATE TEMP TABLE zotler_existing_files '
+                       '(path TEXT PRIMARY KEY, key TEXT) WITHOUT ROWID')
+    cursor = connection.cursor()
+    try:
+        with stats.phase('database query', 'paths') as phase:
+            cursor.execute(
+                'INSERT OR IGNORE INTO temp.zotler_referenced_files '
+                'SELECT * FROM (SELECT zotler_absolute_path(path) AS path '
+                '               FROM itemAttachments WHERE path IS NOT NULL) '
+                'WHERE path IS NOT NULL'
+            )
+            phase.items = cursor.rowcount
+
+        with stats.phase('tree walk', 'files') as phase:
+            cursor.executemany(
+                'INSERT OR IGNORE INTO temp.zotler_existing_files VALUES (?, ?)',
+                ((path, normalize(path)) for path in existing_files)
+            )
+            phase.items = cursor.rowcount
+
+        cursor.execute(
+            'SELECT path FROM temp.zotler_existing_files AS existing '
+            'WHERE NOT EXISTS (SELECT 1 FROM temp.zotler_referenced_files AS referenced '
+            '                  WHERE referenced.path = existing.key)'
+        )
+        yield from stats.iterate('anti-join', 'orphans',
+                                 (i[0] for i in zotler.iterate_records(cursor)))
+    finally:
+        cursor.close()
+        connection.execute('DROP TABLE temp.zotler_existing_files')
+        connection.execute('DROP TABLE temp.zotler_referenced_files')
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+
+from contextlib import contextmanager
+import json
+import sys
+import time
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+STATS_FORMATS = ('text', 'json')
+
+
+def get_peak_rss():
+    if resource is None:
+        return None
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere.
+    return peak_rss if sys.platform == 'darwin' else peak_rss * 1024
+
+
+class Phase:
+    def __init__(self, name, unit=''):
+        self.name = name
+        self.unit = unit
+        self.items = None
+        self.seconds = None
+        self.peak_rss = None
+        self._start = time.perf_counter()
+
+    @property
+    def throughput(self):
+        if self.items is None or not self.seconds:
+            return None
+        return self.items / self.seconds
+
+    def stop(self, items=None):
+        self.seconds = time.perf_counter() - self._start
+        if items is not None:
+            self.items = items
+        self.peak_rss = get_peak_rss()
+
+    def as_dict(self):
+        return {'phase': self.name,
+                'seconds': self.seconds,
+                'items': self.items,
+                'unit': self.unit,
+                'throughput': self.throughput,
+                'peak_rss_bytes': self.peak_rss}
+
+
+class Statistics:
+    def __init__(self):
+        self.phases = []
+
+    def start(self, name, unit=''):
+        phase = Phase(name, unit)
+        self.phases.append(phase)
+        return phase
+
+    @contextmanager
+    def phase(self, name, unit=''):
+        phase = self.start(name, unit)
+        try:
+            yield phase
+        finally:
+            phase.stop()
+
+    def iterate(self, name, unit, iterable, items=None):
+        # The phase of a generator ends when the caller consumes its last item.
+        # The yielded items are counted unless their number is given.
+        phase = self.start(name, unit)
+        count = 0
+        for count, item in enumerate(iterable, 1):
+            yield item
+        phase.stop(count if items is None else items)
+
+    def as_json(self):
+        return json.dumps([phase.as_dict() for phase in self.phases], indent=2)
+
+    def as_text(self):
+        lines = [f'{"phase":<20} {"seconds":>9} {"items":>10} {"unit":<8} '
+                 f'{"items/s":>11} {"peak RSS MiB":>13}']
+        for phase in self.phases:
+            items = '' if phase.items is None else phase.items
+            throughput = '' if phase.throughput is None else f'{phase.throughput:.0f}'
+            peak_rss = '' if phase.peak_rss is None else f'{phase.peak_rss / 2 ** 20:.1f}'
+            seconds = phase.seconds or 0
+            lines.append(f'{phase.name:<20} {seconds:>9.3f} {items:>10} '
+                         f'{phase.unit:<8} {throughput:>11} {peak_rss:>13}')
+        return '\n'.join(lines)
+
+    def report(self, stats_format='text'):
+        return self.as_json() if stats_format == 'json' else self.as_text()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+
+from collections import namedtuple
+import heapq
+import os
+
+from zotler import walker, zotler
+from zotler.path_index import PathIndex, get_normalizer
+from zotler.stats import Statistics
+
+DEFAULT_TOP = 10
+
+UsageReport = namedtuple('UsageReport', ['files', 'bytes', 'top_directories',
+                                         'top_files'])
+
+
+def get_ancestors(directory, base_dir):
+    # Yields the directory and all its parents up to the base directory.
+    while True:
+        yield directory
+        if directory == base_dir:
+            return
+        parent = os.path.dirname(directory)
+        if parent == directory:
+            return
+        directory = parent
+
+
+def summarize_orphans(listings, referenced, base_dir, top=DEFAULT_TOP):
+    # Only totals of directories and the largest files are kept, the list
+    # of orphans itself is never built.
+    totals = {}
+    top_files = []
+    files = size = 0
+    for directory, names in listings:
+        directory_size = directory_files = 0
+        for name in names:
+            path = os.path.normpath(os.path.join(directory, name))
+            if path in referenced:
+                continue
+            directory_size += name.size
+            directory_files += 1
+            if len(top_files) < top:
+                heapq.heappush(top_files, (name.size, path))
+            elif name.size > top_files[0][0]:
+                heapq.heapreplace(top_files, (name.size, path))
+        if directory_files == 0:
+            continue
+        files += directory_files
+        size += directory_size
+        for ancestor in get_ancestors(os.path.normpath(directory), base_dir):
+            ancestor_size, ancestor_files = totals.get(ancestor, (0, 0))
+            totals[ancestor] = (ancestor_size + directory_size,
+                                ancestor_files + directory_files)
+
+    top_directories = heapq.nlargest(top, ((total[0], total[1], directory)
+                                           for directory, total in totals.items()))
+    return UsageReport(files, size, top_directories, sorted(top_files, reverse=True))
+
+
+def create_usage_report(zotero_dbase, zotero_prefs, top=DEFAULT_TOP, jobs=1,
+                        immutable=False, snapshot=False, stats=None,
+                        normalization='none', path_filter=None):
+    if stats is None:
+        stats = Statistics()
+
+    with stats.phase('get_base_path'):
+        base_path = zotler.get_base_path(zotero_prefs)
+
+    with stats.phase('database query', 'paths') as phase:
+        relative_paths = zotler.get_relative_paths(zotero_dbase, immutable=immutable,
+                                                   snapshot=snapshot,
+                                                   base_path=base_path)
+        referenced = PathIndex(zotler.get_absolute_paths(base_path, relative_paths),
+                               key=get_normalizer(normalization))
+        phase.items = len(referenced)
+
+    with stats.phase('tree walk', 'orphans') as phase:
+        listings = walker.walk_directories(base_path, jobs=jobs,
+                                           scan=walker.scan_directory_with_sizes,
+                                           path_filter=path_filter)
+        report = summarize_orphans(listings, referenced, os.path.normpath(base_path),
+                                   top=top)
+        phase.items = report.files
+    return report
+
+
+def format_size(size):
+    for unit in ('B', 'KiB', 'MiB', 'GiB'):
+        if size < 1024:
+            return f'{size:.1f} {unit}' if unit != 'B' else f'{size} B'
+        size /= 1024
+    return f'{size:.1f} TiB'
+
+
+def format_usage_report(report):
+    yield f'{report.files} orphan files, {format_size(report.bytes)}'
+    yield ''
+    yield f'Top {len(report.top_directories)} directories:'
+    for size, files, directory in report.top_directories:
+        yield f'{format_size(size):>12} {files:>9} files  {directory}'
+    yield ''
+    yield f'Top {len(report.top_files)} files:'
+    for size, path in report.top_files:
+        yield f'{format_size(size):>12}  {path}'
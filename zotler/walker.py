@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+import os
+import re
+
+
+def translate_glob(pattern):
+    # Like fnmatch.translate, but * and ? don't match slashes, so they stay
+    # in one directory, and ** matches any number of directories.
+    parts = []
+    i, n = 0, len(pattern)
+    while i < n:
+        char = pattern[i]
+        i += 1
+        if char == '*' and pattern.startswith('*', i):
+            i += 1
+            if pattern.startswith('/', i):
+                i += 1
+                parts.append('(?:.*/)?')
+            else:
+                parts.append('.*')
+        elif char == '*':
+            parts.append('[^/]*')
+        elif char == '?':
+            parts.append('[^/]')
+        elif char == '[':
+            j = i
+            if pattern.startswith('!', j):
+                j += 1
+            if pattern.startswith(']', j):
+                j += 1
+            j = pattern.find(']', j)
+            if j < 0:
+                parts.append('\\[')
+                continue
+            chars = pattern[i:j].replace('\\', '\\\\')
+            i = j + 1
+            if chars.startswith('!'):
+                chars = f'^{chars[1:]}'
+            elif chars.startswith('^'):
+                chars = f'\\{chars}'
+            parts.append(f'[{chars}]')
+        else:
+            parts.append(re.escape(char))
+    return f'(?s:{"".join(parts)})\\Z'
+
+
+def compile_globs(patterns):
+    # Patterns without a slash match the name in any directory, the others
+    # match the path relative to the walked directory. All of them end up
+    # in one regular expression.
+    regexes = []
+    for pattern in patterns:
+        pattern = pattern.strip('/')
+        regex = translate_glob(pattern)
+        if '/' not in pattern:
+            regex = f'(?s:.*/)?{regex}'
+        regexes.append(f'(?:{regex})')
+    if not regexes:
+        return None
+    return re.compile('|'.join(regexes))
+
+
+class PathFilter:
+    def __init__(self, exclude=(), include=()):
+        self._exclude = compile_globs(exclude)
+        self._include = compile_globs(include)
+
+    def filter(self, relative_dir, files, subdirs):
+        # Excluded subdirectories are dropped before they are scanned, included
+        # patterns select files only, any directory can contain them.
+        prefix = f'{relative_dir}/' if relative_dir else ''
+        if self._exclude is not None:
+            subdirs = [i for i in subdirs if not self._exclude.match(prefix + i)]
+            files = [i for i in files if not self._exclude.match(prefix + i)]
+        if self._include is not None:
+            files = [i for i in files if self._include.match(prefix + i)]
+        return files, subdirs
+
+    def matches(self, relative_path):
+        # Tells whether a walk keeps the file, e.g. a path read from Zotero
+        # database. The file is dropped also if any of its directories is.
+        parts = relative_path.replace(os.sep, '/').strip('/').split('/')
+        if self._exclude is not None:
+            for i in range(1, len(parts) + 1):
+                if self._exclude.match('/'.join(parts[:i])):
+                    return False
+        return self._include is None or bool(self._include.match('/'.join(parts)))
+
+
+def scan_directory(directory):
+    files = []
+    subdirs = []
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                # d_type answers is_symlink()/is_dir() without a stat call;
+                # only symlinks have to be resolved to tell files from dirs.
+                try:
+                    if entry.is_symlink():
+                        if not entry.is_dir():
+                            files.append(entry.name)
+                    elif entry.is_dir():
+                        subdirs.append(entry.name)
+                    else:
+                        files.append(entry.name)
+                except OSError:
+                    files.append(entry.name)
+    except OSError:
+        pass
+    return files, subdirs
+
+
+class SizedName(str):
+    # A file name carrying the size of the file, it passes through filters
+    # and joins like any other name.
+    size = 0
+
+
+def scan_directory_with_sizes(directory):
+    # Sizes come from the entries of the same scandir call, files whose size
+    # can't be read are reported with the size 0.
+    files = []
+    subdirs = []
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_symlink():
+                        if entry.is_dir():
+                            continue
+                    elif entry.is_dir():
+                        subdirs.append(entry.name)
+                        continue
+                    name = SizedName(entry.name)
+                    name.size = entry.stat(follow_symlinks=False).st_size
+                except OSError:
+                    name = SizedName(entry.name)
+                files.append(name)
+    except OSError:
+        pass
+    return files, subdirs
+
+
+def walk_directories(base_dir, jobs=1, scan=scan_directory, path_filter=None):
+    if jobs <= 1:
+        yield from _walk_sequentially(base_dir, scan, path_filter)
+    else:
+        yield from _walk_in_parallel(base_dir, jobs, scan, path_filter)
+
+
+def _walk_sequentially(base_dir, scan, path_filter):
+    pending = [(base_dir, '')]
+    while pending:
+        directory, relative_dir = pending.pop()
+        files, subdirs = scan(directory)
+        if path_filter is not None:
+            files, subdirs = path_filter.filter(relative_dir, files, subdirs)
+        pending.extend((os.path.join(directory, i), _join(relative_dir, i))
+                       for i in subdirs)
+        yield directory, files
+
+
+def _walk_in_parallel(base_dir, jobs, scan, path_filter):
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        running = {executor.submit(scan, base_dir): (base_dir, '')}
+        try:
+            while running:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    directory, relative_dir = running.pop(future)
+                    files, subdirs = future.result()
+                    if path_filter is not None:
+                        files, subdirs = path_filter.filter(relative_dir, files,
+                                                            subdirs)
+                    for subdir in subdirs:
+                        path = os.path.join(directory, subdir)
+                        running[executor.submit(scan, path)] = (
+                            path, _join(relative_dir, subdir))
+                    yield directory, files
+        finally:
+            for future in running:
+                future.cancel()
+
+
+def _join(relative_dir, name):
+    return f'{relative_dir}/{name}' if relative_dir else name
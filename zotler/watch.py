@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+
+from collections import Counter
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+import threading
+
+from zotler import output, walker, zotler
+from zotler.exceptions import ZotlerError
+from zotler.path_index import PathIndex
+
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_DONT_FOLLOW = 0x02000000
+IN_ISDIR = 0x40000000
+
+WATCH_MASK = (IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO
+              | IN_ONLYDIR | IN_DONT_FOLLOW)
+UNWATCHABLE_ERRORS = (errno.ENOENT, errno.ENOTDIR, errno.EACCES, errno.EPERM,
+                      errno.ELOOP, errno.ENAMETOOLONG)
+EVENT_HEADER = struct.Struct('iIII')
+READ_SIZE = 64 * 1024
+
+
+class Inotify:
+    def __init__(self):
+        self._libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        self.fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            self._raise_error('inotify_init1')
+
+    def add_watch(self, path, mask=WATCH_MASK):
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            self._raise_error(path)
+        return wd
+
+    def remove_watch(self, wd):
+        self._libc.inotify_rm_watch(self.fd, wd)
+
+    def read_events(self, timeout=None):
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return
+        while True:
+            try:
+                data = os.read(self.fd, READ_SIZE)
+            except BlockingIOError:
+                return
+            offset = 0
+            while offset < len(data):
+                wd, mask, cookie, length = EVENT_HEADER.unpack_from(data, offset)
+                offset += EVENT_HEADER.size
+                name = data[offset:offset + length].rstrip(b'\0')
+                offset += length
+                yield wd, mask, cookie, os.fsdecode(name)
+
+    def close(self):
+        os.close(self.fd)
+
+    @staticmethod
+    def _raise_error(filename):
+        error_number = ctypes.get_errno()
+        raise OSError(error_number, os.strerror(error_number), filename)
+
+
+class OrphanWatcher:
+    def __init__(self, zotero_dbase, zotero_prefs, poll_interval=1.0):
+        self.base_path = zotler.get_base_path(zotero_prefs)
+        self.zotero_dbase = zotero_dbase
+        self.poll_interval = poll_interval
+
+        self._lock = threading.Lock()
+        self._inotify = None
+        self._watches = {}
+        self._connection = None
+        self._has_modified_column = False
+        self._data_version = None
+        self._last_modified = None
+        self._references = {}
+        self._reference_counts = Counter()
+        self._existing_files = PathIndex()
+        self._orphans = set()
+
+    @property
+    def orphans(self):
+        with self._lock:
+            return sorted(self._orphans)
+
+    def start(self):
+        self._inotify = Inotify()
+        self._connection = zotler.connect_to_database(self.zotero_dbase)
+        self._has_modified_column = any(
+            row[1] == 'clientDateModified'
+            for row in self._connection.execute('PRAGMA table_info(items)')
+        )
+        self.refresh_references()
+        self._add_tree(self.base_path)
+
+    def stop(self):
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def run(self, on_change=None, stop_event=None):
+        self.start()
+        try:
+            if on_change is not None:
+                on_change(self)
+            while stop_event is None or not stop_event.is_set():
+                changed = self.process_events(timeout=self.poll_interval)
+                changed = self.refresh_references() or changed
+                if changed and on_change is not None:
+                    on_change(self)
+        finally:
+            self.stop()
+
+    def process_events(self, timeout=None):
+        changed = False
+        for wd, mask, _, name in self._inotify.read_events(timeout):
+            changed = True
+            if mask & IN_Q_OVERFLOW:
+                self._rebuild()
+                continue
+            if mask & IN_IGNORED:
+                self._watches.pop(wd, None)
+                continue
+            directory = self._watches.get(wd)
+            if directory is None:
+                continue
+
+            path = os.path.normpath(os.path.join(directory, name))
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    self._add_tree(path)
+                else:
+                    self._remove_tree(path)
+            elif mask & (IN_CREATE | IN_MOVED_TO):
+                if not (os.path.islink(path) and os.path.isdir(path)):
+                    self._add_file(path)
+            else:
+                self._remove_file(path)
+        return changed
+
+    def refresh_references(self):
+        version = self._connection.execute('PRAGMA data_version').fetchone()[0]
+        if version == self._data_version:
+            return False
+        self._data_version = version
+
+        item_ids = {row[0] for row in self._connection.execute(
+            'SELECT itemID FROM itemAttachments WHERE path IS NOT NULL'
+        )}
+        for item_id in set(self._references) - item_ids:
+            self._set_reference(item_id, None)
+
+        for item_id, path in self._read_changed_rows():
+            relative_path = zotler.get_relative_attachment_path(path, self.base_path)
+            if relative_path is not None:
+                path = os.path.normpath(os.path.join(self.base_path, relative_path))
+                self._set_reference(item_id, path)
+            else:
+                self._set_reference(item_id, None)
+        return True
+
+    def _read_changed_rows(self):
+        if not self._has_modified_column:
+            yield from self._connection.execute(
+                'SELECT itemID, path FROM itemAttachments WHERE path IS NOT NULL'
+            )
+            return
+
+        # Rows modified in the same second as the last seen one are read again,
+        # setting the same reference twice doesn't change anything.
+        cursor = self._connection.execute(
+            'SELECT itemAttachments.itemID, path, clientDateModified '
+            'FROM itemAttachments JOIN items USING (itemID) '
+            'WHERE path IS NOT NULL AND clientDateModified >= ?',
+            (self._last_modified or '', )
+        )
+        for item_id, path, modified in cursor:
+            if self._last_modified is None or modified > self._last_modified:
+                self._last_modified = modified
+            yield item_id, path
+
+    def _set_reference(self, item_id, path):
+        old_path = self._references.pop(item_id, None)
+        if path is not None:
+            self._references[item_id] = path
+        if old_path == path:
+            return
+
+        with self._lock:
+            if path is not None:
+                self._reference_counts[path] += 1
+                self._orphans.discard(path)
+            if old_path is not None:
+                self._reference_counts[old_path] -= 1
+                if self._reference_counts[old_path] <= 0:
+                    del self._reference_counts[old_path]
+                    if old_path in self._existing_files:
+                        self._orphans.add(old_path)
+
+    def _scan_and_watch(self, directory):
+        try:
+            self._watches[self._inotify.add_watch(directory)] = os.path.normpath(directory)
+        except OSError as error:
+            if error.errno == errno.ENOSPC:
+                raise ZotlerError(
+                    f'Cannot watch {directory}, the limit of inotify watches has '
+                    f'been reached. Raise it with sysctl fs.inotify.max_user_watches.'
+                ) from error
+            # Directories removed meanwhile or not readable are left out.
+            if error.errno not in UNWATCHABLE_ERRORS:
+                raise
+        return walker.scan_directory(directory)
+
+    def _add_tree(self, directory):
+        for subdir, files in walker.walk_directories(directory,
+                                                     scan=self._scan_and_watch):
+            for name in files:
+                self._add_file(os.path.normpath(os.path.join(subdir, name)))
+
+    def _remove_tree(self, directory):
+        prefix = os.path.join(directory, '')
+        for wd, path in list(self._watches.items()):
+            if path == directory or path.startswith(prefix):
+                self._inotify.remove_watch(wd)
+                del self._watches[wd]
+        with self._lock:
+            for path in self._existing_files.discard_tree(directory):
+                self._orphans.discard(path)
+
+    def _add_file(self, path):
+        with self._lock:
+            self._existing_files.add(path)
+            if path not in self._reference_counts:
+                self._orphans.add(path)
+
+    def _remove_file(self, path):
+        with self._lock:
+            self._existing_files.discard(path)
+            self._orphans.discard(path)
+
+    def _rebuild(self):
+        for wd in self._watches:
+            self._inotify.remove_watch(wd)
+        self._watches.clear()
+        with self._lock:
+            self._existing_files = PathIndex()
+            self._orphans.clear()
+        self._add_tree(self.base_path)
+
+
+def save_orphans(orphans, path, output_format='text'):
+    # The list is replaced atomically, readers never see a half-written file.
+    directory = os.path.dirname(os.path.abspath(path))
+    temp_path = os.path.join(directory, f'.{os.path.basename(path)}.tmp')
+    with open(temp_path, 'w', newline='') as output_file:
+        output.write_orphans(orphans, output_file, output_format)
+    os.replace(temp_path, path)
@@ -1,30 +1,82 @@
 #!/usr/bin/env python3
 
-import click
+from collections import namedtuple
 import os
 from pathlib import Path
-import platform
 import re
-import sqlite3
 
 import zotler
+from zotler import deletion, output, walker
+from zotler.exceptions import InvalidModeError
+from zotler.path_index import PathIndex, get_normalizer
+from zotler.stats import Statistics
+
+ENGINES = ('set', 'sqlite')
+
+ATTACHMENT_PREFIX = 'attachments:'
+
+FETCH_SIZE = 1000
+
+STORAGE_KEY_PATTERN = re.compile('^[23456789ABCDEFGHIJKLMNPQRSTUVWXYZ]{8}$')
+
+MissingAttachment = namedtuple('MissingAttachment', ['item_id', 'key', 'path'])
 
 
 def print_version(ctx, _, value):
     if not value or ctx.resilient_parsing:
         return
+    import click
     click.echo(zotler.__version__)
     ctx.exit()
 
 
-def delete_files(ctx, _, value):
-    if not value or ctx.resilient_parsing:
-        return
-    remove_files(value)
-    ctx.exit()
+def delete_files(list_file, zotero_prefs, zotero_dbase, jobs=deletion.DEFAULT_JOBS,
+                 verbose=True, immutable=False, normalization='none'):
+    from zotler import list_deletion
+
+    removed = missing = failed = skipped = 0
+    for checked, results in list_deletion.remove_listed_files(
+            output.read_paths(list_file), zotero_prefs, zotero_dbase, jobs=jobs,
+            immutable=immutable, normalization=normalization):
+        for path in checked.outside:
+            print(f'Skipping {path}: outside ZotFile Custom Location.')
+        for path in checked.referenced:
+            print(f'Skipping {path}: referenced in Zotero database.')
+        for path in checked.invalid:
+            print(f'Skipping {path!r}: invalid path.')
+        skipped += (len(checked.outside) + len(checked.referenced)
+                    + len(checked.invalid))
+        for result in results:
+            removed += len(result.removed)
+            missing += len(result.missing)
+            failed += len(result.failed)
+            if verbose:
+                for name in result.removed:
+                    print(f'Removing: {os.path.join(result.directory, name)}')
+                for name in result.missing:
+                    print(f'File {os.path.join(result.directory, name)} not found.')
+            for name, error in result.failed:
+                print(f'Cannot remove {os.path.join(result.directory, name)}: {error}')
+
+    print(f'{removed} files removed, {missing} not found, {failed} failed, '
+          f'{skipped} skipped.')
+    return deletion.DeletionSummary(removed, missing, failed)
 
 
-def system_specific_path_to_profiles():
+def undo_quarantine(run_directory, quarantine_dir=None, verbose=True):
+    from zotler import quarantine
+    return restore_files(quarantine.QuarantineRun.open(run_directory, quarantine_dir),
+                         verbose=verbose)
+
+
+def purge_quarantine(run_directory, quarantine_dir=None):
+    from zotler import quarantine
+    quarantine.QuarantineRun.open(run_directory, quarantine_dir).purge()
+    print(f'Quarantine {run_directory} purged.')
+
+
+def system_specific_path_to_profiles(home_dir=None):
+    import platform
     system = platform.system()
     if system == 'Linux':
         path = os.path.join('.zotero', 'zotero')
@@ -34,7 +86,9 @@ def system_specific_path_to_profiles():
     else:
         raise OSError('Unidentified OS. Cannot predict preferences '
                       'directory location.')
-    return os.path.join(str(Path.home()), path)
+    if home_dir is None:
+        home_dir = str(Path.home())
+    return os.path.join(home_dir, path)
 
 
 def get_prefs_file(prefs_path=None, silent=False):
@@ -52,10 +106,10 @@ def get_prefs_file(prefs_path=None, silent=False):
     return prefs_path
 
 
-def get_base_path(prefs_path):
+def get_preference(prefs_path, name):
     with open(prefs_path, 'r') as js_file:
         pattern = re.compile(
-            r'^user_pref\("extensions\.zotfile\.dest_dir", "(.*)"\);$'
+            rf'^user_pref\("{re.escape(name)}", "(.*)"\);$'
         )
         for line in js_file:
             match = re.match(pattern, line)
@@ -63,14 +117,108 @@ def get_base_path(prefs_path):
                 return match.group(1)
 
 
-def get_relative_paths(sql_file):
-    connection = sqlite3.connect(sql_file)
+def get_base_path(prefs_path):
+    return get_preference(prefs_path, 'extensions.zotfile.dest_dir')
+
+
+def get_data_dir(prefs_path, home_dir=None):
+    data_dir = get_preference(prefs_path, 'extensions.zotero.dataDir')
+    if data_dir is None:
+        if home_dir is None:
+            home_dir = str(Path.home())
+        data_dir = os.path.join(home_dir, 'Zotero')
+    return data_dir
+
+
+def get_database_path(prefs_path, home_dir=None):
+    return os.path.join(get_data_dir(prefs_path, home_dir), 'zotero.sqlite')
+
+
+def connect_to_database(sql_file, immutable=False, snapshot=False):
+    import sqlite3
+
+    uri = f'{Path(sql_file).resolve().as_uri()}?mode=ro'
+    if immutable:
+        uri += '&immutable=1'
+    connection = sqlite3.connect(uri, uri=True)
+
+    if snapshot:
+        snapshot_connection = sqlite3.connect('')
+        try:
+            connection.backup(snapshot_connection)
+        finally:
+            connection.close()
+        connection = snapshot_connection
+    return connection
+
+
+def get_relative_paths(sql_file, immutable=False, snapshot=False, base_path=None):
+    connection = connect_to_database(sql_file, immutable=immutable,
+                                     snapshot=snapshot)
+    try:
+        yield from read_relative_paths(connection, base_path=base_path)
+    finally:
+        connection.close()
+
+
+def get_relative_attachment_path(path, base_path=None):
+    # Linked files are stored relative to the base directory (attachments:),
+    # or by absolute paths if Zotero has no base directory set. Files stored
+    # by Zotero (storage:) and linked files outside ZotFile Custom Location
+    # are left out.
+    if path.startswith(ATTACHMENT_PREFIX):
+        return path[len(ATTACHMENT_PREFIX):]
+    if base_path is not None and os.path.isabs(path):
+        prefix = os.path.join(os.path.normpath(base_path), '')
+        path = os.path.normpath(path)
+        if path.startswith(prefix):
+            return path[len(prefix):]
+    return None
+
+
+def read_relative_paths(connection, base_path=None):
     cursor = connection.cursor()
     cursor.execute('SELECT path FROM itemAttachments WHERE path IS NOT NULL')
-    pattern = re.compile('^attachments:(.*)$')
-    for records in cursor.fetchall():
-        match = re.match(pattern, records[0])
-        yield match.group(1)
+    for record in iterate_records(cursor):
+        relative_path = get_relative_attachment_path(record[0], base_path)
+        if relative_path is not None:
+            yield relative_path
+
+
+def get_attachment_records(sql_file, immutable=False, snapshot=False, base_path=None):
+    connection = connect_to_database(sql_file, immutable=immutable,
+                                     snapshot=snapshot)
+    try:
+        cursor = connection.cursor()
+        cursor.execute('SELECT itemAttachments.itemID, items.key, itemAttachments.path '
+                       'FROM itemAttachments LEFT JOIN items USING (itemID) '
+                       'WHERE itemAttachments.path IS NOT NULL')
+        for item_id, key, path in iterate_records(cursor):
+            relative_path = get_relative_attachment_path(path, base_path)
+            if relative_path is not None:
+                yield item_id, key, relative_path
+    finally:
+        connection.close()
+
+
+def get_attachment_keys(sql_file, immutable=False, snapshot=False):
+    connection = connect_to_database(sql_file, immutable=immutable,
+                                     snapshot=snapshot)
+    try:
+        cursor = connection.cursor()
+        cursor.execute('SELECT items.key FROM items '
+                       'JOIN itemAttachments USING (itemID)')
+        for record in iterate_records(cursor):
+            yield record[0]
+    finally:
+        connection.close()
+
+
+def iterate_records(cursor):
+    records = cursor.fetchmany(FETCH_SIZE)
+    while records:
+        yield from records
+        records = cursor.fetchmany(FETCH_SIZE)
 
 
 def get_absolute_paths(base_path, relative_paths):
@@ -78,28 +226,233 @@ def get_absolute_paths(base_path, relative_paths):
         yield os.path.normpath(os.path.join(base_path, relative_path))
 
 
-def get_paths_to_existing_files(base_dir):
-    for directory, subdirs, files in os.walk(base_dir):
+def walk_existing_directories(base_dir, jobs=1, cache=None, path_filter=None):
+    scan = walker.scan_directory if cache is None else cache.scan
+    return walker.walk_directories(base_dir, jobs=jobs, scan=scan,
+                                   path_filter=path_filter)
+
+
+def get_paths_to_existing_files(base_dir, jobs=1, cache=None, path_filter=None):
+    for directory, files in walk_existing_directories(base_dir, jobs=jobs,
+                                                      cache=cache,
+                                                      path_filter=path_filter):
         for i in files:
             yield os.path.normpath(os.path.join(directory, i))
 
 
-def create_set_of_orphans(zotero_dbase, zotero_prefs):
-    base_path = get_base_path(zotero_prefs)
-    relative_paths = get_relative_paths(zotero_dbase)
-    absolute_paths = set(get_absolute_paths(base_path, relative_paths))
+def create_index_of_existing_files(base_dir, jobs=1, cache=None, path_filter=None):
+    index = PathIndex()
+    for directory, files in walk_existing_directories(base_dir, jobs=jobs,
+                                                      cache=cache,
+                                                      path_filter=path_filter):
+        index.add_directory(directory, files)
+    return index
+
+
+def create_set_of_orphans(zotero_dbase, zotero_prefs, jobs=1, cache=None,
+                          immutable=False, snapshot=False, stats=None,
+                          normalization='none', path_filter=None):
+    from zotler.scanner import OrphanScanner
+
+    with OrphanScanner(zotero_dbase, zotero_prefs, jobs=jobs, cache=cache,
+                       immutable=immutable, snapshot=snapshot,
+                       normalization=normalization, path_filter=path_filter,
+                       stats=stats) as scanner:
+        return set(scanner.scan())
+
+
+def find_orphans_and_missing_files(zotero_dbase, zotero_prefs, jobs=1, cache=None,
+                                   immutable=False, snapshot=False, stats=None,
+                                   normalization='none', path_filter=None):
+    if stats is None:
+        stats = Statistics()
+    normalize = get_normalizer(normalization)
+
+    with stats.phase('get_base_path'):
+        base_path = get_base_path(zotero_prefs)
+
+    with stats.phase('tree walk', 'files') as phase:
+        existing_files = create_index_of_existing_files(base_path, jobs=jobs,
+                                                        cache=cache,
+                                                        path_filter=path_filter)
+        phase.items = len(existing_files)
+        # Database paths are looked up among the normalized names on disk.
+        existing_keys = (existing_files if normalize is None
+                         else PathIndex(existing_files, key=normalize))
+
+    # Rows are matched against the walked tree as they are read, so item IDs
+    # and keys are kept only for the missing files.
+    referenced_files = PathIndex(key=normalize)
+    missing_files = []
+    with stats.phase('database query', 'rows') as phase:
+        phase.items = 0
+        for item_id, key, relative_path in get_attachment_records(
+                zotero_dbase, immutable=immutable, snapshot=snapshot,
+                base_path=base_path):
+            phase.items += 1
+            # Files left out of the walk are neither missing nor referenced.
+            if path_filter is not None and not path_filter.matches(
+                    os.path.normpath(relative_path)):
+                continue
+            path = os.path.normpath(os.path.join(base_path, relative_path))
+            if path in existing_keys:
+                referenced_files.add(path)
+            else:
+                missing_files.append(MissingAttachment(item_id, key, path))
+
+    with stats.phase('difference', 'files') as phase:
+        orphans = existing_files - referenced_files
+        phase.items = len(existing_files)
+    return orphans, missing_files
+
+
+def list_storage_directories(storage_dir):
+    # Only the key directories are listed, files inside them are never touched.
+    try:
+        with os.scandir(storage_dir) as entries:
+            for entry in entries:
+                if (re.match(STORAGE_KEY_PATTERN, entry.name)
+                        and entry.is_dir(follow_symlinks=False)):
+                    yield entry.name
+    except FileNotFoundError:
+        return
+
+
+def find_orphan_storage_directories(zotero_dbase, zotero_prefs, immutable=False,
+                                    snapshot=False, stats=None):
+    if stats is None:
+        stats = Statistics()
+
+    with stats.phase('get_data_dir'):
+        storage_dir = os.path.join(get_data_dir(zotero_prefs), 'storage')
+
+    with stats.phase('database query', 'keys') as phase:
+        keys = set(get_attachment_keys(zotero_dbase, immutable=immutable,
+                                       snapshot=snapshot))
+        phase.items = len(keys)
+
+    with stats.phase('directory listing', 'dirs') as phase:
+        directories = list(list_storage_directories(storage_dir))
+        phase.items = len(directories)
+
+    with stats.phase('difference', 'dirs') as phase:
+        orphans = [os.path.join(storage_dir, i) for i in sorted(directories)
+                   if i not in keys]
+        phase.items = len(directories)
+    return orphans
 
-    existing_files = set(get_paths_to_existing_files(base_path))
-    return existing_files - absolute_paths
 
+def find_orphans(zotero_dbase, zotero_prefs, jobs=1, cache=None,
+                 immutable=False, snapshot=False, engine='set', stats=None,
+                 normalization='none', path_filter=None):
+    if engine == 'set':
+        from zotler.scanner import OrphanScanner
 
-def remove_files(filepaths):
-    for file in filepaths:
-        path = file.strip()
-        if path == '':
-            continue
-        print(f'Removing: {path}')
+        with OrphanScanner(zotero_dbase, zotero_prefs, jobs=jobs, cache=cache,
+                           immutable=immutable, snapshot=snapshot,
+                           normalization=normalization, path_filter=path_filter,
+                           stats=stats) as scanner:
+            yield from scanner.scan()
+    elif engine == 'sqlite':
+        from zotler import sqlite_engine
+
+        if stats is None:
+            stats = Statistics()
+
+        with stats.phase('get_base_path'):
+            base_path = get_base_path(zotero_prefs)
+
+        connection = connect_to_database(zotero_dbase, immutable=immutable,
+                                         snapshot=snapshot)
         try:
-            os.remove(path)
+            existing_files = get_paths_to_existing_files(base_path, jobs=jobs,
+                                                         cache=cache,
+                                                         path_filter=path_filter)
+            yield from sqlite_engine.iterate_orphans(
+                connection, base_path, existing_files, stats=stats,
+                normalize=get_normalizer(normalization))
+        finally:
+            connection.close()
+    else:
+        raise InvalidModeError(f'Unknown engine {engine}.')
+
+
+def remove_files(filepaths, jobs=deletion.DEFAULT_JOBS, verbose=True, strip=True):
+    removed = missing = failed = 0
+    for result in deletion.remove_files_in_batches(filepaths, jobs=jobs, strip=strip):
+        removed += len(result.removed)
+        missing += len(result.missing)
+        failed += len(result.failed)
+        if verbose:
+            for name in result.removed:
+                print(f'Removing: {os.path.join(result.directory, name)}')
+            for name in result.missing:
+                print(f'File {os.path.join(result.directory, name)} not found.')
+        for name, error in result.failed:
+            print(f'Cannot remove {os.path.join(result.directory, name)}: {error}')
+
+    print(f'{removed} files removed, {missing} not found, {failed} failed.')
+    return deletion.DeletionSummary(removed, missing, failed)
+
+
+def remove_directories(directories, verbose=True):
+    import shutil
+
+    removed = missing = failed = 0
+    for directory in directories:
+        try:
+            shutil.rmtree(directory)
         except FileNotFoundError:
-            print(f'File {path} not found.')
+            missing += 1
+            if verbose:
+                print(f'Directory {directory} not found.')
+        except OSError as error:
+            failed += 1
+            print(f'Cannot remove {directory}: {error}')
+        else:
+            removed += 1
+            if verbose:
+                print(f'Removing: {directory}')
+
+    print(f'{removed} directories removed, {missing} not found, {failed} failed.')
+    return deletion.DeletionSummary(removed, missing, failed)
+
+
+def quarantine_files(filepaths, quarantine_dir, verbose=True, strip=True):
+    from zotler import quarantine
+
+    run = quarantine.QuarantineRun.create(quarantine_dir)
+    moved = missing = failed = 0
+    for result in run.move_files(filepaths, strip=strip):
+        if result.error is None:
+            moved += 1
+            if verbose:
+                print(f'Moving: {result.source}')
+        elif isinstance(result.error, FileNotFoundError):
+            missing += 1
+            if verbose:
+                print(f'File {result.source} not found.')
+        else:
+            failed += 1
+            print(f'Cannot move {result.source}: {result.error}')
+
+    print(f'{moved} files moved to {run.directory}, {missing} not found, '
+          f'{failed} failed.')
+    return run
+
+
+def restore_files(run, verbose=True):
+    restored = missing = failed = 0
+    for result in run.undo():
+        if result.error is None:
+            restored += 1
+            if verbose:
+                print(f'Restoring: {result.target}')
+        elif isinstance(result.error, FileNotFoundError):
+            missing += 1
+        else:
+            failed += 1
+            print(f'Cannot restore {result.target}: {result.error}')
+
+    print(f'{restored} files restored, {missing} not found, {failed} failed.')
+    return deletion.DeletionSummary(restored, missing, failed)